@@ -1,120 +1,411 @@
-from flask import Flask, render_template, request, jsonify
-from datetime import datetime
+from flask import Flask, Response, render_template, request, jsonify
+from datetime import datetime, timedelta
 import json
+import os
+import threading
+import time
 from core.liu_ren import LiuRenPan
-from core.analysis import LiuRenAnalysis
-from core.event_analyzer import EventAnalyzer
-from data.classics import ClassicsDatabase
-from data.modern import ModernTheory
+from core.engine import get_analysis_engine, is_engine_ready, warm_up
+from core.lazy import lazy_resource, resource_status, warm_up_resources
+from core.metrics import (SERVER_TIMING_ENABLED, collect_timings, render_metrics,
+                          server_timing_header, stage_timer)
+from core.profiling import is_authorized, load_profile, profile_mode, repeat_count, run_profiled
+from core.result_cache import bypass_caches
+from core.segmenter import get_segmenter
+from core.static_payloads import StaticPayload, StaticPayloads
+from core.text_dictionary import CBOR_MIMETYPE, TextDictionary, accepts_cbor
+from core.text_table import render_pan
 
 app = Flask(__name__)
+started_at = time.time()
 
-# 初始化数据库和分析器
-classics_db = ClassicsDatabase()
-modern_theory = ModernTheory()
-event_analyzer = EventAnalyzer()
+def _create_classics_db():
+    from data.classics import ClassicsDatabase
+    return ClassicsDatabase()
+
+def _create_modern_theory():
+    from data.modern import ModernTheory
+    return ModernTheory()
+
+def _create_event_analyzer():
+    from core.event_analyzer import EventAnalyzer
+    return EventAnalyzer()
+
+# 数据库和分析器在首次使用时构建（或由后台预热），进程启动后即可提供服务
+classics_db = lazy_resource('classics_db', _create_classics_db)
+modern_theory = lazy_resource('modern_theory', _create_modern_theory)
+event_analyzer = lazy_resource('event_analyzer', _create_event_analyzer)
+
+# 古籍与现代理论内容运行期间不变，预先序列化并压缩
+static_payloads = lazy_resource(
+    'static_payloads',
+    lambda: StaticPayloads(classics_db.get(), modern_theory.get(), app.json.dumps)
+)
+
+# 构建文本字典时排盘一次，取得响应各层的字段名
+TEXT_DICTIONARY_SAMPLE = {'year': 2024, 'month': 1, 'day': 1, 'hour': 12, 'minute': 0}
+
+def _create_text_dictionary():
+    from core.pan_table import get_pan_table
+    analyzer = event_analyzer.get()
+    sources = [
+        modern_theory.get().get_all_theories(),
+        analyzer.event_categories,
+        analyzer._get_default_analysis(),
+        [analyzer._get_personalized_focus(event_type) for event_type in analyzer.event_categories],
+        run_calculate(TEXT_DICTIONARY_SAMPLE)
+    ]
+    table = get_pan_table()
+    records = [render_pan(entry) for entry in table.entries.values()] if table is not None else []
+    return TextDictionary.build(sources, records)
+
+# CBOR 响应中静态文本的编号字典，客户端下载一次后按版本缓存
+text_dictionary = lazy_resource('text_dictionary', _create_text_dictionary)
+text_dictionary_payload = lazy_resource(
+    'text_dictionary_payload',
+    lambda: StaticPayload(app.json.dumps(text_dictionary.get().to_json()).encode('utf-8'))
+)
+
+# /healthz 判定就绪所需的组件（jieba 词典未就绪时有关键词切分兜底，不计入）
+READINESS_COMPONENTS = ('classics_db', 'modern_theory', 'event_analyzer', 'static_payloads', 'analysis_engine')
+
+def warm_up_all():
+    """构建全部延迟对象和分析引擎"""
+    warm_up_resources()
+    warm_up()
+
+# 已启动预热的进程号；fork 出的工作进程号不同，会重新预热尚未就绪的部分
+_warm_up_pid = None
+
+def warm_up_all_in_background():
+    """在后台线程中预热，不阻塞服务启动（每个进程只启动一次）"""
+    global _warm_up_pid
+    if _warm_up_pid == os.getpid():
+        return None
+    _warm_up_pid = os.getpid()
+    thread = threading.Thread(target=warm_up_all, name='app-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+@app.before_request
+def _ensure_warm_up():
+    # gunicorn 等 WSGI 服务器不经过 __main__，由进程收到的第一个请求（通常是 /healthz 探针）触发预热
+    if _warm_up_pid != os.getpid():
+        warm_up_all_in_background()
+
+# LIUREN_WARM_UP=1 时导入即开始预热（gunicorn --preload 在主进程中预热，工作进程直接继承）
+if os.environ.get('LIUREN_WARM_UP') == '1':
+    from data.case_corpus import ensure_case_corpora
+    ensure_case_corpora()
+    warm_up_all_in_background()
+
+def _static_response(payload):
+    """返回预生成的 JSON，支持 gzip 与 ETag 条件请求"""
+    status, headers, body = payload.respond(request.headers.get('If-None-Match', ''),
+                                            request.headers.get('Accept-Encoding', ''))
+    return Response(body, status=status, headers=headers)
+
+@app.route('/api/text-dictionary')
+def get_text_dictionary():
+    """CBOR 响应使用的文本字典"""
+    return _static_response(text_dictionary_payload.get())
+
+@app.route('/metrics')
+def metrics():
+    """各阶段耗时直方图（Prometheus 文本格式）"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/profiles/<profile_id>')
+def get_profile(profile_id):
+    """取回 /calculate?profile=... 保存的剖析结果（需管理员令牌）"""
+    if not is_authorized(request.headers.get('X-Admin-Token', '')):
+        return jsonify({'success': False, 'error': '需要管理员令牌'}), 403
+    
+    profile = load_profile(profile_id, as_text=request.args.get('format') == 'text')
+    if profile is None:
+        return jsonify({'success': False, 'error': f'剖析结果不存在: {profile_id}'}), 404
+    mimetype, body = profile
+    return Response(body, mimetype=mimetype)
+
+@app.route('/healthz')
+def healthz():
+    """就绪检查：各组件加载完成前返回 503"""
+    components = resource_status()
+    components['analysis_engine'] = {'ready': is_engine_ready()}
+    components['segmenter'] = get_segmenter().status()
+    ready = all(components[name]['ready'] for name in READINESS_COMPONENTS)
+    return jsonify({
+        'status': 'ready' if ready else 'starting',
+        'ready': ready,
+        'uptime_seconds': round(time.time() - started_at, 3),
+        'components': components
+    }), 200 if ready else 503
 
 @app.route('/')
 def index():
     """主页面"""
     return render_template('index.html')
 
-@app.route('/calculate', methods=['POST'])
-def calculate():
-    """计算大六壬排盘"""
-    try:
-        data = request.get_json()
-        year = int(data['year'])
-        month = int(data['month'])
-        day = int(data['day'])
-        hour = int(data['hour'])
-        minute = int(data['minute'])
-        
+class CalculateInputError(ValueError):
+    """排盘参数超出范围（直接作为错误信息返回）"""
+
+def _parse_calculate_request(data):
+    """解析并校验排盘请求"""
+    year = int(data['year'])
+    month = int(data['month'])
+    day = int(data['day'])
+    hour = int(data['hour'])
+    minute = int(data['minute'])
+    
+    # 验证日期范围
+    if year < 1900 or year > 2100:
+        raise CalculateInputError('年份必须在1900-2100之间')
+    if month < 1 or month > 12:
+        raise CalculateInputError('月份必须在1-12之间')
+    if day < 1 or day > 31:
+        raise CalculateInputError('日期必须在1-31之间')
+    if hour < 0 or hour > 23:
+        raise CalculateInputError('小时必须在0-23之间')
+    if minute < 0 or minute > 59:
+        raise CalculateInputError('分钟必须在0-59之间')
+    
+    # 获取求测人信息
+    user_info = data.get('user_info', {})
+    return {
+        'year': year,
+        'month': month,
+        'day': day,
+        'hour': hour,
+        'minute': minute,
         # 获取用户询问的事件
-        user_question = data.get('question', '').strip()
-        
-        # 获取求测人信息
-        user_info = data.get('user_info', {})
-        birth_year = user_info.get('birth_year', year)
-        birth_month = user_info.get('birth_month', month)
-        birth_day = user_info.get('birth_day', day)
-        birth_hour = user_info.get('birth_hour', hour)
-        
-        # 验证日期范围
-        if year < 1900 or year > 2100:
-            return jsonify({
-                'success': False,
-                'error': '年份必须在1900-2100之间'
-            })
-        if month < 1 or month > 12:
-            return jsonify({
-                'success': False,
-                'error': '月份必须在1-12之间'
-            })
-        if day < 1 or day > 31:
-            return jsonify({
-                'success': False,
-                'error': '日期必须在1-31之间'
-            })
-        if hour < 0 or hour > 23:
-            return jsonify({
-                'success': False,
-                'error': '小时必须在0-23之间'
-            })
-        if minute < 0 or minute > 59:
-            return jsonify({
-                'success': False,
-                'error': '分钟必须在0-59之间'
-            })
-        
+        'question': data.get('question', '').strip(),
+        'birth_year': user_info.get('birth_year', year),
+        'birth_month': user_info.get('birth_month', month),
+        'birth_day': user_info.get('birth_day', day),
+        'birth_hour': user_info.get('birth_hour', hour)
+    }
+
+def _iter_calculate_stages(params):
+    """按耗时从小到大依次产出 (阶段名, 结果)：排盘、事件分析、古籍分析、案例解析、针对性分析
+
+    各阶段耗时计入 calculate.<阶段名> 直方图
+    """
+    with stage_timer('calculate.pan'):
         # 创建排盘对象并计算
-        pan = LiuRenPan(year, month, day, hour, minute)
+        pan = LiuRenPan(params['year'], params['month'], params['day'], params['hour'], params['minute'])
         result = pan.calculate()
         
         # 计算年命和行年
         result['user_info'] = {
-            'birth_year': birth_year,
-            'birth_month': birth_month,
-            'birth_day': birth_day,
-            'birth_hour': birth_hour,
-            'nian_ming': calculate_nian_ming(birth_year, birth_month, birth_day, birth_hour),
-            'xing_nian': calculate_xing_nian(birth_year, year)
+            'birth_year': params['birth_year'],
+            'birth_month': params['birth_month'],
+            'birth_day': params['birth_day'],
+            'birth_hour': params['birth_hour'],
+            'nian_ming': calculate_nian_ming(params['birth_year'], params['birth_month'],
+                                             params['birth_day'], params['birth_hour']),
+            'xing_nian': calculate_xing_nian(params['birth_year'], params['year'])
         }
-        
-        # 分析用户询问的事件
-        event_analysis = event_analyzer.analyze_event(user_question)
-        
-        # 进行解析
-        analysis = LiuRenAnalysis()
-        full_analysis = analysis.analyze(result)
-        
-        # 根据事件类型过滤和个性化分析结果
-        filtered_analysis = event_analyzer.get_analysis_filter(
-            event_analysis, result, full_analysis
-        )
-        
-        # 获取事件相关的古籍分析
-        event_type = event_analysis.get('analysis_config', {}).get('category', 'general')
-        classics_analysis = classics_db.get_event_specific_classics(event_type, result)
-        
-        return jsonify({
-            'success': True,
-            'pan': result,
-            'analysis': full_analysis,
-            'event_analysis': event_analysis,
-            'targeted_analysis': filtered_analysis,
-            'classics_analysis': classics_analysis
-        })
-    except ValueError as e:
-        return jsonify({
+    # 分析使用结构化排盘，输出时补全释义文本
+    yield 'pan', render_pan(result)
+    
+    # 分析用户询问的事件
+    with stage_timer('calculate.event_analysis'):
+        event_analysis = event_analyzer.get().analyze_event(params['question'])
+    yield 'event_analysis', event_analysis
+    
+    # 获取事件相关的古籍分析
+    event_type = event_analysis.get('analysis_config', {}).get('category', 'general')
+    with stage_timer('calculate.classics_analysis'):
+        classics_analysis = classics_db.get().get_event_specific_classics(event_type, result)
+    yield 'classics_analysis', classics_analysis
+    
+    # 进行解析（使用进程级共享的分析引擎）
+    with stage_timer('calculate.analysis'):
+        full_analysis = get_analysis_engine().analyze(result)
+    yield 'analysis', full_analysis
+    
+    # 根据事件类型过滤和个性化分析结果
+    with stage_timer('calculate.targeted_analysis'):
+        targeted_analysis = event_analyzer.get().get_analysis_filter(event_analysis, result, full_analysis)
+    yield 'targeted_analysis', targeted_analysis
+
+def _stream_format(data, accept='', stream_arg=None):
+    """请求体 stream、查询参数 stream 或 Accept 头选择流式输出，返回 'ndjson'、'sse' 或 None"""
+    if 'text/event-stream' in accept or stream_arg == 'sse' or data.get('stream') == 'sse':
+        return 'sse'
+    if ('application/x-ndjson' in accept or stream_arg in ('1', 'true', 'ndjson')
+            or data.get('stream') in (True, 'ndjson')):
+        return 'ndjson'
+    return None
+
+def _stream_calculate(stages, first_stage, fmt):
+    """逐阶段输出排盘结果：NDJSON 每行一个 {stage, data}，SSE 每个事件一个阶段"""
+    def encode(stage, payload):
+        body = app.json.dumps(payload)
+        if fmt == 'sse':
+            return f'event: {stage}\ndata: {body}\n\n'
+        return app.json.dumps({'stage': stage, 'data': payload}) + '\n'
+    
+    def generate():
+        yield encode(*first_stage)
+        try:
+            for stage, payload in stages:
+                yield encode(stage, payload)
+        except Exception as e:
+            yield encode('error', {'success': False, 'error': f'计算失败: {str(e)}'})
+            return
+        yield encode('done', {'success': True})
+    
+    mimetype = 'text/event-stream' if fmt == 'sse' else 'application/x-ndjson'
+    # 关闭反向代理缓冲，保证排盘部分立即送达
+    return Response(generate(), mimetype=mimetype,
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def _calculate_error(e):
+    """排盘失败时的响应内容"""
+    if isinstance(e, CalculateInputError):
+        return {'success': False, 'error': str(e)}
+    if isinstance(e, ValueError):
+        return {'success': False, 'error': f'日期格式错误: {str(e)}'}
+    return {'success': False, 'error': f'计算失败: {str(e)}'}
+
+def run_calculate(data):
+    """完成排盘和全部分析，返回 /calculate 的完整响应内容（可在工作进程中调用）"""
+    try:
+        response = {'success': True}
+        response.update(_iter_calculate_stages(_parse_calculate_request(data)))
+        return response
+    except Exception as e:
+        return _calculate_error(e)
+
+@app.route('/calculate', methods=['POST'])
+def calculate():
+    """计算大六壬排盘；流式模式下先返回排盘，再依次返回各项分析"""
+    try:
+        data = request.get_json()
+        fmt = _stream_format(data, request.headers.get('Accept', ''),
+                             request.args.get('stream')) if isinstance(data, dict) else None
+        if fmt:
+            stages = _iter_calculate_stages(_parse_calculate_request(data))
+            # 排盘阶段先算完，日期错误仍以普通 JSON 返回
+            return _stream_calculate(stages, next(stages), fmt)
+    except Exception as e:
+        return jsonify(_calculate_error(e))
+    
+    mode = profile_mode(request.args.get('profile') or request.headers.get('X-Profile'))
+    if mode:
+        return _profiled_calculate(data, mode)
+    
+    with collect_timings() as timings:
+        with stage_timer('calculate'):
+            result = run_calculate(data)
+    return _calculate_response(result, timings)
+
+def _profiled_calculate(data, mode):
+    """在剖析器下执行一次排盘（需管理员令牌），剖析结果编号放在 X-Profile-Id 响应头"""
+    if not is_authorized(request.headers.get('X-Admin-Token', '')):
+        return jsonify({'success': False, 'error': '性能剖析需要管理员令牌'}), 403
+    
+    with bypass_caches(request.args.get('nocache') == '1'):
+        result, profile_id = run_profiled(mode, run_calculate, data,
+                                          repeat=repeat_count(request.args.get('repeat')))
+    response = _calculate_response(result)
+    response.headers['X-Profile-Id'] = profile_id
+    return response
+
+def _negotiated_response(payload):
+    """Accept 声明 application/cbor 时返回使用文本字典的 CBOR，否则返回 JSON"""
+    if not accepts_cbor(request.headers.get('Accept', '')):
+        response = jsonify(payload)
+    else:
+        dictionary = text_dictionary.get()
+        response = Response(dictionary.encode(payload), mimetype=CBOR_MIMETYPE)
+        response.headers['X-Text-Dictionary'] = dictionary.version
+    response.vary.add('Accept')
+    return response
+
+def _calculate_response(result, timings=()):
+    """排盘与分析结果只取决于请求参数，成功的响应带上内容 ETag，便于客户端和缓存去重"""
+    response = _negotiated_response(result)
+    if result.get('success'):
+        response.add_etag()
+    if SERVER_TIMING_ENABLED and timings:
+        response.headers['Server-Timing'] = server_timing_header(timings)
+    return response
+
+# 单次批量排盘的最大数量
+MAX_BATCH_SIZE = int(os.environ.get('LIUREN_BATCH_LIMIT', 50000))
+
+def _parse_batch_datetimes(data):
+    """解析批量排盘请求：datetimes 列表，或 start/end/step_minutes 时间范围"""
+    if 'datetimes' in data:
+        moments = [datetime.fromisoformat(value) for value in data['datetimes']]
+    else:
+        start = datetime.fromisoformat(data['start'])
+        end = datetime.fromisoformat(data['end'])
+        step = timedelta(minutes=int(data.get('step_minutes', 120)))
+        if step <= timedelta(0):
+            raise ValueError('时间间隔必须大于0')
+        if end < start:
+            raise ValueError('结束时间不能早于开始时间')
+        count = (end - start) // step + 1
+        if count > MAX_BATCH_SIZE:
+            raise ValueError(f'单次最多计算{MAX_BATCH_SIZE}个排盘')
+        moments = list(LiuRenPan.iter_range(start, end, step))
+    
+    if len(moments) > MAX_BATCH_SIZE:
+        raise ValueError(f'单次最多计算{MAX_BATCH_SIZE}个排盘')
+    for moment in moments:
+        if moment.year < 1900 or moment.year > 2100:
+            raise ValueError('年份必须在1900-2100之间')
+    return moments
+
+def run_calculate_batch(data, moments=None):
+    """批量排盘，返回 /api/calculate/batch 的完整响应内容（可在工作进程中调用）"""
+    try:
+        if moments is None:
+            moments = _parse_batch_datetimes(data)
+    except (KeyError, TypeError, ValueError) as e:
+        return {
             'success': False,
-            'error': f'日期格式错误: {str(e)}'
-        })
+            'error': f'参数错误: {str(e)}'
+        }
+    
+    try:
+        results = [
+            {'datetime': moment.isoformat(), 'pan': render_pan(result)}
+            for moment, result in LiuRenPan.iter_calculate(moments)
+        ]
+        return {
+            'success': True,
+            'count': len(results),
+            'results': results
+        }
     except Exception as e:
-        return jsonify({
+        return {
             'success': False,
             'error': f'计算失败: {str(e)}'
+        }
+
+@app.route('/api/calculate/batch', methods=['POST'])
+def calculate_batch():
+    """批量计算排盘（回测、日历视图），stream 为真时按行输出 NDJSON"""
+    try:
+        data = request.get_json() or {}
+        moments = _parse_batch_datetimes(data)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': f'参数错误: {str(e)}'
         })
+    
+    if data.get('stream'):
+        def generate():
+            for moment, result in LiuRenPan.iter_calculate(moments):
+                yield json.dumps({'datetime': moment.isoformat(), 'pan': render_pan(result)}, ensure_ascii=False) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+    
+    return _negotiated_response(run_calculate_batch(data, moments))
 
 @app.route('/classics')
 def classics():
@@ -124,25 +415,26 @@ def classics():
 @app.route('/theory')
 def theory():
     """现代理论页面"""
-    return jsonify(modern_theory.get_all_theories())
+    return _static_response(static_payloads.get().theory)
+
+@app.route('/api/classics/search')
+def search_classics():
+    """古籍全文搜索API"""
+    keyword = request.args.get('keyword', '')
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({'success': False, 'error': 'limit 必须为正整数'}), 400
+    return jsonify(classics_db.get().search_by_keyword(keyword, limit=limit))
 
 @app.route('/api/classics/<category>')
 def get_classics(category):
     """获取古籍内容API"""
-    try:
-        content = classics_db.get_all_content(category)
-        return jsonify(content)
-    except Exception as e:
-        return jsonify({'error': str(e)})
+    return _static_response(static_payloads.get().get_classics(category))
 
 @app.route('/api/classics/all')
 def get_all_classics():
     """获取所有古籍内容API"""
-    try:
-        content = classics_db.get_all_theories()
-        return jsonify(content)
-    except Exception as e:
-        return jsonify({'error': str(e)})
+    return _static_response(static_payloads.get().classics_all)
 
 def calculate_nian_ming(birth_year, birth_month, birth_day, birth_hour):
     """计算年命"""
@@ -191,4 +483,12 @@ def calculate_xing_nian(birth_year, current_year):
     }
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    debug = True
+    # 服务进程不构建案例语料库，缺失时在监听前构建
+    from data.case_corpus import ensure_case_corpora
+    ensure_case_corpora()
+    # 调试模式下重载器会先启动监控进程，只在实际提供服务的子进程中预热；
+    # 预热在后台进行，服务立即开始监听，/healthz 报告何时全部就绪
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_up_all_in_background()
+    app.run(host='0.0.0.0', port=5001, debug=debug)
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ASGI 入口
+页面模板、/theory、/api/classics/*、/api/text-dictionary 等轻量路由直接在事件循环中返回；
+排盘与解析（/calculate、/api/calculate/batch）交给有界进程池，不阻塞事件循环；
+进程池统计 /api/server/stats 需携带 X-Admin-Token（LIUREN_ADMIN_TOKEN，见 core.profiling）；
+其余路由和流式请求经 asgiref 转交 Flask 应用。
+
+依赖 asgiref，需配合 uvicorn 等 ASGI 服务器运行：
+    uvicorn asgi:application --host 0.0.0.0 --port 5001
+
+环境变量：
+    LIUREN_ASGI_POOL         prefork（默认，共享父进程已加载的数据，见 core.worker_pool）/ spawn
+    LIUREN_ASGI_WORKERS      进程池大小，默认 CPU 核数
+    LIUREN_ASGI_CONCURRENCY  同时交给进程池的请求数，默认等于进程池大小
+    LIUREN_ASGI_MAX_QUEUE    排队等待的请求上限，超出时返回 503，默认 64
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, unquote
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import render_template
+from werkzeug.http import generate_etag, quote_etag
+
+from app import (app, classics_db, run_calculate, run_calculate_batch, static_payloads,
+                 text_dictionary, text_dictionary_payload, warm_up_all_in_background, _stream_format)
+from core.engine import warm_up
+from core.metrics import SERVER_TIMING_ENABLED, observe_timings, server_timing_header, timed_call
+from core.profiling import is_authorized, profile_mode
+from core.text_dictionary import CBOR_MIMETYPE, accepts_cbor
+from core.worker_pool import WorkerPool
+
+
+class QueueFullError(Exception):
+    """排队请求已达上限"""
+
+
+class CpuOffloader:
+    """有界进程池：信号量限制同时执行的请求数，排队过长时直接拒绝"""
+
+    def __init__(self, workers=None, concurrency=None, max_queue=None, pool=None):
+        self.pool = (pool or os.environ.get('LIUREN_ASGI_POOL', 'prefork')).lower()
+        if self.pool == 'prefork' and 'fork' not in multiprocessing.get_all_start_methods():
+            self.pool = 'spawn'
+        self.workers = workers or int(os.environ.get('LIUREN_ASGI_WORKERS', 0)) or os.cpu_count() or 1
+        self.concurrency = concurrency or int(os.environ.get('LIUREN_ASGI_CONCURRENCY', 0)) or self.workers
+        self.max_queue = max_queue if max_queue is not None else int(os.environ.get('LIUREN_ASGI_MAX_QUEUE', 64))
+
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+        self._executor = None
+        self._semaphore = None
+
+    def start(self):
+        """启动进程池"""
+        if self._executor is None and self.pool == 'prefork':
+            # 服务启动时尚未处理请求，先加载数据再 fork
+            self._executor = WorkerPool(self.workers)
+        elif self._executor is None:
+            # spawn 启动，工作进程各自预热分析引擎，语料库先在本进程中构建好
+            from data.case_corpus import ensure_case_corpora
+            ensure_case_corpora()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=warm_up
+            )
+        return self._executor
+
+    def shutdown(self):
+        """关闭进程池，取消尚未开始的任务"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, func, *args):
+        """在进程池中执行 func(*args)"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        if self._semaphore.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError()
+
+        executor = self.start()
+        enqueued = time.perf_counter()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        started = time.perf_counter()
+        self.wait_seconds += started - enqueued
+        observe_timings([('offload.wait', started - enqueued)])
+        self.running += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+            return result
+        finally:
+            self.running -= 1
+            self.run_seconds += time.perf_counter() - started
+            self._semaphore.release()
+
+    def stats(self):
+        """进程池与排队统计"""
+        finished = self.completed + self.failed
+        return {
+            'pool': self.pool,
+            'workers': self.workers,
+            'concurrency': self.concurrency,
+            'max_queue': self.max_queue,
+            'queued': self.queued,
+            'running': self.running,
+            'max_queued': self.max_queued,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'avg_wait_ms': round(self.wait_seconds / finished * 1000, 2) if finished else 0.0,
+            'avg_run_ms': round(self.run_seconds / finished * 1000, 2) if finished else 0.0,
+            'health': self._executor.health() if isinstance(self._executor, WorkerPool) else None
+        }
+
+
+class LiurenASGI:
+    """ASGI 应用：轻量路由走事件循环，CPU 密集路由走进程池，其余转交 Flask"""
+
+    def __init__(self, flask_app, offloader):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.offloader = offloader
+        self._pages = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] == 'http':
+            method = scope['method']
+            path = scope['path']
+            if method == 'GET':
+                if path == '/':
+                    await self._send_page(send, 'index.html')
+                    return
+                if path == '/classics':
+                    await self._send_page(send, 'classics.html')
+                    return
+                if path == '/theory':
+                    await self._send_static(scope, send, (await _resolve(static_payloads)).theory)
+                    return
+                if path == '/api/text-dictionary':
+                    await self._send_static(scope, send, await _resolve(text_dictionary_payload))
+                    return
+                if path == '/api/server/stats':
+                    await self._send_stats(scope, send)
+                    return
+                if path == '/api/classics/search':
+                    await self._send_search(scope, send)
+                    return
+                if path.startswith('/api/classics/') and '/' not in path[len('/api/classics/'):]:
+                    category = unquote(path[len('/api/classics/'):])
+                    payloads = await _resolve(static_payloads)
+                    await self._send_static(scope, send, payloads.get_classics(category))
+                    return
+            elif method == 'POST' and path in ('/calculate', '/api/calculate/batch'):
+                await self._offload(scope, receive, send)
+                return
+        await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                self.offloader.start()
+                # 轻量路由用到的古籍库、静态响应和文本字典在本进程中后台预热
+                warm_up_all_in_background()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await asyncio.get_running_loop().run_in_executor(None, self.offloader.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _offload(self, scope, receive, send):
+        """读取请求体后交给进程池；非 JSON 请求和流式请求仍由 Flask 处理"""
+        body = await _read_body(receive)
+        headers = _headers(scope)
+        data = None
+        if headers.get('content-type', '').startswith('application/json'):
+            try:
+                data = json.loads(body or b'null')
+            except ValueError:
+                data = None
+
+        # 流式和性能剖析请求由 Flask 在本进程中处理
+        if (not isinstance(data, dict) or self._wants_stream(scope, headers, data)
+                or self._wants_profile(scope, headers)):
+            await self.wsgi(scope, _replay(body, receive), send)
+            return
+
+        func = run_calculate if scope['path'] == '/calculate' else run_calculate_batch
+        started = time.perf_counter()
+        timings = []
+        try:
+            # 工作进程带回各阶段耗时，计入本进程的 /metrics
+            result, timings = await self.offloader.run(timed_call, func, data)
+        except QueueFullError:
+            await self._send_json(send, {'success': False, 'error': '服务繁忙，请稍后重试'},
+                                  status=503, extra_headers=[(b'retry-after', b'1')])
+            return
+        except Exception as e:
+            result = {'success': False, 'error': f'计算失败: {str(e)}'}
+        if func is run_calculate:
+            # 与 Flask 路由一致，calculate 为整个请求的耗时（含排队和进程间传输）
+            timings.append(('calculate', time.perf_counter() - started))
+        observe_timings(timings)
+
+        extra_headers = [(b'vary', b'Accept')]
+        if SERVER_TIMING_ENABLED and timings:
+            extra_headers.append((b'server-timing', server_timing_header(timings).encode('latin-1')))
+        etag = func is run_calculate and result.get('success')
+        if accepts_cbor(headers.get('accept', '')):
+            await self._send_cbor(send, result, extra_headers=extra_headers, etag=etag)
+        else:
+            await self._send_json(send, result, extra_headers=extra_headers, etag=etag)
+
+    @staticmethod
+    def _wants_stream(scope, headers, data):
+        if scope['path'] != '/calculate':
+            return bool(data.get('stream'))
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        stream_arg = query.get('stream', [None])[0]
+        return _stream_format(data, headers.get('accept', ''), stream_arg) is not None
+
+    @staticmethod
+    def _wants_profile(scope, headers):
+        if scope['path'] != '/calculate':
+            return False
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        return profile_mode(query.get('profile', [None])[0] or headers.get('x-profile')) is not None
+
+    async def _send_stats(self, scope, send):
+        # 排队深度和工作进程状态属于内部信息，与性能剖析共用管理员令牌
+        if not is_authorized(_headers(scope).get('x-admin-token', '')):
+            await self._send_json(send, {'success': False, 'error': '需要管理员令牌'}, status=403)
+            return
+        await self._send_json(send, self.offloader.stats())
+
+    async def _send_search(self, scope, send):
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        keyword = query.get('keyword', [''])[0]
+        try:
+            limit = int(query['limit'][0]) if 'limit' in query else None
+        except ValueError:
+            limit = None
+        if limit is not None and limit < 1:
+            await self._send_json(send, {'success': False, 'error': 'limit 必须为正整数'}, status=400)
+            return
+        db = await _resolve(classics_db)
+        await self._send_json(send, db.search_by_keyword(keyword, limit=limit))
+
+    async def _send_static(self, scope, send, payload):
+        headers = _headers(scope)
+        status, response_headers, body = payload.respond(headers.get('if-none-match', ''),
+                                                         headers.get('accept-encoding', ''))
+        response_headers = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                            for name, value in response_headers]
+        if status != 304:
+            response_headers.append((b'content-length', str(len(body)).encode('latin-1')))
+        await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _send_page(self, send, template):
+        # 页面模板不含变量，渲染一次后复用
+        page = self._pages.get(template)
+        if page is None:
+            with self.flask_app.app_context():
+                page = render_template(template).encode('utf-8')
+            self._pages[template] = page
+        await _send(send, 200, 'text/html; charset=utf-8', page)
+
+    async def _send_json(self, send, payload, status=200, extra_headers=(), etag=False):
+        # 与 jsonify 的紧凑输出一致
+        body = f'{self.flask_app.json.dumps(payload, separators=(",", ":"))}\n'.encode('utf-8')
+        if etag:
+            # 与 Flask 路由的 response.add_etag() 相同
+            extra_headers = [*extra_headers, (b'etag', quote_etag(generate_etag(body)).encode('latin-1'))]
+        await _send(send, status, 'application/json', body, extra_headers)
+
+    async def _send_cbor(self, send, payload, extra_headers=(), etag=False):
+        # 与 Flask 路由的 CBOR 响应一致
+        dictionary = await _resolve(text_dictionary)
+        body = dictionary.encode(payload)
+        extra_headers = [*extra_headers, (b'x-text-dictionary', dictionary.version.encode('latin-1'))]
+        if etag:
+            extra_headers.append((b'etag', quote_etag(generate_etag(body)).encode('latin-1')))
+        await _send(send, 200, CBOR_MIMETYPE, body, extra_headers)
+
+
+async def _resolve(resource):
+    """取延迟加载的资源；尚未构建时在线程池中构建，不阻塞事件循环"""
+    if resource.ready:
+        return resource.get()
+    return await asyncio.get_running_loop().run_in_executor(None, resource.get)
+
+
+def _headers(scope):
+    return {name.decode('latin-1').lower(): value.decode('latin-1')
+            for name, value in scope.get('headers', [])}
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def _replay(body, receive):
+    """把已读取的请求体重新交给下游应用"""
+    sent = False
+
+    async def replay_receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        return await receive()
+
+    return replay_receive
+
+
+async def _send(send, status, content_type, body, extra_headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type.encode('latin-1')),
+            (b'content-length', str(len(body)).encode('latin-1')),
+            *extra_headers
+        ]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+offloader = CpuOffloader()
+application = LiurenASGI(app, offloader)
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(application, host='0.0.0.0', port=5001)
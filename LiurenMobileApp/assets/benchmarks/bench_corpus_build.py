@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+案例语料库构建基准
+在临时目录中以不同的并行进程数重复构建超超大规模语料库（100 万个案例），
+记录构建耗时，并校验每次构建得到的文件逐字节相同。
+
+运行（在 assets 目录下）：python -m benchmarks.bench_corpus_build --workers 1 2 4 --runs 2
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from data.case_database_ultra_massive import UltraMassiveCaseDatabase
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_once(directory, workers):
+    """构建一次，返回 (耗时, 文件摘要, 文件大小)"""
+    path = os.path.join(directory, f'bench_{workers}.cases')
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        UltraMassiveCaseDatabase.build_corpus(path, workers=workers)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(path)
+    digest = file_digest(path)
+    os.remove(path)
+    return elapsed, digest, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='案例语料库构建基准')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--runs', type=int, default=2)
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args(argv)
+
+    results = []
+    digests = set()
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in dict.fromkeys(args.workers):
+            timings = []
+            for _ in range(args.runs):
+                elapsed, digest, size = build_once(directory, workers)
+                timings.append(elapsed)
+                digests.add(digest)
+            results.append({
+                'workers': workers,
+                'median_seconds': round(statistics.median(timings), 3),
+                'min_seconds': round(min(timings), 3),
+                'size_bytes': size
+            })
+
+    report = {
+        'cases': UltraMassiveCaseDatabase.CASES_PER_CATEGORY * len(UltraMassiveCaseDatabase._get_case_templates()[1]),
+        'runs': args.runs,
+        'cpu_count': os.cpu_count(),
+        'identical': len(digests) == 1,
+        'sha256': sorted(digests),
+        'results': results
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"构建 {report['cases']:,} 个案例，每种进程数 {args.runs} 轮（CPU 核数 {report['cpu_count']}）")
+        for result in results:
+            print(f"  {result['workers']:>2} 个进程：中位数 {result['median_seconds']:.2f} 秒，"
+                  f"最快 {result['min_seconds']:.2f} 秒，{result['size_bytes'] / 1e6:.1f} MB")
+        mark = '✅' if report['identical'] else '❌'
+        print(f"{mark} 各次构建文件{'逐字节相同' if report['identical'] else '不一致'}：{', '.join(d[:16] for d in report['sha256'])}")
+    return 0 if report['identical'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/calculate 全流程与各阶段基准
+每个阶段在独立的子进程中运行（峰值内存互不影响），输出 p50/p95/p99 延迟、吞吐量和峰值 RSS，
+结果写入 JSON（含提交号），可与另一次提交的结果对比找出性能回退。分析结果缓存默认关闭。
+
+阶段：
+  pan_calculate          LiuRenPan(...).calculate()
+  pan_render             text_table.render_pan（补全释义文本）
+  lunar_from_ymdhms      lunar_python 的 Lunar.fromYmdHms（原排盘方式，未安装时跳过）
+  calendar_lunar_day     内置历表的 CalendarTable.lunar_day
+  event_analysis         EventAnalyzer.analyze_event（绕过问题缓存）
+  event_analysis_cached  EventAnalyzer.analyze_event（命中问题缓存）
+  analysis               LiuRenAnalysis.analyze
+  similar_cases_10k      find_similar_cases，1 万个案例
+  similar_cases_100k     find_similar_cases，10 万个案例
+  similar_cases_1m       find_similar_cases，100 万个案例（mmap 语料库）
+  classics               ClassicsDatabase.get_event_specific_classics
+  calculate_e2e          Flask 测试客户端 POST /calculate
+
+运行（在 assets 目录下）：
+  python -m benchmarks.bench_pipeline [--stages ...] [--iterations N] [--output 结果.json]
+  python -m benchmarks.bench_pipeline --compare 旧结果.json 新结果.json [--threshold 0.1]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('LIUREN_CACHE_BACKEND', 'none')
+
+ASSETS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ASSETS_DIR, 'benchmarks', 'results')
+
+QUESTIONS = ['我的事业如何', '这段婚姻能否长久', '最近财运怎么样', '父亲的病什么时候能好',
+             '考研能否上岸', '下个月出差是否顺利', '官司能不能赢', '孩子最近学习状态如何']
+EVENT_TYPES = ['career', 'marriage', 'wealth', 'health', 'study', 'travel', 'litigation', 'family']
+# 相似度最高只有 0.25，用较低的阈值让查询真正返回并排序案例
+SIMILAR_MIN_SIMILARITY = 0.1
+
+
+def make_moments(count, start=datetime(2024, 1, 1, 0, 30)):
+    """每个时间相隔 1 天 1 小时 7 分钟，覆盖不同的日干支、时辰和月将"""
+    step = timedelta(days=1, hours=1, minutes=7)
+    return [start + step * i for i in range(count)]
+
+
+def make_pans(count):
+    from core.liu_ren import LiuRenPan
+    return [LiuRenPan(m.year, m.month, m.day, m.hour, m.minute).calculate() for m in make_moments(count)]
+
+
+def _similar_cases_setup(cases_per_category):
+    def setup(count):
+        from data.case_database_ultra_massive_fast import UltraMassiveCaseDatabaseFast
+        from data.case_store import CaseStore
+        if cases_per_category == UltraMassiveCaseDatabaseFast.CASES_PER_CATEGORY:
+            store = UltraMassiveCaseDatabaseFast().cases
+        else:
+            base_pan_results, case_templates = UltraMassiveCaseDatabaseFast._get_case_templates()
+            store = CaseStore.generate(base_pan_results, case_templates, cases_per_category)
+        pans = make_pans(count)
+        return [lambda pan=pan: store.find_similar_cases(pan, min_similarity=SIMILAR_MIN_SIMILARITY, limit=5)
+                for pan in pans]
+    return setup
+
+
+def _setup_pan_calculate(count):
+    from core.liu_ren import LiuRenPan
+    return [lambda m=m: LiuRenPan(m.year, m.month, m.day, m.hour, m.minute).calculate()
+            for m in make_moments(count)]
+
+
+def _setup_pan_render(count):
+    from core.text_table import render_pan
+    return [lambda pan=pan: render_pan(pan) for pan in make_pans(count)]
+
+
+def _lunar_dates(count):
+    """排盘输入按农历日期解释，日取 1-29 保证在任何农历月中都存在"""
+    return [(m.year, m.month, (m.day - 1) % 29 + 1, m.hour, m.minute) for m in make_moments(count)]
+
+
+def _setup_lunar_from_ymdhms(count):
+    try:
+        from lunar_python import Lunar
+    except ImportError:
+        return None
+    return [lambda d=d: Lunar.fromYmdHms(*d, 0) for d in _lunar_dates(count)]
+
+
+def _setup_calendar_lunar_day(count):
+    from core.calendar_table import get_calendar_table
+    table = get_calendar_table()
+    return [lambda d=d: table.lunar_day(*d[:3]) for d in _lunar_dates(count)]
+
+
+def _event_analyzer():
+    from core.event_analyzer import EventAnalyzer
+    analyzer = EventAnalyzer()
+    analyzer.segmenter.wait()
+    return analyzer
+
+
+def _setup_event_analysis(count):
+    analyzer = _event_analyzer()
+    # 不使用常见问题表，每次调用前清空问题缓存，测量完整的分词与分类
+    analyzer.question_table = {}
+
+    def call(question):
+        analyzer.event_cache.clear()
+        return analyzer.analyze_event(question)
+    return [lambda q=QUESTIONS[i % len(QUESTIONS)]: call(q) for i in range(count)]
+
+
+def _setup_event_analysis_cached(count):
+    analyzer = _event_analyzer()
+    return [lambda q=QUESTIONS[i % len(QUESTIONS)]: analyzer.analyze_event(q) for i in range(count)]
+
+
+def _setup_analysis(count):
+    from core.engine import get_analysis_engine
+    engine = get_analysis_engine()
+    return [lambda pan=pan: engine.analyze(pan) for pan in make_pans(count)]
+
+
+def _setup_classics(count):
+    from data.classics import ClassicsDatabase
+    classics_db = ClassicsDatabase()
+    pans = make_pans(count)
+    return [lambda pan=pan, event_type=EVENT_TYPES[i % len(EVENT_TYPES)]:
+            classics_db.get_event_specific_classics(event_type, pan)
+            for i, pan in enumerate(pans)]
+
+
+def _setup_calculate_e2e(count):
+    import app
+    app.warm_up_all()
+    client = app.app.test_client()
+    requests = [{'year': m.year, 'month': m.month, 'day': m.day, 'hour': m.hour, 'minute': m.minute,
+                 'question': QUESTIONS[i % len(QUESTIONS)]}
+                for i, m in enumerate(make_moments(count))]
+
+    def call(data):
+        response = client.post('/calculate', json=data)
+        assert response.status_code == 200 and response.get_json()['success']
+    return [lambda data=data: call(data) for data in requests]
+
+
+# 阶段名 -> 生成调用列表的函数（返回 None 表示跳过）
+STAGES = {
+    'pan_calculate': _setup_pan_calculate,
+    'pan_render': _setup_pan_render,
+    'lunar_from_ymdhms': _setup_lunar_from_ymdhms,
+    'calendar_lunar_day': _setup_calendar_lunar_day,
+    'event_analysis': _setup_event_analysis,
+    'event_analysis_cached': _setup_event_analysis_cached,
+    'analysis': _setup_analysis,
+    'similar_cases_10k': _similar_cases_setup(1250),
+    'similar_cases_100k': _similar_cases_setup(12500),
+    'similar_cases_1m': _similar_cases_setup(125000),
+    'classics': _setup_classics,
+    'calculate_e2e': _setup_calculate_e2e,
+}
+
+
+def percentile(sorted_values, fraction):
+    """线性插值百分位数"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def peak_rss_mb():
+    """本进程的峰值常驻内存（Linux 上 ru_maxrss 以 KB 计，macOS 以字节计）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+def run_stage(name, iterations, warmup):
+    """在当前进程中运行一个阶段，返回统计结果"""
+    # 先完成共用数据的加载，不计入测量
+    from core.calendar_table import get_calendar_table
+    from core.pan_table import get_pan_table
+    get_calendar_table()
+    get_pan_table()
+
+    setup_start = time.perf_counter()
+    calls = STAGES[name](warmup + iterations)
+    setup_seconds = time.perf_counter() - setup_start
+    if calls is None:
+        return {'stage': name, 'skipped': True}
+
+    for call in calls[:warmup]:
+        call()
+
+    timings = []
+    start = time.perf_counter()
+    for call in calls[warmup:]:
+        call_start = time.perf_counter_ns()
+        call()
+        timings.append((time.perf_counter_ns() - call_start) / 1e6)
+    total = time.perf_counter() - start
+
+    timings.sort()
+    return {
+        'stage': name,
+        'iterations': iterations,
+        'setup_seconds': round(setup_seconds, 3),
+        'p50_ms': round(percentile(timings, 0.50), 4),
+        'p95_ms': round(percentile(timings, 0.95), 4),
+        'p99_ms': round(percentile(timings, 0.99), 4),
+        'mean_ms': round(sum(timings) / len(timings), 4),
+        'max_ms': round(timings[-1], 4),
+        'throughput_per_second': round(iterations / total, 1) if total else None,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+def run_stage_subprocess(name, iterations, warmup):
+    """在全新的子进程中运行一个阶段"""
+    command = [sys.executable, '-m', 'benchmarks.bench_pipeline', '--run-stage', name,
+               '--iterations', str(iterations), '--warmup', str(warmup)]
+    result = subprocess.run(command, cwd=ASSETS_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'stage': name, 'error': result.stderr.strip().splitlines()[-1] if result.stderr else '失败'}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ASSETS_DIR,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base_path, new_path, threshold):
+    """对比两次结果，p50 或 p95 变慢超过阈值的阶段视为回退"""
+    with open(base_path, encoding='utf-8') as f:
+        base = {stage['stage']: stage for stage in json.load(f)['stages']}
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+
+    regressions = []
+    print(f"{'阶段':<24}{'p50 旧→新 (毫秒)':>28}{'p95 旧→新 (毫秒)':>28}")
+    for stage in new['stages']:
+        old = base.get(stage['stage'])
+        if not old or 'p50_ms' not in old or 'p50_ms' not in stage:
+            continue
+        changes = []
+        for key in ('p50_ms', 'p95_ms'):
+            change = stage[key] / old[key] - 1 if old[key] else 0
+            changes.append(f"{old[key]:>9.3f}→{stage[key]:<9.3f}{change:>+7.1%}")
+            if change > threshold:
+                regressions.append(f"{stage['stage']} {key} {change:+.1%}")
+        print(f"{stage['stage']:<24}{changes[0]:>28}{changes[1]:>28}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} 项超过 {threshold:.0%} 的回退：")
+        for regression in regressions:
+            print(f"   - {regression}")
+        return 1
+    print(f"\n✅ 没有超过 {threshold:.0%} 的回退")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='/calculate 全流程与各阶段基准')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--output', help='结果 JSON 路径（默认 benchmarks/results/<提交号>.json）')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help='对比两次结果')
+    parser.add_argument('--threshold', type=float, default=0.1, help='判定回退的变慢比例')
+    parser.add_argument('--run-stage', choices=list(STAGES), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    if args.run_stage:
+        print(json.dumps(run_stage(args.run_stage, args.iterations, args.warmup)))
+        return 0
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'iterations': args.iterations,
+        'stages': []
+    }
+
+    print(f"{'阶段':<24}{'p50':>10}{'p95':>10}{'p99':>10}{'次/秒':>12}{'峰值RSS':>10}")
+    for name in args.stages:
+        stage = run_stage_subprocess(name, args.iterations, args.warmup)
+        report['stages'].append(stage)
+        if stage.get('skipped'):
+            print(f"{name:<24}（跳过：依赖未安装）")
+        elif 'error' in stage:
+            print(f"{name:<24}❌ {stage['error']}")
+        else:
+            print(f"{name:<24}{stage['p50_ms']:>10.3f}{stage['p95_ms']:>10.3f}{stage['p99_ms']:>10.3f}"
+                  f"{stage['throughput_per_second']:>12,.1f}{stage['peak_rss_mb']:>8.1f}MB")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ 结果已写入 {output}（毫秒）")
+    return 0 if all('error' not in stage for stage in report['stages']) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准
+每轮在全新的子进程中测量冷启动全过程：导入 app、首个 /calculate 请求、
+事件分析器可用（关键词切分）以及 jieba 词典后台加载完成的时间；
+并与同步调用 jieba.initialize()（jieba 自带 marshal 缓存）的旧路径对比。
+
+运行（在 assets 目录下）：python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ASSETS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 新路径：词典在后台加载，分析器立即可用
+STARTUP_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+response = client.post('/calculate', json={'year': 2024, 'month': 5, 'day': 3, 'hour': 10,
+                                           'minute': 30, 'question': '我的事业如何'})
+assert response.get_json()['success']
+first_request = time.perf_counter()
+from core.segmenter import get_segmenter
+segmenter = get_segmenter()
+fallback = not segmenter.ready
+segmenter.wait()
+ready = time.perf_counter()
+print(json.dumps({
+    'import_app': imported - start,
+    'first_calculate': first_request - imported,
+    'first_response': first_request - start,
+    'first_request_used_fallback': fallback,
+    'segmenter_ready': ready - start,
+    'segmenter_load': segmenter.load_seconds
+}))
+'''
+
+# 旧路径：同步加载 jieba 词典
+LEGACY_SCRIPT = '''
+import json, logging, time
+start = time.perf_counter()
+import jieba
+jieba.setLogLevel(logging.WARNING)
+jieba.initialize()
+print(json.dumps({'jieba_initialize': time.perf_counter() - start}))
+'''
+
+
+def run_script(script):
+    result = subprocess.run([sys.executable, '-c', script], cwd=ASSETS_DIR,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(samples):
+    summary = {}
+    for key in samples[0]:
+        values = [sample[key] for sample in samples if sample[key] is not None]
+        if values and isinstance(values[0], bool):
+            summary[key] = sum(values) / len(samples)
+        elif values:
+            summary[key] = {
+                'median': round(statistics.median(values), 4),
+                'min': round(min(values), 4),
+                'max': round(max(values), 4)
+            }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='启动耗时基准')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args(argv)
+
+    # 先确保前缀词典、排盘表、案例库等构建产物已存在，不计入测量
+    run_script(STARTUP_SCRIPT)
+    run_script(LEGACY_SCRIPT)
+
+    startup = summarize([run_script(STARTUP_SCRIPT) for _ in range(args.runs)])
+    legacy = summarize([run_script(LEGACY_SCRIPT) for _ in range(args.runs)])
+    results = {'runs': args.runs, 'startup': startup, 'legacy': legacy}
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+
+    labels = {
+        'import_app': '导入 app',
+        'first_calculate': '首个 /calculate',
+        'first_response': '启动到首个响应',
+        'segmenter_ready': '启动到 jieba 就绪',
+        'segmenter_load': 'jieba 后台加载',
+        'jieba_initialize': '旧路径 jieba.initialize()'
+    }
+    print(f"共 {args.runs} 轮（秒，中位数 / 最小 / 最大）")
+    for key, value in [*startup.items(), *legacy.items()]:
+        if key == 'first_request_used_fallback':
+            print(f"  首个请求使用关键词切分的比例：{value:.0%}")
+            continue
+        print(f"  {labels[key]:<24} {value['median']:.3f} / {value['min']:.3f} / {value['max']:.3f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预派生进程池吞吐量基准
+以不同工作进程数运行同一批 /calculate 请求，输出吞吐量、加速比和并行效率。
+分析结果缓存默认关闭，保证每个请求都完整计算。
+
+运行（在 assets 目录下）：python -m benchmarks.bench_worker_pool --max-workers 8 --requests 400
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('LIUREN_CACHE_BACKEND', 'none')
+
+from app import run_calculate  # noqa: E402
+from core.worker_pool import WorkerPool, preload  # noqa: E402
+
+
+def make_requests(count, start=datetime(2024, 1, 1, 0, 30)):
+    """每个请求相隔 1 小时 7 分钟，覆盖不同的日干支、时辰和月将"""
+    step = timedelta(hours=1, minutes=7)
+    requests = []
+    for i in range(count):
+        moment = start + step * i
+        requests.append({
+            'year': moment.year,
+            'month': moment.month,
+            'day': moment.day,
+            'hour': moment.hour,
+            'minute': moment.minute,
+            'question': ['工作', '婚姻', '财运', '健康'][i % 4],
+            'user_info': {'birth_year': 1990, 'birth_month': 1, 'birth_day': 1, 'birth_hour': 3}
+        })
+    return requests
+
+
+def worker_counts(max_workers):
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def run(workers, requests):
+    """返回 (耗时秒数, 失败数)"""
+    pool = WorkerPool(workers, preload_data=False)
+    try:
+        # 每个进程先跑一个请求，排除首次调用的开销
+        for future in [pool.submit(run_calculate, requests[0]) for _ in range(workers)]:
+            future.result()
+
+        start = time.perf_counter()
+        futures = [pool.submit(run_calculate, request) for request in requests]
+        failed = sum(1 for future in futures if not future.result().get('success'))
+        return time.perf_counter() - start, failed
+    finally:
+        pool.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='预派生进程池吞吐量基准')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args(argv)
+
+    preload()
+    requests = make_requests(args.requests)
+    results = []
+    baseline = None
+    for workers in worker_counts(args.max_workers):
+        elapsed, failed = run(workers, requests)
+        throughput = len(requests) / elapsed
+        baseline = baseline or throughput
+        results.append({
+            'workers': workers,
+            'requests': len(requests),
+            'failed': failed,
+            'seconds': round(elapsed, 3),
+            'throughput': round(throughput, 1),
+            'speedup': round(throughput / baseline, 2),
+            'efficiency': round(throughput / baseline / workers, 2)
+        })
+
+    if args.json:
+        print(json.dumps({'cpu_count': os.cpu_count(), 'results': results}, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"CPU 核数：{os.cpu_count()}")
+    print(f"{'进程数':>6} {'耗时(秒)':>10} {'请求/秒':>10} {'加速比':>8} {'效率':>6}")
+    for row in results:
+        print(f"{row['workers']:>6} {row['seconds']:>10.3f} {row['throughput']:>10.1f} "
+              f"{row['speedup']:>8.2f} {row['efficiency']:>6.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,15 +5,21 @@
 """
 
 import random
-from datetime import datetime
+
+from core.frozen import freeze, thaw
+from core.metrics import stage_timer
+from core.result_cache import caches_bypassed, get_analysis_cache
 
 class LiuRenAnalysis:
     """六壬分析类"""
     
+    ANALYSIS_VERSION = '2.1'
+    
     def __init__(self):
         self.cases = self._initialize_cases()
         self.case_index = self._build_case_index()
-        self.analysis_cache = {}
+        # 进程级共享的 LRU/TTL 结果缓存
+        self.analysis_cache = get_analysis_cache()
         
         # 初始化其他组件
         from data.classics import ClassicsDatabase
@@ -154,9 +160,12 @@ class LiuRenAnalysis:
     
     def _build_case_index(self):
         """构建案例索引"""
+        # 大规模数据库自带索引，且其案例按需生成，不在这里逐个遍历
+        if hasattr(self, 'massive_db'):
+            return self.massive_db.index
+
         index = {
-            'by_method': {},
-            'by_liu_shen': {},
+            'by_bucket': {},
             'by_outcome': {},
             'by_accuracy': {}
         }
@@ -186,21 +195,14 @@ class LiuRenAnalysis:
         if not isinstance(pan_result, dict):
             return
         
-        # 按方法索引
-        method = pan_result.get('san_chuan', '')
+        # 按相似度的四个分量分桶（日干、日支、月将、三传方法）
+        method = pan_result.get('san_chuan')
         if isinstance(method, dict):
             method = method.get('method_used', str(method))
-        if method not in index['by_method']:
-            index['by_method'][method] = []
-        index['by_method'][method].append(case_id)
-        
-        # 按六神索引
-        liu_shen = pan_result.get('liu_shen', '')
-        if isinstance(liu_shen, dict):
-            liu_shen = liu_shen.get('shen', str(liu_shen))
-        if liu_shen not in index['by_liu_shen']:
-            index['by_liu_shen'][liu_shen] = []
-        index['by_liu_shen'][liu_shen].append(case_id)
+        bucket = (pan_result.get('ri_gan'), pan_result.get('ri_zhi'), pan_result.get('yue_jiang'), method)
+        if bucket not in index['by_bucket']:
+            index['by_bucket'][bucket] = []
+        index['by_bucket'][bucket].append(case_id)
         
         # 按准确率索引
         accuracy = case_data.get('accuracy', 0)
@@ -219,47 +221,28 @@ class LiuRenAnalysis:
         if hasattr(self, 'massive_db'):
             return self.massive_db.find_similar_cases(pan_result, category, min_similarity, limit)
         
-        # 否则使用基础查找方法
+        # 否则使用基础查找方法：同一桶内案例相似度相同，只展开达到阈值的桶
         similar_cases = []
         
-        current_method = pan_result.get('san_chuan', {}).get('method_used', '')
-        current_liu_shen = pan_result.get('liu_shen', {}).get('shen', '')
-        
-        # 查找相同方法的案例
-        method_cases = self.case_index['by_method'].get(current_method, [])
-        for case_id in method_cases:
-            case_data = self._get_case_by_id(case_id)
-            if case_data:
-                # 检查类别过滤
-                if category and case_data.get('category') != category:
-                    continue
+        for (ri_gan, ri_zhi, yue_jiang, method), case_ids in self.case_index['by_bucket'].items():
+            bucket_pan = {'ri_gan': ri_gan, 'ri_zhi': ri_zhi, 'yue_jiang': yue_jiang, 'san_chuan': method}
+            similarity_score = self._calculate_similarity(pan_result, bucket_pan)
+            if similarity_score < min_similarity:
+                continue
+            
+            for case_id in case_ids:
+                case_data = self._get_case_by_id(case_id)
+                if case_data:
+                    # 检查类别过滤
+                    if category and case_data.get('category') != category:
+                        continue
                     
-                similarity_score = self._calculate_similarity(pan_result, case_data['pan_result'])
-                if similarity_score >= min_similarity:
                     similar_cases.append({
                         'case_id': case_id,
                         'case_data': case_data,
                         'similarity_score': similarity_score
                     })
         
-        # 查找相同六神的案例
-        liu_shen_cases = self.case_index['by_liu_shen'].get(current_liu_shen, [])
-        for case_id in liu_shen_cases:
-            if case_id not in [case['case_id'] for case in similar_cases]:
-                case_data = self._get_case_by_id(case_id)
-                if case_data:
-                    # 检查类别过滤
-                    if category and case_data.get('category') != category:
-                        continue
-                        
-                    similarity_score = self._calculate_similarity(pan_result, case_data['pan_result'])
-                    if similarity_score >= min_similarity:
-                        similar_cases.append({
-                            'case_id': case_id,
-                            'case_data': case_data,
-                            'similarity_score': similarity_score
-                        })
-        
         # 按相似度排序
         similar_cases.sort(key=lambda x: x['similarity_score'], reverse=True)
         
@@ -267,6 +250,9 @@ class LiuRenAnalysis:
     
     def _get_case_by_id(self, case_id):
         """根据ID获取案例"""
+        if hasattr(self, 'massive_db'):
+            # 列式案例存储按编号直接定位
+            return self.cases.get(case_id)
         if isinstance(self.cases, dict):
             # 检查是否是扩展数据库的扁平结构
             if any(isinstance(v, dict) and 'title' in v for v in self.cases.values()):
@@ -314,8 +300,29 @@ class LiuRenAnalysis:
         return similarity / count if count > 0 else 0.0
     
     def _generate_cache_key(self, pan_result):
-        """生成缓存键"""
-        return f"{pan_result.get('ri_gan', '')}_{pan_result.get('ri_zhi', '')}_{pan_result.get('san_chuan', {}).get('method_used', '')}"
+        """生成缓存键（包含所有影响分析结果的排盘字段）"""
+        return f"{self.ANALYSIS_VERSION}_{self._pan_signature(pan_result)}"
+    
+    def _pan_signature(self, pan_result):
+        """决定分析结果的排盘字段"""
+        san_chuan = pan_result.get('san_chuan', {})
+        if isinstance(san_chuan, dict):
+            method = san_chuan.get('method_used', '')
+        else:
+            method = str(san_chuan)
+        
+        liu_shen = pan_result.get('liu_shen', {})
+        if isinstance(liu_shen, dict):
+            shen = liu_shen.get('shen', '')
+        else:
+            shen = str(liu_shen)
+        
+        return (f"{pan_result.get('ri_gan', '')}_{pan_result.get('ri_zhi', '')}_"
+                f"{pan_result.get('yue_jiang', '')}_{method}_{shen}")
+    
+    def _pan_random(self, pan_result, section):
+        """由排盘决定的随机源：同一排盘在任何进程中选出的内容都相同"""
+        return random.Random(f"{self._pan_signature(pan_result)}:{section}")
     
     def _basic_analysis(self, pan_result):
         """基础分析"""
@@ -530,7 +537,7 @@ class LiuRenAnalysis:
             "预测结果显示，事情发展需要耐心等待时机",
             "AI建议，适合在近期采取积极行动"
         ]
-        return random.choice(predictions)
+        return self._pan_random(pan_result, 'prediction').choice(predictions)
     
     def _ai_risk_assessment(self, pan_result):
         """AI风险评估"""
@@ -542,10 +549,11 @@ class LiuRenAnalysis:
             "资源不足",
             "时机不成熟"
         ]
+        rng = self._pan_random(pan_result, 'risk')
         
         return {
-            'risk_level': random.choice(risk_levels),
-            'risk_factors': random.sample(risk_factors, random.randint(1, 3)),
+            'risk_level': rng.choice(risk_levels),
+            'risk_factors': rng.sample(risk_factors, rng.randint(1, 3)),
             'mitigation_strategies': [
                 "加强沟通协调",
                 "灵活应对变化",
@@ -590,11 +598,12 @@ class LiuRenAnalysis:
             "保持积极心态，相信自己的能力"
         ]
         
-        return random.sample(recommendations, 3)
+        return self._pan_random(pan_result, 'recommendations').sample(recommendations, 3)
     
-    def _case_based_analysis(self, pan_result):
+    def _case_based_analysis(self, pan_result, similar_cases=None):
         """基于案例的分析"""
-        similar_cases = self.find_similar_cases(pan_result, min_similarity=0.3, limit=5)
+        if similar_cases is None:
+            similar_cases = self.find_similar_cases(pan_result, min_similarity=0.3, limit=5)
         
         if not similar_cases:
             return {
@@ -632,16 +641,23 @@ class LiuRenAnalysis:
         }
     
     def analyze(self, pan_result):
-        """主分析函数"""
+        """主分析函数（结果只取决于排盘，可整体缓存）"""
         cache_key = self._generate_cache_key(pan_result)
         
-        if cache_key in self.analysis_cache:
-            return self.analysis_cache[cache_key]
+        cached_result = None if caches_bypassed() else self.analysis_cache.get(cache_key)
+        if cached_result is not None:
+            # 缓存中是只读结构，每次返回可修改的副本
+            return thaw(cached_result)
         
         # 执行各种分析
-        basic_analysis = self._basic_analysis(pan_result)
-        ai_analysis = self._ai_intelligent_analysis(pan_result)
-        case_analysis = self._case_based_analysis(pan_result)
+        with stage_timer('analysis.basic'):
+            basic_analysis = self._basic_analysis(pan_result)
+        with stage_timer('analysis.ai'):
+            ai_analysis = self._ai_intelligent_analysis(pan_result)
+        # 相似案例只查找一次，案例分析与置信度共用
+        with stage_timer('analysis.similar_cases'):
+            similar_cases = self.find_similar_cases(pan_result, min_similarity=0.3, limit=5)
+        case_analysis = self._case_based_analysis(pan_result, similar_cases)
         
         # 综合结果
         comprehensive_result = {
@@ -649,30 +665,29 @@ class LiuRenAnalysis:
             'ai_analysis': ai_analysis,
             'case_analysis': case_analysis,
             'metadata': self._generate_metadata(pan_result),
-            'confidence': self._calculate_overall_confidence(pan_result),
+            'confidence': self._calculate_overall_confidence(pan_result, similar_cases),
             'completeness': self._calculate_analysis_completeness()
         }
         
-        # 缓存结果
-        self.analysis_cache[cache_key] = comprehensive_result
+        # 缓存只读副本，调用方修改返回结果不会影响之后的请求
+        self.analysis_cache.set(cache_key, freeze(comprehensive_result))
         
         return comprehensive_result
     
     def _generate_metadata(self, pan_result):
         """生成元数据"""
         return {
-            'analysis_timestamp': datetime.now().isoformat(),
             'pan_result_summary': {
                 'ri_gan': pan_result.get('ri_gan', ''),
                 'ri_zhi': pan_result.get('ri_zhi', ''),
                 'san_chuan_method': pan_result.get('san_chuan', {}).get('method_used', ''),
                 'liu_shen': pan_result.get('liu_shen', {}).get('shen', '')
             },
-            'analysis_version': '2.0',
+            'analysis_version': self.ANALYSIS_VERSION,
             'database_size': len(self.cases) if hasattr(self, 'cases') else 0
         }
     
-    def _calculate_overall_confidence(self, pan_result):
+    def _calculate_overall_confidence(self, pan_result, similar_cases=None):
         """计算整体置信度"""
         confidence_factors = []
         
@@ -683,7 +698,8 @@ class LiuRenAnalysis:
         confidence_factors.append(0.7)
         
         # 案例匹配置信度
-        similar_cases = self.find_similar_cases(pan_result, min_similarity=0.3, limit=1)
+        if similar_cases is None:
+            similar_cases = self.find_similar_cases(pan_result, min_similarity=0.3, limit=1)
         if similar_cases:
             confidence_factors.append(0.9)
         else:
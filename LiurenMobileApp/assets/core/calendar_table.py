@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内置干支节气历表
+预先生成 1899–2101 年的农历月表与二十四节气时刻，运行时年、月、日干支与
+月将都是整数运算加二分查找，不再为每次排盘构建 lunar_python 的农历对象。
+
+- 年柱：按农历年（正月初一换年），与 lunar_python 的 getYearGan/Zhi 一致
+- 月柱：按节（立春、惊蛰……）交接当天换月，与 getMonthGan/Zhi 一致
+- 日柱：按公历日序数推算
+- 月将：按中气交接时刻换将（雨水亥将、春分戌将……大寒子将）
+
+lunar_python 只在生成与校验历表时需要：
+    python -m core.calendar_table build
+    python -m core.calendar_table verify
+"""
+
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import date, datetime
+
+CALENDAR_MAGIC = b'LRCALNDR'
+CALENDAR_VERSION = 2
+CALENDAR_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'data', 'calendar_table.dat')
+
+FIRST_YEAR = 1899
+LAST_YEAR = 2101
+
+# 节气时刻以距此时刻的分钟数保存（北京时间）：节取所在的分钟（月柱只看交节当天），
+# 中气向上取整到整分钟，该分钟起即换月将，与 lunar_python 对 hh:mm:00 的判断一致
+TERM_ORIGIN = datetime(FIRST_YEAR, 1, 1)
+
+TIAN_GAN = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
+DI_ZHI = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
+
+# 二十四节气，从小寒起：偶数位为节，奇数位为中气
+JIE_QI_NAMES = ['小寒', '大寒', '立春', '雨水', '惊蛰', '春分', '清明', '谷雨',
+                '立夏', '小满', '芒种', '夏至', '小暑', '大暑', '立秋', '处暑',
+                '白露', '秋分', '寒露', '霜降', '立冬', '小雪', '大雪', '冬至']
+
+# 中气对应的月将
+ZHONG_QI_YUE_JIANG = {
+    '雨水': '亥', '春分': '戌', '谷雨': '酉', '小满': '申',
+    '夏至': '未', '大暑': '午', '处暑': '巳', '秋分': '辰',
+    '霜降': '卯', '小雪': '寅', '冬至': '丑', '大寒': '子'
+}
+
+# 公历日序数与日柱序号的差（2000-01-01 为戊午日）
+DAY_PILLAR_OFFSET = 14
+
+LunarDay = namedtuple('LunarDay', [
+    'lunar_year', 'lunar_month', 'lunar_day', 'solar_ordinal',
+    'nian_gan', 'nian_zhi', 'yue_gan', 'yue_zhi', 'ri_gan', 'ri_zhi'
+])
+
+
+def sexagenary_index(gan_index, zhi_index):
+    """由干支序号求六十甲子序号"""
+    return (6 * gan_index - 5 * zhi_index) % 60
+
+
+class CalendarTable:
+    """农历月表 + 节气时刻表"""
+
+    def __init__(self, month_years, month_numbers, month_day_counts, month_first_days, term_minutes):
+        self.month_years = month_years
+        self.month_numbers = month_numbers
+        self.month_day_counts = month_day_counts
+        self.month_first_days = month_first_days
+        self.term_minutes = term_minutes
+
+        # (农历年, 月) -> (首日公历日序数, 天数)，闰月月份为负数
+        self._months = {
+            (year, month): (first_day, day_count)
+            for year, month, day_count, first_day
+            in zip(month_years, month_numbers, month_day_counts, month_first_days)
+        }
+
+        origin_ordinal = TERM_ORIGIN.toordinal()
+        self._origin_minutes = origin_ordinal * 1440
+        self._jie_days = [origin_ordinal + minutes // 1440 for minutes in term_minutes[0::2]]
+        self._zhong_qi_minutes = list(term_minutes[1::2])
+
+        # 以第一个立春（节序列第 2 个）起的寅月为基准（五虎遁），之后每交一个节月柱序号加一
+        li_chun_year = date.fromordinal(self._jie_days[1]).year
+        gan_index = ((li_chun_year - 4) % 5 * 2 + 2) % 10
+        self._month_pillar_base = sexagenary_index(gan_index, 2) - 1
+
+    def lunar_day(self, year, month, day):
+        """农历日期 -> LunarDay，日期不存在时抛出 ValueError"""
+        try:
+            first_day, day_count = self._months[(year, month)]
+        except KeyError:
+            raise ValueError(f'历表中没有农历{year}年{month}月')
+        if not 1 <= day <= day_count:
+            raise ValueError(f'农历{year}年{month}月只有{day_count}天')
+
+        ordinal = first_day + day - 1
+        year_index = (year - 4) % 60
+        month_index = self.month_pillar_index(ordinal)
+        day_index = self.day_pillar_index(ordinal)
+        return LunarDay(
+            year, month, day, ordinal,
+            TIAN_GAN[year_index % 10], DI_ZHI[year_index % 12],
+            TIAN_GAN[month_index % 10], DI_ZHI[month_index % 12],
+            TIAN_GAN[day_index % 10], DI_ZHI[day_index % 12]
+        )
+
+    def month_pillar_index(self, ordinal):
+        """公历日序数所在月柱的六十甲子序号（节交接当天起算）"""
+        jie = bisect_right(self._jie_days, ordinal) - 1
+        if jie < 0:
+            raise ValueError('日期早于历表范围')
+        return (self._month_pillar_base + jie) % 60
+
+    def day_pillar_index(self, ordinal):
+        """公历日序数的日柱六十甲子序号"""
+        return (ordinal + DAY_PILLAR_OFFSET) % 60
+
+    def yue_jiang(self, ordinal, hour=0, minute=0):
+        """按中气交接时刻取月将，返回 (月将, 中气名)"""
+        moment = ordinal * 1440 - self._origin_minutes + hour * 60 + minute
+        index = bisect_right(self._zhong_qi_minutes, moment) - 1
+        if index < 0:
+            raise ValueError('日期早于历表范围')
+        zhong_qi = JIE_QI_NAMES[index % 12 * 2 + 1]
+        return ZHONG_QI_YUE_JIANG[zhong_qi], zhong_qi
+
+    def to_bytes(self):
+        """序列化为历表文件内容（小端序）"""
+        columns = [self.month_years, self.month_numbers, self.month_day_counts,
+                   self.month_first_days, self.term_minutes]
+        header = struct.pack('<8sHHHII', CALENDAR_MAGIC, CALENDAR_VERSION, FIRST_YEAR, LAST_YEAR,
+                             len(self.month_years), len(self.term_minutes))
+        blobs = []
+        for column in columns:
+            column = array(column.typecode, column)
+            if sys.byteorder == 'big':
+                column.byteswap()
+            blobs.append(column.tobytes())
+        return header + b''.join(blobs)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """由历表文件内容构建"""
+        header_size = struct.calcsize('<8sHHHII')
+        magic, version, first_year, last_year, month_count, term_count = struct.unpack_from(
+            '<8sHHHII', data)
+        if magic != CALENDAR_MAGIC:
+            raise ValueError('不是有效的历表文件')
+        if version != CALENDAR_VERSION:
+            raise ValueError(f'历表版本不匹配：{version}')
+
+        offset = header_size
+        columns = []
+        for typecode, count in (('h', month_count), ('b', month_count), ('b', month_count),
+                                ('i', month_count), ('i', term_count)):
+            column = array(typecode)
+            size = column.itemsize * count
+            column.frombytes(data[offset:offset + size])
+            if sys.byteorder == 'big':
+                column.byteswap()
+            columns.append(column)
+            offset += size
+        return cls(*columns)
+
+
+def build_calendar_table():
+    """用 lunar_python 生成历表（仅构建时需要）"""
+    from lunar_python import Lunar, LunarYear
+
+    month_years = array('h')
+    month_numbers = array('b')
+    month_day_counts = array('b')
+    month_first_days = array('i')
+    seen_months = set()
+    for year in range(FIRST_YEAR - 1, LAST_YEAR + 1):
+        for lunar_month in LunarYear.fromYear(year).getMonths():
+            key = (lunar_month.getYear(), lunar_month.getMonth())
+            if key in seen_months:
+                continue
+            seen_months.add(key)
+            first = Lunar.fromYmd(key[0], key[1], 1).getSolar()
+            month_years.append(key[0])
+            month_numbers.append(key[1])
+            month_day_counts.append(lunar_month.getDayCount())
+            month_first_days.append(date(first.getYear(), first.getMonth(), first.getDay()).toordinal())
+
+    terms = {}
+    for year in range(FIRST_YEAR - 1, LAST_YEAR + 2):
+        for name, solar in Lunar.fromYmd(year, 1, 1).getJieQiTable().items():
+            if name not in JIE_QI_NAMES:
+                continue
+            moment = datetime(solar.getYear(), solar.getMonth(), solar.getDay(),
+                              solar.getHour(), solar.getMinute(), solar.getSecond())
+            terms[moment] = name
+
+    # 从第一年的小寒起，到最后一年的冬至止
+    moments = sorted(moment for moment in terms
+                     if date(FIRST_YEAR, 1, 1) <= moment.date() <= date(LAST_YEAR, 12, 31))
+    while terms[moments[0]] != JIE_QI_NAMES[0]:
+        moments.pop(0)
+    term_minutes = array('i')
+    for i, moment in enumerate(moments):
+        if terms[moment] != JIE_QI_NAMES[i % 24]:
+            raise ValueError(f'节气顺序异常：{moment} {terms[moment]}')
+        seconds = int((moment - TERM_ORIGIN).total_seconds())
+        term_minutes.append(seconds // 60 if i % 2 == 0 else -(-seconds // 60))
+
+    return CalendarTable(month_years, month_numbers, month_day_counts, month_first_days, term_minutes)
+
+
+def write_calendar_table(table, path=CALENDAR_PATH):
+    """写入历表文件（先写临时文件再原子替换）"""
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(table.to_bytes())
+    os.replace(tmp_path, path)
+
+
+def load_calendar_table(path=CALENDAR_PATH):
+    """读取历表文件"""
+    with open(path, 'rb') as f:
+        return CalendarTable.from_bytes(f.read())
+
+
+_calendar_table = None
+_table_lock = threading.Lock()
+
+
+def get_calendar_table():
+    """获取进程级共享的历表（首次调用时加载）"""
+    global _calendar_table
+
+    table = _calendar_table
+    if table is not None:
+        return table
+
+    with _table_lock:
+        if _calendar_table is None:
+            _calendar_table = load_calendar_table()
+        return _calendar_table
+
+
+def _reset_after_fork():
+    """fork 时其他线程可能正持有加载锁，子进程里历表未加载时重建锁"""
+    global _table_lock
+    if _calendar_table is None:
+        _table_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def verify_calendar_table(table, first_year=1900, last_year=2100):
+    """与 lunar_python 逐日比对年、月、日干支和农历日期是否存在，返回不一致的日期"""
+    from lunar_python import Lunar
+
+    mismatches = []
+    for year in range(first_year, last_year + 1):
+        for month in range(1, 13):
+            for day in range(1, 32):
+                try:
+                    lunar = Lunar.fromYmdHms(year, month, day, 0, 0, 0)
+                except Exception:
+                    lunar = None
+                try:
+                    lunar_day = table.lunar_day(year, month, day)
+                except ValueError:
+                    lunar_day = None
+
+                if lunar is None or lunar_day is None:
+                    if (lunar is None) != (lunar_day is None):
+                        mismatches.append((year, month, day))
+                    continue
+
+                solar = lunar.getSolar()
+                expected = (
+                    date(solar.getYear(), solar.getMonth(), solar.getDay()).toordinal(),
+                    lunar.getYearGan(), lunar.getYearZhi(),
+                    lunar.getMonthGan(), lunar.getMonthZhi(),
+                    lunar.getDayGan(), lunar.getDayZhi()
+                )
+                actual = (
+                    lunar_day.solar_ordinal,
+                    lunar_day.nian_gan, lunar_day.nian_zhi,
+                    lunar_day.yue_gan, lunar_day.yue_zhi,
+                    lunar_day.ri_gan, lunar_day.ri_zhi
+                )
+                if actual != expected:
+                    mismatches.append((year, month, day))
+    return mismatches
+
+
+def main(argv=None):
+    """命令行：build 生成历表，verify 与 lunar_python 校验"""
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'verify'
+
+    if command == 'build':
+        table = build_calendar_table()
+        write_calendar_table(table)
+        print(f"✅ 已写入 {len(table.month_years):,} 个农历月、{len(table.term_minutes):,} 个节气到 {CALENDAR_PATH}")
+        return 0
+    if command == 'verify':
+        mismatches = verify_calendar_table(load_calendar_table())
+        if mismatches:
+            print(f"❌ {len(mismatches)} 个日期与 lunar_python 不一致，例如：{mismatches[:5]}")
+            return 1
+        print("✅ 1900–2100 年全部日期与 lunar_python 一致")
+        return 0
+
+    print("用法：python -m core.calendar_table [build|verify]")
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
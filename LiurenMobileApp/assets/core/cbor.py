@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CBOR（RFC 8949）编解码
+只覆盖排盘响应用到的类型：None、bool、int、float、str、bytes、list/tuple、dict 和 Tag。
+传入 string_ids（字符串 -> 编号）时，命中的 map 键直接编码为整数编号，
+其他位置命中的字符串编码为 Tag(TEXT_REF_TAG, 编号)；传入 value_ids（字段名 -> {规范形式 -> 编号}）时，
+该字段下与字典相同的整个 dict/list 编码为 Tag(VALUE_REF_TAG, 编号)。客户端查文本字典还原。
+使用文本字典时 map 键必须是字符串（与 JSON 对象相同），解码时整数键一律视为字符串编号。
+"""
+
+import json
+import struct
+
+# 文本字典引用标签。6、7 在 IANA CBOR 标签注册表中尚未分配，这里是本服务与客户端之间的私有约定：
+# 只出现在以 Accept: application/cbor 协商、带 X-Text-Dictionary 响应头的响应中，编号随字典一起
+# 由 /api/text-dictionary 下发（string_tag / value_tag），客户端不应写死。选用 0–23 内的编号使标签头只占
+# 1 字节；若需要与其他 CBOR 数据混用，应改为先到先得范围（32768 起）的编号并随字典版本下发。
+TEXT_REF_TAG = 6
+VALUE_REF_TAG = 7
+
+_FLOAT64 = struct.Struct('>d')
+_FLOAT32 = struct.Struct('>f')
+
+
+class Tag:
+    """CBOR 标签值"""
+
+    __slots__ = ('tag', 'value')
+
+    def __init__(self, tag, value):
+        self.tag = tag
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, Tag) and (self.tag, self.value) == (other.tag, other.value)
+
+    def __repr__(self):
+        return f'Tag({self.tag}, {self.value!r})'
+
+
+def _head(out, major, value):
+    """写入类型头：高 3 位为主类型，其余为长度或数值"""
+    major <<= 5
+    if value < 24:
+        out.append(major | value)
+    elif value < 0x100:
+        out += bytes((major | 24, value))
+    elif value < 0x10000:
+        out.append(major | 25)
+        out += value.to_bytes(2, 'big')
+    elif value < 0x100000000:
+        out.append(major | 26)
+        out += value.to_bytes(4, 'big')
+    else:
+        out.append(major | 27)
+        out += value.to_bytes(8, 'big')
+
+
+def canonical(value):
+    """dict/list 的规范形式（键排序的 JSON），用于按内容查找字典中的值"""
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+
+
+def _encode(out, value, string_ids, value_ids=None):
+    if isinstance(value, str):
+        if string_ids is not None:
+            ref = string_ids.get(value)
+            if ref is not None:
+                _head(out, 6, TEXT_REF_TAG)
+                _head(out, 0, ref)
+                return
+        data = value.encode('utf-8')
+        _head(out, 3, len(data))
+        out += data
+    elif isinstance(value, dict):
+        _head(out, 5, len(value))
+        for key, item in value.items():
+            ref = None
+            if string_ids is not None:
+                # 整数键会被解码为字符串编号，不能与字典引用并存
+                if not isinstance(key, str):
+                    raise TypeError(f'使用文本字典时 map 键必须是字符串: {key!r}')
+                ref = string_ids.get(key)
+            if ref is not None:
+                _head(out, 0, ref)
+            else:
+                _encode(out, key, None)
+            if value_ids is not None and isinstance(item, (dict, list, tuple)):
+                refs = value_ids.get(key)
+                if refs is not None:
+                    ref = refs.get(canonical(item))
+                    if ref is not None:
+                        _head(out, 6, VALUE_REF_TAG)
+                        _head(out, 0, ref)
+                        continue
+            _encode(out, item, string_ids, value_ids)
+    elif isinstance(value, (list, tuple)):
+        _head(out, 4, len(value))
+        for item in value:
+            _encode(out, item, string_ids, value_ids)
+    elif value is None:
+        out.append(0xf6)
+    elif value is True:
+        out.append(0xf5)
+    elif value is False:
+        out.append(0xf4)
+    elif isinstance(value, int):
+        if value >= 0:
+            _head(out, 0, value)
+        else:
+            _head(out, 1, -1 - value)
+    elif isinstance(value, float):
+        # 能无损表示为单精度时用 4 字节
+        single = _FLOAT32.pack(value) if abs(value) < 3.4e38 else None
+        if single is not None and _FLOAT32.unpack(single)[0] == value:
+            out.append(0xfa)
+            out += single
+        else:
+            out.append(0xfb)
+            out += _FLOAT64.pack(value)
+    elif isinstance(value, (bytes, bytearray)):
+        _head(out, 2, len(value))
+        out += value
+    elif isinstance(value, Tag):
+        _head(out, 6, value.tag)
+        _encode(out, value.value, string_ids, value_ids)
+    else:
+        raise TypeError(f'无法编码为 CBOR 的类型: {type(value).__name__}')
+
+
+def dumps(value, string_ids=None, value_ids=None):
+    """编码为 CBOR 字节串"""
+    out = bytearray()
+    _encode(out, value, string_ids, value_ids)
+    return bytes(out)
+
+
+class _Decoder:
+    def __init__(self, data, strings, values):
+        self.data = data
+        self.pos = 0
+        self.strings = strings
+        self.values = values
+
+    def _argument(self, info):
+        if info < 24:
+            return info
+        size = 1 << (info - 24)
+        start = self.pos
+        self.pos += size
+        return int.from_bytes(self.data[start:self.pos], 'big')
+
+    def decode(self, is_key=False):
+        initial = self.data[self.pos]
+        self.pos += 1
+        major, info = initial >> 5, initial & 0x1f
+        if major == 7:
+            if info == 20:
+                return False
+            if info == 21:
+                return True
+            if info == 22:
+                return None
+            if info == 26:
+                value = _FLOAT32.unpack_from(self.data, self.pos)[0]
+                self.pos += 4
+                return value
+            if info == 27:
+                value = _FLOAT64.unpack_from(self.data, self.pos)[0]
+                self.pos += 8
+                return value
+            raise ValueError(f'不支持的 CBOR 简单值: {info}')
+
+        argument = self._argument(info)
+        if major == 0:
+            # 使用文本字典时整数 map 键即字符串编号
+            if is_key and self.strings is not None:
+                return self._string(argument)
+            return argument
+        if major == 1:
+            return -1 - argument
+        if major in (2, 3):
+            start = self.pos
+            self.pos += argument
+            chunk = bytes(self.data[start:self.pos])
+            return chunk.decode('utf-8') if major == 3 else chunk
+        if major == 4:
+            return [self.decode() for _ in range(argument)]
+        if major == 5:
+            result = {}
+            for _ in range(argument):
+                key = self.decode(is_key=True)
+                result[key] = self.decode()
+            return result
+        value = self.decode()
+        if argument == TEXT_REF_TAG and self.strings is not None:
+            return self._string(value)
+        if argument == VALUE_REF_TAG and self.values is not None:
+            if not isinstance(value, int) or not 0 <= value < len(self.values):
+                raise ValueError(f'文本字典中没有值编号 {value!r}')
+            return self.values[value]
+        return Tag(argument, value)
+
+    def _string(self, ref):
+        if not isinstance(ref, int) or not 0 <= ref < len(self.strings):
+            raise ValueError(f'文本字典中没有字符串编号 {ref!r}')
+        return self.strings[ref]
+
+
+def loads(data, strings=None, values=None):
+    """解码 CBOR 字节串；传入文本字典的字符串和值列表时还原编号"""
+    return _Decoder(memoryview(data), strings, values).decode()
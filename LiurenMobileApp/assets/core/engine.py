@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享分析引擎
+进程内只构建一次 LiuRenAnalysis，供所有请求和工作线程复用
+"""
+
+import os
+import threading
+import time
+
+_analysis_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_analysis_engine():
+    """获取进程级共享的分析引擎（首次调用时构建）"""
+    global _analysis_engine
+
+    engine = _analysis_engine
+    if engine is not None:
+        return engine
+
+    with _engine_lock:
+        # 双重检查，避免多个线程同时构建
+        if _analysis_engine is None:
+            from core.analysis import LiuRenAnalysis
+            _analysis_engine = LiuRenAnalysis()
+        return _analysis_engine
+
+
+def is_engine_ready():
+    """分析引擎是否已构建完成"""
+    return _analysis_engine is not None
+
+
+def _reset_after_fork():
+    """fork 出的子进程里没有父进程的预热线程，引擎未就绪时重建锁"""
+    global _engine_lock
+    if _analysis_engine is None:
+        _engine_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def warm_up():
+    """预热分析引擎，使首个用户请求无需承担构建开销"""
+    start = time.perf_counter()
+    engine = get_analysis_engine()
+    elapsed = time.perf_counter() - start
+    print(f"✅ 分析引擎已就绪，耗时 {elapsed:.2f} 秒")
+    return engine
+
+
+def warm_up_in_background():
+    """在后台线程中预热分析引擎"""
+    thread = threading.Thread(target=warm_up, name='analysis-engine-warm-up', daemon=True)
+    thread.start()
+    return thread
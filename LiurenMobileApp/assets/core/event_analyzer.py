@@ -5,16 +5,27 @@
 根据用户输入的事件描述，智能识别事件类型并提供个性化分析
 """
 
+import os
 import re
-import jieba
 from collections import Counter
 
+from core.frozen import freeze
+from core.keyword_matcher import CategoryKeywordMatcher
+from core.metrics import stage_timer
+from core.question_table import load_question_table
+from core.result_cache import MemoryResultCache, caches_bypassed
+from core.segmenter import get_segmenter
+
+# 问题分析结果缓存的容量
+EVENT_CACHE_SIZE = int(os.environ.get('LIUREN_EVENT_CACHE_SIZE', 4096))
+
 class EventAnalyzer:
     """智能事件分析引擎"""
     
     def __init__(self):
-        # 初始化分词器
-        jieba.initialize()
+        # 分词器在后台加载词典，就绪前用分类关键词切分
+        self.segmenter = get_segmenter()
+        self.segmenter.start_loading()
         
         # 事件分类数据库
         self.event_categories = self._initialize_event_categories()
@@ -24,6 +35,15 @@ class EventAnalyzer:
         
         # 相似度阈值
         self.similarity_threshold = 0.3
+        
+        # 分类关键词自动机与合并正则（构建一次，所有问题共用）
+        self.keyword_matcher = CategoryKeywordMatcher(self.event_categories, self.keyword_weights)
+        
+        # 按预处理后文本缓存分析结果：常见问题预计算表 + LRU 缓存
+        self.question_table = load_question_table()
+        self.question_table_hits = 0
+        self.event_cache = MemoryResultCache(EVENT_CACHE_SIZE)
+        self.uncached_fallbacks = 0
     
     def analyze_event(self, user_input):
         """分析用户输入的事件"""
@@ -33,17 +53,41 @@ class EventAnalyzer:
         # 预处理文本
         processed_text = self._preprocess_text(user_input)
         
-        # 提取关键词
-        keywords = self._extract_keywords(processed_text)
+        cached = None
+        if not caches_bypassed():
+            cached = self.question_table.get(processed_text)
+            if cached is not None:
+                self.question_table_hits += 1
+            else:
+                cached = self.event_cache.get(processed_text)
+        if cached is not None:
+            return {'original_input': user_input, **cached}
+        
+        # jieba 未就绪时的关键词切分结果不缓存，词典加载后重新分析
+        cacheable = self.segmenter.ready
+        # 缓存的结果由各请求共用，存为只读结构
+        result = freeze(self.compute_event_analysis(processed_text))
+        if cacheable:
+            self.event_cache.set(processed_text, result)
+        else:
+            self.uncached_fallbacks += 1
+        return {'original_input': user_input, **result}
+    
+    def compute_event_analysis(self, processed_text):
+        """对预处理后的文本做完整分析（不含原始输入，不经过缓存）"""
+        # 分词并提取关键词
+        with stage_timer('event.segment'):
+            words = self._segment(processed_text)
+        keywords = self._extract_keywords(processed_text, words)
         
         # 分类事件
-        event_type, confidence = self._classify_event(keywords, processed_text)
+        with stage_timer('event.classify'):
+            event_type, confidence = self._classify_event(keywords, processed_text, words)
         
         # 生成分析配置
         analysis_config = self._generate_analysis_config(event_type, keywords, confidence)
         
         return {
-            'original_input': user_input,
             'processed_text': processed_text,
             'keywords': keywords,
             'event_type': event_type,
@@ -52,6 +96,15 @@ class EventAnalyzer:
             'personalized_focus': self._get_personalized_focus(event_type)
         }
     
+    def cache_stats(self):
+        """问题分析缓存统计"""
+        return {
+            **self.event_cache.stats(),
+            'question_table_size': len(self.question_table),
+            'question_table_hits': self.question_table_hits,
+            'uncached_fallbacks': self.uncached_fallbacks
+        }
+    
     def _initialize_event_categories(self):
         """初始化事件分类数据库"""
         return {
@@ -653,10 +706,15 @@ class EventAnalyzer:
         
         return text
     
-    def _extract_keywords(self, text):
+    def _segment(self, text):
+        """分词（jieba 未就绪时只切出分类关键词）"""
+        return self.segmenter.cut(text, fallback=self.keyword_matcher.automaton)
+    
+    def _extract_keywords(self, text, words=None):
         """提取关键词"""
         # 使用jieba分词
-        words = list(jieba.cut(text))
+        if words is None:
+            words = self._segment(text)
         
         # 过滤停用词和无意义词
         stop_words = {'的', '了', '在', '是', '我', '你', '他', '她', '它', '们', 
@@ -667,33 +725,13 @@ class EventAnalyzer:
         
         return keywords
     
-    def _classify_event(self, keywords, text):
+    def _classify_event(self, keywords, text, words=None):
         """分类事件类型"""
-        scores = {}
+        if words is None:
+            words = self._segment(text)
         
-        for category, info in self.event_categories.items():
-            score = 0
-            
-            # 关键词匹配得分
-            for keyword in keywords:
-                if keyword in info['keywords']:
-                    score += self.keyword_weights['high']
-                
-                # 模糊匹配
-                for cat_keyword in info['keywords']:
-                    if keyword in cat_keyword or cat_keyword in keyword:
-                        score += self.keyword_weights['medium']
-            
-            # 正则模式匹配得分
-            for pattern in info['patterns']:
-                if re.search(pattern, text):
-                    score += self.keyword_weights['high'] * 2
-            
-            # 语义相似度得分（简化版）
-            similarity_score = self._calculate_semantic_similarity(text, info['keywords'])
-            score += similarity_score * self.keyword_weights['medium']
-            
-            scores[category] = score
+        # 关键词匹配、正则模式匹配、语义相似度得分
+        scores = self.keyword_matcher.score(keywords, text, words)
         
         # 找到最高得分的类别
         if not scores or max(scores.values()) == 0:
@@ -712,20 +750,6 @@ class EventAnalyzer:
         
         return best_category, confidence
     
-    def _calculate_semantic_similarity(self, text, keywords):
-        """计算语义相似度（简化版）"""
-        text_words = set(jieba.cut(text))
-        keyword_set = set(keywords)
-        
-        # 计算交集
-        intersection = text_words.intersection(keyword_set)
-        
-        # 计算Jaccard相似度
-        union = text_words.union(keyword_set)
-        similarity = len(intersection) / len(union) if union else 0
-        
-        return similarity * 10  # 放大权重
-    
     def _generate_analysis_config(self, event_type, keywords, confidence):
         """生成分析配置"""
         category_info = self.event_categories[event_type]
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+只读数据结构
+进程级共享的预计算结果（排盘表条目等）直接交给每个请求，不逐次复制；
+freeze() 把它们转成只读结构：dict -> FrozenDict，list -> tuple。调用方试图修改时抛出 TypeError，
+而不是悄悄改掉之后所有请求看到的内容；需要修改时先用 thaw() 取得普通的可变副本。
+
+FrozenDict 是 dict 的子类，json / jsonify / pickle / CBOR 编码结果与普通 dict 相同。
+"""
+
+
+class FrozenDict(dict):
+    """只读 dict"""
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('共享的只读数据不能修改，请先用 core.frozen.thaw() 复制')
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        # 默认的 dict 子类反序列化会逐项调用 __setitem__
+        return (FrozenDict, (dict(self),))
+
+    def __repr__(self):
+        return f'FrozenDict({dict.__repr__(self)})'
+
+
+def freeze(value):
+    """递归转为只读结构（已是只读的部分原样返回）"""
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """递归转为普通的 dict / list 副本"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时分析
+在全新的子进程中以 python -X importtime 导入模块，按累计耗时和自身耗时列出最慢的导入；
+并测量进程启动到首个请求（GET /healthz、GET /）返回的时间，启动预算为 300 毫秒。
+
+运行（在 assets 目录下）：python -m core.import_profile [模块] [--top N] [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ASSETS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_BUDGET_MS = 300
+
+# import time:       self [us] |  cumulative | imported package
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+FIRST_REQUEST_SCRIPT = '''
+import json, time
+start = time.time()
+import app
+imported = time.time()
+client = app.app.test_client()
+status = client.get('/healthz').status_code
+index = client.get('/')
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_request_at': time.time(),
+    'healthz_status': status,
+    'index_status': index.status_code
+}))
+'''
+
+
+def parse_import_times(stderr):
+    """解析 -X importtime 输出，返回 [{name, depth, self_ms, cumulative_ms}]"""
+    records = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            records.append({
+                'name': name,
+                'depth': (len(indent) - 1) // 2,
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000
+            })
+    return records
+
+
+def profile_imports(module='app'):
+    """在子进程中导入模块并收集各导入耗时"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ASSETS_DIR, capture_output=True, text=True, check=True)
+    return parse_import_times(result.stderr)
+
+
+def measure_first_request():
+    """在子进程中测量从启动到首个请求返回的时间（含解释器启动）"""
+    process_start = time.time()
+    result = subprocess.run([sys.executable, '-c', FIRST_REQUEST_SCRIPT], cwd=ASSETS_DIR,
+                            capture_output=True, text=True, check=True)
+    measurement = json.loads(result.stdout.strip().splitlines()[-1])
+    measurement['first_request_ms'] = (measurement.pop('first_request_at') - process_start) * 1000
+    return measurement
+
+
+def build_report(module='app', top=15):
+    records = profile_imports(module)
+    top_level = [record for record in records if record['depth'] == 0]
+    return {
+        'module': module,
+        'total_ms': round(sum(record['cumulative_ms'] for record in top_level), 1),
+        'by_cumulative': sorted(records, key=lambda record: record['cumulative_ms'], reverse=True)[:top],
+        'by_self': sorted(records, key=lambda record: record['self_ms'], reverse=True)[:top],
+        'first_request': measure_first_request() if module == 'app' else None,
+        'budget_ms': STARTUP_BUDGET_MS
+    }
+
+
+def main(argv=None):
+    """命令行：输出导入耗时报告"""
+    parser = argparse.ArgumentParser(description='启动耗时分析（-X importtime）')
+    parser.add_argument('module', nargs='?', default='app', help='要分析的模块')
+    parser.add_argument('--top', type=int, default=15, help='列出最慢的前 N 个导入')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出结果')
+    args = parser.parse_args(argv)
+
+    report = build_report(args.module, args.top)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"导入 {report['module']} 共耗时 {report['total_ms']:.1f} 毫秒")
+    for title, group, key in (('累计耗时', 'by_cumulative', 'cumulative_ms'), ('自身耗时', 'by_self', 'self_ms')):
+        print(f"\n按{title}排序（毫秒）：")
+        for record in report[group]:
+            print(f"  {record[key]:>8.1f}  {'  ' * record['depth']}{record['name']}")
+
+    first_request = report['first_request']
+    if first_request:
+        elapsed = first_request['first_request_ms']
+        mark = '✅' if elapsed <= STARTUP_BUDGET_MS else '⚠️'
+        print(f"\n{mark} 启动到首个请求返回 {elapsed:.1f} 毫秒（导入 app {first_request['import_ms']:.1f} 毫秒，"
+              f"预算 {STARTUP_BUDGET_MS} 毫秒）")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+事件关键词匹配
+KeywordAutomaton 是 Aho-Corasick 多模式匹配自动机，一次扫描找出文本中出现的全部关键词；
+CategoryKeywordMatcher 在构建时把事件分类库编译成自动机、子串计数表和每个分类一条的合并正则，
+对一个问题的分类评分只需扫描一遍分词结果，不再逐分类、逐关键词两两比较。
+"""
+
+import re
+from collections import deque
+
+
+class KeywordAutomaton:
+    """Aho-Corasick 多模式匹配自动机"""
+
+    def __init__(self, patterns):
+        self.patterns = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+
+        for pattern in dict.fromkeys(patterns):
+            if pattern:
+                self._add(pattern)
+        self._build_failure_links()
+
+    def _add(self, pattern):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] = self._output[state] + (len(self.patterns),)
+        self.patterns.append(pattern)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                # 后缀状态的输出并入当前状态，匹配时无需沿失败链回溯
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text):
+        """依次产出 (起始位置, 关键词)，包括重叠的匹配"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        patterns = self.patterns
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in output[state]:
+                pattern = patterns[pattern_id]
+                yield index - len(pattern) + 1, pattern
+
+    def find_all(self, text):
+        """文本中出现过的关键词集合"""
+        return {pattern for _, pattern in self.iter_matches(text)}
+
+    def segment(self, text):
+        """按最左最长原则切出关键词，其余字符逐字切分（分词器未就绪时的替代）"""
+        longest = {}
+        for start, pattern in self.iter_matches(text):
+            if len(pattern) > len(longest.get(start, '')):
+                longest[start] = pattern
+
+        words = []
+        position = 0
+        while position < len(text):
+            word = longest.get(position) or text[position]
+            words.append(word)
+            position += len(word)
+        return words
+
+    def __len__(self):
+        return len(self.patterns)
+
+
+class CategoryKeywordMatcher:
+    """事件分类评分：评分规则与逐分类两两比较的写法完全一致"""
+
+    def __init__(self, event_categories, keyword_weights):
+        self.categories = list(event_categories)
+        self.high = keyword_weights['high']
+        self.medium = keyword_weights['medium']
+
+        # 关键词 -> {分类: 在该分类关键词表中出现的次数}
+        self.exact = {}
+        # 子串 -> {分类: 该分类中包含此子串的关键词个数}
+        self.contained = {}
+        # 分类 -> 去重后的关键词个数（语义相似度的并集大小）
+        self.unique_sizes = {}
+        # 分类 -> 由全部模式合并成的一条正则，每个模式一个命名分组
+        self.patterns = {}
+
+        for category, info in event_categories.items():
+            for keyword in info['keywords']:
+                counts = self.exact.setdefault(keyword, {})
+                counts[category] = counts.get(category, 0) + 1
+                for substring in self._substrings(keyword):
+                    counts = self.contained.setdefault(substring, {})
+                    counts[category] = counts.get(category, 0) + 1
+            self.unique_sizes[category] = len(set(info['keywords']))
+            self.patterns[category] = self._combine_patterns(info['patterns'])
+
+        self.automaton = KeywordAutomaton(self.exact)
+
+    @staticmethod
+    def _substrings(keyword):
+        return {keyword[start:end]
+                for start in range(len(keyword))
+                for end in range(start + 1, len(keyword) + 1)}
+
+    @staticmethod
+    def _combine_patterns(patterns):
+        """每个模式放进一个可选的前瞻分组：一次匹配即可知道哪些模式在文本中出现过"""
+        if not patterns:
+            return None
+        groups = ''.join(rf'(?:(?=[\s\S]*?(?P<p{index}>{pattern})))?' for index, pattern in enumerate(patterns))
+        return re.compile(r'\A' + groups)
+
+    def count_patterns(self, category, text):
+        """文本能匹配上的模式个数"""
+        combined = self.patterns[category]
+        if combined is None:
+            return 0
+        match = combined.match(text)
+        return sum(1 for value in match.groups() if value is not None)
+
+    def score(self, keywords, text, words):
+        """各分类得分（按分类库顺序）"""
+        keyword_points = dict.fromkeys(self.categories, 0)
+        for keyword in keywords:
+            exact = self.exact.get(keyword, {})
+            # 完全命中分类关键词
+            for category in exact:
+                keyword_points[category] += self.high
+            # 模糊匹配：keyword 是分类关键词的子串，或分类关键词是 keyword 的子串（两者相等只算一次）
+            for category, count in self.contained.get(keyword, {}).items():
+                keyword_points[category] += self.medium * count
+            for found in self.automaton.find_all(keyword):
+                for category, count in self.exact[found].items():
+                    keyword_points[category] += self.medium * count
+            for category, count in exact.items():
+                keyword_points[category] -= self.medium * count
+
+        # 分词结果与各分类关键词的交集大小
+        word_set = set(words)
+        overlaps = dict.fromkeys(self.categories, 0)
+        for word in word_set:
+            for category in self.exact.get(word, ()):
+                overlaps[category] += 1
+
+        scores = {}
+        for category in self.categories:
+            score = keyword_points[category]
+            score += self.count_patterns(category, text) * self.high * 2
+            union = len(word_set) + self.unique_sizes[category] - overlaps[category]
+            similarity = overlaps[category] / union if union else 0
+            score += similarity * 10 * self.medium
+            scores[category] = score
+        return scores
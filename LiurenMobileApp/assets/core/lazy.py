@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+延迟初始化
+古籍库、事件分析器等进程级共享对象在首次使用时才构建，进程启动后可以立即提供服务；
+所有延迟对象登记在同一处，供 /healthz 报告就绪状态和后台统一预热。
+"""
+
+import os
+import threading
+import time
+
+_resources = {}
+
+
+class LazyResource:
+    """首次调用 get() 时构建的进程级共享对象"""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.load_seconds = None
+        self.error = None
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        value = self._value
+        if value is not None:
+            return value
+
+        with self._lock:
+            # 双重检查，避免多个线程同时构建
+            if self._value is None:
+                start = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.error = None
+                self.load_seconds = time.perf_counter() - start
+            return self._value
+
+    @property
+    def ready(self):
+        return self._value is not None
+
+    def status(self):
+        return {
+            'ready': self.ready,
+            'load_seconds': round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            'error': self.error
+        }
+
+
+def lazy_resource(name, factory):
+    """登记一个延迟构建的共享对象"""
+    resource = LazyResource(name, factory)
+    _resources[name] = resource
+    return resource
+
+
+def resource_status():
+    """各延迟对象的就绪状态"""
+    return {name: resource.status() for name, resource in _resources.items()}
+
+
+def _reset_after_fork():
+    """fork 出的子进程里没有父进程的预热线程，未就绪对象的锁可能仍处于持有状态"""
+    for resource in _resources.values():
+        if not resource.ready:
+            resource._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def warm_up_resources():
+    """按登记顺序构建全部延迟对象"""
+    for name, resource in _resources.items():
+        try:
+            resource.get()
+        except Exception as e:
+            print(f"⚠️ {name} 初始化失败：{e}")
@@ -5,13 +5,81 @@
 """
 
 import math
-from datetime import datetime
-from lunar_python import Lunar
+from datetime import datetime, timedelta
+from core.calendar_table import get_calendar_table
+from core.frozen import FrozenDict, freeze
+from core.metrics import stage_timer
+from core.pan_table import PAN_TABLE_FIELDS, get_pan_table
+from core.result_cache import caches_bypassed
 
 class LiuRenPan:
     """大六壬排盘类 - 最专业版本"""
     
-    def __init__(self, year, month, day, hour, minute):
+    # 天干地支
+    tiangan = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
+    dizhi = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
+    
+    # 六神
+    liushen = ['青龙', '朱雀', '勾陈', '螣蛇', '白虎', '玄武']
+    
+    # 十二神将（排盘结果直接引用以下各表，均为只读结构）
+    shiershen = ('贵人', '螣蛇', '朱雀', '六合', '勾陈', '青龙', '天空', '白虎', '太常', '玄武', '太阴', '天后')
+    
+    # 五行
+    wuxing = ['木', '火', '土', '金', '水']
+    
+    # 六亲关系表：日干 -> {六亲: 天干}
+    liu_qin_map = freeze({
+        '甲': {'比劫': '乙', '食神': '丙', '偏财': '丁', '正财': '戊', '七杀': '庚', '正官': '辛', '偏印': '壬', '正印': '癸'},
+        '乙': {'比劫': '甲', '食神': '丁', '偏财': '戊', '正财': '己', '七杀': '辛', '正官': '庚', '偏印': '癸', '正印': '壬'},
+        '丙': {'比劫': '丁', '食神': '戊', '偏财': '己', '正财': '庚', '七杀': '壬', '正官': '癸', '偏印': '甲', '正印': '乙'},
+        '丁': {'比劫': '丙', '食神': '己', '偏财': '庚', '正财': '辛', '七杀': '癸', '正官': '壬', '偏印': '乙', '正印': '甲'},
+        '戊': {'比劫': '己', '食神': '庚', '偏财': '辛', '正财': '壬', '七杀': '甲', '正官': '乙', '偏印': '丙', '正印': '丁'},
+        '己': {'比劫': '戊', '食神': '辛', '偏财': '壬', '正财': '癸', '七杀': '乙', '正官': '甲', '偏印': '丁', '正印': '丙'},
+        '庚': {'比劫': '辛', '食神': '壬', '偏财': '癸', '正财': '甲', '七杀': '丙', '正官': '丁', '偏印': '戊', '正印': '己'},
+        '辛': {'比劫': '庚', '食神': '癸', '偏财': '甲', '正财': '乙', '七杀': '丁', '正官': '丙', '偏印': '己', '正印': '戊'},
+        '壬': {'比劫': '癸', '食神': '甲', '偏财': '乙', '正财': '丙', '七杀': '戊', '正官': '己', '偏印': '庚', '正印': '辛'},
+        '癸': {'比劫': '壬', '食神': '乙', '偏财': '丙', '正财': '丁', '七杀': '己', '正官': '戊', '偏印': '辛', '正印': '庚'}
+    })
+    
+    # 六神起始：甲己起青龙，乙庚起朱雀，丙辛起勾陈，丁壬起螣蛇，戊癸起白虎
+    liu_shen_start = {
+        '甲': '青龙', '己': '青龙',
+        '乙': '朱雀', '庚': '朱雀',
+        '丙': '勾陈', '辛': '勾陈',
+        '丁': '螣蛇', '壬': '螣蛇',
+        '戊': '白虎', '癸': '白虎'
+    }
+    
+    # 空亡
+    kong_wang_map = {
+        '甲': '戌亥', '乙': '申酉', '丙': '午未', '丁': '辰巳',
+        '戊': '寅卯', '己': '子丑', '庚': '戌亥', '辛': '申酉',
+        '壬': '午未', '癸': '辰巳'
+    }
+    
+    # 驿马
+    yi_ma_map = {
+        '甲': '寅', '乙': '卯', '丙': '巳', '丁': '午',
+        '戊': '巳', '己': '午', '庚': '申', '辛': '酉',
+        '壬': '亥', '癸': '子'
+    }
+    
+    # 长生十二神：日干 -> 长生至养依次所在的地支
+    chang_sheng_map = freeze({
+        '甲': ['亥', '子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌'],
+        '乙': ['午', '巳', '辰', '卯', '寅', '丑', '子', '亥', '戌', '酉', '申', '未'],
+        '丙': ['寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥', '子', '丑'],
+        '丁': ['酉', '申', '未', '午', '巳', '辰', '卯', '寅', '丑', '子', '亥', '戌'],
+        '戊': ['寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥', '子', '丑'],
+        '己': ['酉', '申', '未', '午', '巳', '辰', '卯', '寅', '丑', '子', '亥', '戌'],
+        '庚': ['巳', '午', '未', '申', '酉', '戌', '亥', '子', '丑', '寅', '卯', '辰'],
+        '辛': ['子', '亥', '戌', '酉', '申', '未', '午', '巳', '辰', '卯', '寅', '丑'],
+        '壬': ['申', '酉', '戌', '亥', '子', '丑', '寅', '卯', '辰', '巳', '午', '未'],
+        '癸': ['卯', '寅', '丑', '子', '亥', '戌', '酉', '申', '未', '午', '巳', '辰']
+    })
+    
+    def __init__(self, year, month, day, hour, minute, lunar=None):
         self.year = year
         self.month = month
         self.day = day
@@ -21,31 +89,62 @@ class LiuRenPan:
         # 验证日期范围
         self._validate_date()
         
-        # 尝试创建农历对象，如果失败则使用公历
+        # 按农历日期查内置历表，如果日期不存在则使用公历（批量排盘时可传入同一日期已查得的结果）
         try:
-            self.lunar = Lunar.fromYmdHms(year, month, day, hour, minute, 0)
+            if lunar is None:
+                with stage_timer('pan.lunar'):
+                    lunar = get_calendar_table().lunar_day(year, month, day)
+            self.lunar = lunar
             self.is_lunar = True
-        except Exception as e:
+        except ValueError as e:
             # 如果农历创建失败，使用公历
             from datetime import datetime
             self.solar_date = datetime(year, month, day, hour, minute)
             self.is_lunar = False
         
-        # 天干地支
-        self.tiangan = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
-        self.dizhi = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
-        
-        # 六神
-        self.liushen = ['青龙', '朱雀', '勾陈', '螣蛇', '白虎', '玄武']
-        
-        # 十二神将
-        self.shiershen = ['贵人', '螣蛇', '朱雀', '六合', '勾陈', '青龙', '天空', '白虎', '太常', '玄武', '太阴', '天后']
-        
-        # 五行
-        self.wuxing = ['木', '火', '土', '金', '水']
-        
         # 排盘结果
         self.result = {}
+    
+    @classmethod
+    def iter_calculate(cls, datetimes):
+        """逐个计算排盘，生成 (时间, 排盘结果)
+
+        同一天的连续时间共用一次历表查询结果（年、月、日干支只取决于日期）
+        """
+        calendar = get_calendar_table()
+        lunar_date = None
+        lunar = None
+        for moment in datetimes:
+            date_key = (moment.year, moment.month, moment.day)
+            if date_key != lunar_date:
+                lunar_date = date_key
+                try:
+                    lunar = calendar.lunar_day(moment.year, moment.month, moment.day)
+                except ValueError:
+                    lunar = None
+            
+            pan = cls(moment.year, moment.month, moment.day, moment.hour, moment.minute, lunar=lunar)
+            yield moment, pan.calculate()
+    
+    @classmethod
+    def calculate_many(cls, datetimes):
+        """批量计算排盘，按输入顺序返回排盘结果列表"""
+        return [result for _, result in cls.iter_calculate(datetimes)]
+    
+    @staticmethod
+    def iter_range(start, end, step=timedelta(hours=2)):
+        """生成 start 到 end（含）之间按 step 间隔的时间"""
+        if step <= timedelta(0):
+            raise ValueError("时间间隔必须大于0")
+        moment = start
+        while moment <= end:
+            yield moment
+            moment += step
+    
+    @classmethod
+    def calculate_range(cls, start, end, step=timedelta(hours=2)):
+        """计算时间范围内每个时间点的排盘，默认每两小时（一个时辰）一盘"""
+        return cls.calculate_many(cls.iter_range(start, end, step))
         
     def _validate_date(self):
         """验证日期范围"""
@@ -61,19 +160,45 @@ class LiuRenPan:
             raise ValueError("分钟必须在0-59之间")
         
     def calculate(self):
-        """计算完整的大六壬排盘"""
-        # 计算月将
-        self._calculate_yue_jiang()
-        
-        # 计算年干支
-        self._calculate_nian_gan_zhi()
-        
-        # 计算月干支
-        self._calculate_yue_gan_zhi()
+        """计算完整的大六壬排盘
+
+        返回结构化排盘：六亲、六神、十二神将、空亡、驿马、长生只含干支和序号，
+        输出前用 core.text_table.render_pan() 补全释义文本
+        """
+        with stage_timer('pan.gan_zhi'):
+            # 计算月将
+            self._calculate_yue_jiang()
+            
+            # 计算年干支
+            self._calculate_nian_gan_zhi()
+            
+            # 计算月干支
+            self._calculate_yue_gan_zhi()
+            
+            # 计算日干支
+            self._calculate_ri_gan_zhi()
+        
+        # 其余部分只由日干支、时辰、月将决定，直接查预计算排盘表
+        entry = None
+        if not caches_bypassed():
+            with stage_timer('pan.table_lookup'):
+                entry = get_pan_table().lookup(self.result['ri_gan'], self.result['ri_zhi'],
+                                               (self.hour + 1) // 2 % 12, self.result['yue_jiang'])
+        if entry is not None:
+            # 条目中的子结构是只读的，可直接共享
+            self.result.update(entry)
+        else:
+            # 排盘表不可用时逐项计算天地盘、四课和三传（九宗门取传），与查表结果一样转为只读结构
+            with stage_timer('pan.structure'):
+                self._calculate_pan_structure()
+                for field in PAN_TABLE_FIELDS:
+                    self.result[field] = freeze(self.result[field])
         
-        # 计算日干支
-        self._calculate_ri_gan_zhi()
+        # 返回计算结果
+        return self.result
         
+    def _calculate_pan_structure(self):
+        """计算与具体日期无关的排盘结构（时干支至长生十二神）"""
         # 计算时干支
         self._calculate_shi_gan_zhi()
         
@@ -110,47 +235,23 @@ class LiuRenPan:
         # 计算长生十二神
         self._calculate_chang_sheng()
         
-        # 返回计算结果
-        return self.result
-        
     def _calculate_yue_jiang(self):
         """计算月将（传统大六壬规则）"""
-        # 传统大六壬月将按照节气计算，不是简单月份对应
-        # 需要根据具体日期判断节气
-        
+        # 月将按中气交接换将：雨水后亥将、春分后戌将……大寒后子将
         if self.is_lunar:
-            month = self.lunar.getMonth()
-            # 农历月份对应节气
-            jie_qi_month = {
-                1: '立春', 2: '惊蛰', 3: '清明', 4: '立夏', 
-                5: '芒种', 6: '小暑', 7: '立秋', 8: '白露',
-                9: '寒露', 10: '立冬', 11: '大雪', 12: '小寒'
-            }
+            ordinal = self.lunar.solar_ordinal
         else:
-            # 公历月份对应节气（简化版，实际需要精确节气日期）
-            month = self.solar_date.month
-            jie_qi_month = {
-                1: '小寒', 2: '立春', 3: '惊蛰', 4: '清明', 
-                5: '立夏', 6: '芒种', 7: '小暑', 8: '立秋',
-                9: '白露', 10: '寒露', 11: '立冬', 12: '大雪'
-            }
+            ordinal = self.solar_date.toordinal()
         
-        # 传统大六壬月将对应表（按节气）
-        yue_jiang_map = {
-            '立春': '寅', '惊蛰': '卯', '清明': '辰', '立夏': '巳',
-            '芒种': '午', '小暑': '未', '立秋': '申', '白露': '酉',
-            '寒露': '戌', '立冬': '亥', '大雪': '子', '小寒': '丑'
-        }
-        
-        jie_qi = jie_qi_month.get(month, '小寒')
-        self.result['yue_jiang'] = yue_jiang_map.get(jie_qi, '寅')
+        yue_jiang, jie_qi = get_calendar_table().yue_jiang(ordinal, self.hour, self.minute)
+        self.result['yue_jiang'] = yue_jiang
         self.result['jie_qi'] = jie_qi
         
     def _calculate_nian_gan_zhi(self):
         """计算年干支"""
         if self.is_lunar:
-            nian_gan = self.lunar.getYearGan()
-            nian_zhi = self.lunar.getYearZhi()
+            nian_gan = self.lunar.nian_gan
+            nian_zhi = self.lunar.nian_zhi
         else:
             nian_gan = self._calculate_solar_nian_gan()
             nian_zhi = self._calculate_solar_nian_zhi()
@@ -162,8 +263,8 @@ class LiuRenPan:
     def _calculate_yue_gan_zhi(self):
         """计算月干支"""
         if self.is_lunar:
-            yue_gan = self.lunar.getMonthGan()
-            yue_zhi = self.lunar.getMonthZhi()
+            yue_gan = self.lunar.yue_gan
+            yue_zhi = self.lunar.yue_zhi
         else:
             yue_gan = self._calculate_solar_yue_gan()
             yue_zhi = self._calculate_solar_yue_zhi()
@@ -201,8 +302,8 @@ class LiuRenPan:
     def _calculate_ri_gan_zhi(self):
         """计算日干支（完整版本）"""
         if self.is_lunar:
-            ri_gan = self.lunar.getDayGan()
-            ri_zhi = self.lunar.getDayZhi()
+            ri_gan = self.lunar.ri_gan
+            ri_zhi = self.lunar.ri_zhi
         else:
             ri_gan = self._calculate_solar_ri_gan()
             ri_zhi = self._calculate_solar_ri_zhi()
@@ -844,185 +945,35 @@ class LiuRenPan:
         return self._get_sheng_zhi(zhi1)
         
     def _calculate_liu_qin(self):
-        """计算六亲（专业版本）"""
+        """计算六亲（专业版本），释义由 core.text_table 在输出时补全"""
         ri_gan = self.result.get('ri_gan', '甲')
         if not isinstance(ri_gan, str):
             ri_gan = '甲'
-            
-        # 完整的六亲关系表
-        liu_qin_map = {
-            '甲': {'比劫': '乙', '食神': '丙', '偏财': '丁', '正财': '戊', '七杀': '庚', '正官': '辛', '偏印': '壬', '正印': '癸'},
-            '乙': {'比劫': '甲', '食神': '丁', '偏财': '戊', '正财': '己', '七杀': '辛', '正官': '庚', '偏印': '癸', '正印': '壬'},
-            '丙': {'比劫': '丁', '食神': '戊', '偏财': '己', '正财': '庚', '七杀': '壬', '正官': '癸', '偏印': '甲', '正印': '乙'},
-            '丁': {'比劫': '丙', '食神': '己', '偏财': '庚', '正财': '辛', '七杀': '癸', '正官': '壬', '偏印': '乙', '正印': '甲'},
-            '戊': {'比劫': '己', '食神': '庚', '偏财': '辛', '正财': '壬', '七杀': '甲', '正官': '乙', '偏印': '丙', '正印': '丁'},
-            '己': {'比劫': '戊', '食神': '辛', '偏财': '壬', '正财': '癸', '七杀': '乙', '正官': '甲', '偏印': '丁', '正印': '丙'},
-            '庚': {'比劫': '辛', '食神': '壬', '偏财': '癸', '正财': '甲', '七杀': '丙', '正官': '丁', '偏印': '戊', '正印': '己'},
-            '辛': {'比劫': '庚', '食神': '癸', '偏财': '甲', '正财': '乙', '七杀': '丁', '正官': '丙', '偏印': '己', '正印': '戊'},
-            '壬': {'比劫': '癸', '食神': '甲', '偏财': '乙', '正财': '丙', '七杀': '戊', '正官': '己', '偏印': '庚', '正印': '辛'},
-            '癸': {'比劫': '壬', '食神': '乙', '偏财': '丙', '正财': '丁', '七杀': '己', '正官': '戊', '偏印': '辛', '正印': '庚'}
-        }
-        
-        liu_qin = liu_qin_map.get(ri_gan, {})
         
-        # 添加六亲的详细解释
-        liu_qin_detailed = {}
-        for relation, gan in liu_qin.items():
-            liu_qin_detailed[relation] = {
-                'gan': gan,
-                'meaning': self._get_liu_qin_meaning(relation),
-                'influence': self._get_liu_qin_influence(relation)
-            }
-        
-        self.result['liu_qin'] = liu_qin_detailed
-        
-    def _get_liu_qin_meaning(self, relation):
-        """获取六亲含义"""
-        meanings = {
-            '比劫': '同辈、朋友、竞争关系，代表助力或阻力',
-            '食神': '智慧、才华、表达能力，代表创造力和智慧',
-            '偏财': '意外之财、投资机会，代表偏门收入',
-            '正财': '正当收入、稳定财富，代表正当收入',
-            '七杀': '挑战、压力、竞争，代表困难和挑战',
-            '正官': '权威、地位、名誉，代表官方和权威',
-            '偏印': '学习、知识、文化，代表学习和知识',
-            '正印': '贵人、长辈、保护，代表贵人和保护'
-        }
-        return meanings.get(relation, '未知')
-        
-    def _get_liu_qin_influence(self, relation):
-        """获取六亲影响"""
-        influences = {
-            '比劫': '助力时有利合作，阻力时易有竞争',
-            '食神': '旺相时智慧开启，衰弱时思维混乱',
-            '偏财': '旺相时财运亨通，衰弱时破财损财',
-            '正财': '旺相时收入稳定，衰弱时收入减少',
-            '七杀': '旺相时勇敢面对，衰弱时畏缩不前',
-            '正官': '旺相时地位提升，衰弱时地位下降',
-            '偏印': '旺相时学习进步，衰弱时学习困难',
-            '正印': '旺相时贵人相助，衰弱时孤立无援'
-        }
-        return influences.get(relation, '未知')
+        self.result['liu_qin'] = self.liu_qin_map.get(ri_gan, FrozenDict())
         
     def _calculate_liu_shen(self):
-        """计算六神（传统大六壬规则）"""
+        """计算六神（传统大六壬规则），释义由 core.text_table 在输出时补全"""
         ri_gan = self.result.get('ri_gan', '甲')
         if not isinstance(ri_gan, str):
             ri_gan = '甲'
             
-        # 传统大六壬六神排列规则
-        # 甲己起青龙，乙庚起朱雀，丙辛起勾陈，丁壬起螣蛇，戊癸起白虎
-        liu_shen_start = {
-            '甲': '青龙', '己': '青龙',
-            '乙': '朱雀', '庚': '朱雀', 
-            '丙': '勾陈', '辛': '勾陈',
-            '丁': '螣蛇', '壬': '螣蛇',
-            '戊': '白虎', '癸': '白虎'
-        }
-        
-        start_shen = liu_shen_start.get(ri_gan, '青龙')
+        start_shen = self.liu_shen_start.get(ri_gan, '青龙')
         start_index = self.liushen.index(start_shen)
         
         # 根据时辰计算六神位置
         shi_index = (self.hour + 1) // 2 % 12
         liu_shen_index = (start_index + shi_index) % 6
-        liu_shen = self.liushen[liu_shen_index]
         
-        # 添加六神的详细解释
         self.result['liu_shen'] = {
-            'shen': liu_shen,
-            'meaning': self._get_liu_shen_meaning(liu_shen),
-            'influence': self._get_liu_shen_influence(liu_shen),
-            'position': f'第{shi_index + 1}位',
+            'shen': self.liushen[liu_shen_index],
             'start_shen': start_shen,
-            'calculation_method': f'以{start_shen}为起始，按时辰推算'
+            'shi_index': shi_index
         }
         
-    def _get_liu_shen_meaning(self, liu_shen):
-        """获取六神含义"""
-        meanings = {
-            '青龙': '东方之神，属木，代表贵人相助、事业有成、升迁机会',
-            '朱雀': '南方之神，属火，代表文书、考试、学习、文化事业',
-            '勾陈': '中央之神，属土，代表土地、房产、稳定、积累',
-            '螣蛇': '南方之神，属火，代表口舌、是非、变动、突发事件',
-            '白虎': '西方之神，属金，代表刀兵、竞争、压力、挑战',
-            '玄武': '北方之神，属水，代表智慧、谋略、暗中行动、秘密'
-        }
-        return meanings.get(liu_shen, '未知')
-        
-    def _get_liu_shen_influence(self, liu_shen):
-        """获取六神影响"""
-        influences = {
-            '青龙': '旺相时贵人相助，衰弱时孤立无援',
-            '朱雀': '旺相时文书顺利，衰弱时文书受阻',
-            '勾陈': '旺相时稳定发展，衰弱时变动不安',
-            '螣蛇': '旺相时变动有利，衰弱时变动不利',
-            '白虎': '旺相时勇敢面对，衰弱时畏缩不前',
-            '玄武': '旺相时智慧开启，衰弱时智慧受阻'
-        }
-        return influences.get(liu_shen, '未知')
-        
     def _calculate_shi_er_shen(self):
-        """计算十二神将（专业版本）"""
-        ri_gan = self.result.get('ri_gan', '甲')
-        yue_jiang = self.result.get('yue_jiang', '寅')
-        
-        # 十二神将排列（专业版本）
-        shi_er_shen_detailed = {}
-        for i, shen in enumerate(self.shiershen):
-            shi_er_shen_detailed[shen] = {
-                'position': f'第{i+1}位',
-                'meaning': self._get_shi_er_shen_meaning(shen),
-                'influence': self._get_shi_er_shen_influence(shen),
-                'wuxing': self._get_shi_er_shen_wuxing(shen)
-            }
-        
-        self.result['shi_er_shen'] = shi_er_shen_detailed
-        
-    def _get_shi_er_shen_meaning(self, shen):
-        """获取十二神将含义"""
-        meanings = {
-            '贵人': '贵人相助，代表有贵人出现',
-            '螣蛇': '口舌是非，代表有口舌是非',
-            '朱雀': '文书考试，代表有文书考试',
-            '六合': '合作和谐，代表有合作和谐',
-            '勾陈': '土地房产，代表有土地房产',
-            '青龙': '贵人相助，代表有贵人相助',
-            '天空': '天空之神，代表有空中的事情',
-            '白虎': '刀兵竞争，代表有刀兵竞争',
-            '太常': '太常之神，代表有太常的事情',
-            '玄武': '智慧谋略，代表有智慧谋略',
-            '太阴': '太阴之神，代表有太阴的事情',
-            '天后': '天后之神，代表有天后的事情'
-        }
-        return meanings.get(shen, '未知')
-        
-    def _get_shi_er_shen_influence(self, shen):
-        """获取十二神将影响"""
-        influences = {
-            '贵人': '旺相时贵人相助，衰弱时孤立无援',
-            '螣蛇': '旺相时变动有利，衰弱时变动不利',
-            '朱雀': '旺相时文书顺利，衰弱时文书受阻',
-            '六合': '旺相时合作顺利，衰弱时合作受阻',
-            '勾陈': '旺相时稳定发展，衰弱时变动不安',
-            '青龙': '旺相时贵人相助，衰弱时孤立无援',
-            '天空': '旺相时空中有利，衰弱时空中有害',
-            '白虎': '旺相时勇敢面对，衰弱时畏缩不前',
-            '太常': '旺相时常事顺利，衰弱时常事受阻',
-            '玄武': '旺相时智慧开启，衰弱时智慧受阻',
-            '太阴': '旺相时阴事顺利，衰弱时阴事受阻',
-            '天后': '旺相时天后相助，衰弱时天后不助'
-        }
-        return influences.get(shen, '未知')
-        
-    def _get_shi_er_shen_wuxing(self, shen):
-        """获取十二神将五行属性"""
-        wuxing_map = {
-            '贵人': '土', '螣蛇': '火', '朱雀': '火', '六合': '木',
-            '勾陈': '土', '青龙': '木', '天空': '金', '白虎': '金',
-            '太常': '土', '玄武': '水', '太阴': '水', '天后': '水'
-        }
-        return wuxing_map.get(shen, '未知')
+        """计算十二神将（专业版本）：按位置排列的神将，释义由 core.text_table 在输出时补全"""
+        self.result['shi_er_shen'] = self.shiershen
         
     def _calculate_shen_sha(self):
         """计算神煞（专业版本）"""
@@ -1159,105 +1110,17 @@ class LiuRenPan:
     def _calculate_kong_wang(self):
         """计算空亡（专业版本）"""
         ri_gan = self.result.get('ri_gan', '甲')
-        
-        # 空亡计算
-        kong_wang_map = {
-            '甲': '戌亥', '乙': '申酉', '丙': '午未', '丁': '辰巳',
-            '戊': '寅卯', '己': '子丑', '庚': '戌亥', '辛': '申酉',
-            '壬': '午未', '癸': '辰巳'
-        }
-        
-        self.result['kong_wang'] = {
-            'kong_wang': kong_wang_map.get(ri_gan, '未知'),
-            'meaning': '空亡代表虚无、不实、无结果',
-            'influence': '空亡当值，事情容易落空或没有结果'
-        }
+        self.result['kong_wang'] = self.kong_wang_map.get(ri_gan, '未知')
         
     def _calculate_yi_ma(self):
         """计算驿马（专业版本）"""
         ri_gan = self.result.get('ri_gan', '甲')
-        
-        # 驿马计算
-        yi_ma_map = {
-            '甲': '寅', '乙': '卯', '丙': '巳', '丁': '午',
-            '戊': '巳', '己': '午', '庚': '申', '辛': '酉',
-            '壬': '亥', '癸': '子'
-        }
-        
-        self.result['yi_ma'] = {
-            'yi_ma': yi_ma_map.get(ri_gan, '未知'),
-            'meaning': '驿马代表变动、迁移、旅行',
-            'influence': '驿马当值，事情容易变动或迁移'
-        }
+        self.result['yi_ma'] = self.yi_ma_map.get(ri_gan, '未知')
         
     def _calculate_chang_sheng(self):
-        """计算长生十二神（专业版本）"""
+        """计算长生十二神（专业版本）：长生至养依次所在的地支"""
         ri_gan = self.result.get('ri_gan', '甲')
-        
-        # 长生十二神
-        chang_sheng_map = {
-            '甲': ['亥', '子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌'],
-            '乙': ['午', '巳', '辰', '卯', '寅', '丑', '子', '亥', '戌', '酉', '申', '未'],
-            '丙': ['寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥', '子', '丑'],
-            '丁': ['酉', '申', '未', '午', '巳', '辰', '卯', '寅', '丑', '子', '亥', '戌'],
-            '戊': ['寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥', '子', '丑'],
-            '己': ['酉', '申', '未', '午', '巳', '辰', '卯', '寅', '丑', '子', '亥', '戌'],
-            '庚': ['巳', '午', '未', '申', '酉', '戌', '亥', '子', '丑', '寅', '卯', '辰'],
-            '辛': ['子', '亥', '戌', '酉', '申', '未', '午', '巳', '辰', '卯', '寅', '丑'],
-            '壬': ['申', '酉', '戌', '亥', '子', '丑', '寅', '卯', '辰', '巳', '午', '未'],
-            '癸': ['卯', '寅', '丑', '子', '亥', '戌', '酉', '申', '未', '午', '巳', '辰']
-        }
-        
-        chang_sheng_list = chang_sheng_map.get(ri_gan, [])
-        
-        # 长生十二神详细解释
-        chang_sheng_names = ['长生', '沐浴', '冠带', '临官', '帝旺', '衰', '病', '死', '墓', '绝', '胎', '养']
-        
-        chang_sheng_detailed = {}
-        for i, (name, zhi) in enumerate(zip(chang_sheng_names, chang_sheng_list)):
-            chang_sheng_detailed[name] = {
-                'zhi': zhi,
-                'meaning': self._get_chang_sheng_meaning(name),
-                'influence': self._get_chang_sheng_influence(name)
-            }
-        
-        self.result['chang_sheng'] = chang_sheng_detailed
-        
-    def _get_chang_sheng_meaning(self, name):
-        """获取长生十二神含义"""
-        meanings = {
-            '长生': '万物开始生长，代表开始、新生',
-            '沐浴': '万物开始清洁，代表清洁、净化',
-            '冠带': '万物开始装饰，代表装饰、美化',
-            '临官': '万物开始当官，代表当官、掌权',
-            '帝旺': '万物达到极盛，代表极盛、顶峰',
-            '衰': '万物开始衰落，代表衰落、衰退',
-            '病': '万物开始生病，代表生病、疾病',
-            '死': '万物开始死亡，代表死亡、结束',
-            '墓': '万物开始埋葬，代表埋葬、隐藏',
-            '绝': '万物开始断绝，代表断绝、分离',
-            '胎': '万物开始孕育，代表孕育、孕育',
-            '养': '万物开始养育，代表养育、培养'
-        }
-        return meanings.get(name, '未知')
-        
-    def _get_chang_sheng_influence(self, name):
-        """获取长生十二神影响"""
-        influences = {
-            '长生': '旺相时开始顺利，衰弱时开始困难',
-            '沐浴': '旺相时清洁顺利，衰弱时清洁困难',
-            '冠带': '旺相时装饰顺利，衰弱时装饰困难',
-            '临官': '旺相时当官顺利，衰弱时当官困难',
-            '帝旺': '旺相时极盛顺利，衰弱时极盛困难',
-            '衰': '旺相时衰落顺利，衰弱时衰落困难',
-            '病': '旺相时生病顺利，衰弱时生病困难',
-            '死': '旺相时死亡顺利，衰弱时死亡困难',
-            '墓': '旺相时埋葬顺利，衰弱时埋葬困难',
-            '绝': '旺相时断绝顺利，衰弱时断绝困难',
-            '胎': '旺相时孕育顺利，衰弱时孕育困难',
-            '养': '旺相时养育顺利，衰弱时养育困难'
-        }
-        return influences.get(name, '未知')
+        self.result['chang_sheng'] = self.chang_sheng_map.get(ri_gan, ())
         
     def _get_gan_zhi(self, gan):
         """获取天干对应的地支"""
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+排盘流程各阶段耗时统计
+stage_timer(阶段名) 是开销 1 微秒左右的计时上下文，耗时计入进程级直方图
+liuren_stage_duration_seconds，由 /metrics 以 Prometheus 文本格式输出；
+collect_timings() 收集单个请求内各阶段的耗时，用于 Server-Timing 响应头。
+工作进程中执行的任务通过 timed_call 把耗时带回主进程汇总。
+
+LIUREN_METRICS=0 关闭计时；LIUREN_SERVER_TIMING=1 在 /calculate 响应中附加 Server-Timing。
+"""
+
+import os
+import threading
+import weakref
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter, time
+
+METRICS_ENABLED = os.environ.get('LIUREN_METRICS', '1') != '0'
+SERVER_TIMING_ENABLED = os.environ.get('LIUREN_SERVER_TIMING', '0') == '1'
+
+# 直方图桶上限（秒）：排盘各步骤在微秒级，完整请求在毫秒到秒级
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# 当前请求的耗时收集列表（未收集时为 None）
+_collector = ContextVar('liuren_stage_timings', default=None)
+
+
+class Histogram:
+    """固定分桶的耗时直方图
+
+    每个线程只写自己的分片（各桶计数 + 末尾的耗时合计），记录时无需加锁；输出时合并全部分片。
+    线程退出时其分片并入已退出线程的合计，每请求一个线程的服务器上分片数不随请求数增长
+    """
+
+    __slots__ = ('buckets', '_local', '_shards', '_retired', '_lock')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        # id(分片) -> 分片（列表按值比较，不能用 list.remove 摘除）
+        self._shards = {}
+        self._retired = self._empty_shard()
+        self._lock = threading.Lock()
+
+    def _empty_shard(self):
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def _new_shard(self):
+        shard = self._empty_shard()
+        # 线程退出时线程局部数据被释放，哨兵随之回收，触发分片合并
+        sentinel = _ShardSentinel()
+        weakref.finalize(sentinel, self._retire, shard)
+        self._local.sentinel = sentinel
+        self._local.shard = shard
+        with self._lock:
+            self._shards[id(shard)] = shard
+        return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            self._shards.pop(id(shard), None)
+            for i, value in enumerate(shard):
+                self._retired[i] += value
+
+    def observe(self, value):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self):
+        """返回 (累计桶计数列表, 总次数, 总耗时)"""
+        with self._lock:
+            shards = [list(self._retired)] + [list(shard) for shard in self._shards.values()]
+        size = len(self.buckets) + 1
+        counts = [sum(shard[i] for shard in shards) for i in range(size)]
+        total = sum(shard[-1] for shard in shards)
+        cumulative = []
+        running = 0
+        for value in counts[:-1]:
+            running += value
+            cumulative.append(running)
+        return cumulative, running + counts[-1], total
+
+
+class _ShardSentinel:
+    """与分片同存于线程局部数据中，只用于感知线程退出"""
+
+    __slots__ = ('__weakref__',)
+
+
+class StageTimer:
+    """计时上下文：退出时记录耗时（直接持有直方图，热路径上不再查表）"""
+
+    __slots__ = ('histogram', 'stage', 'start')
+
+    def __init__(self, histogram, stage):
+        self.histogram = histogram
+        self.stage = stage
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = perf_counter() - self.start
+        self.histogram.observe(elapsed)
+        timings = _collector.get()
+        if timings is not None:
+            timings.append((self.stage, elapsed))
+        return False
+
+
+class _NullTimer:
+    """关闭计时时使用的空上下文"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class StageMetrics:
+    """各阶段的耗时直方图"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.started_at = time()
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, stage, seconds):
+        self.histogram(stage).observe(seconds)
+        timings = _collector.get()
+        if timings is not None:
+            timings.append((stage, seconds))
+
+    def timer(self, stage):
+        return StageTimer(self.histogram(stage), stage)
+
+    def render(self):
+        """Prometheus 文本格式"""
+        lines = [
+            '# HELP liuren_stage_duration_seconds Time spent in each stage of the calculate pipeline.',
+            '# TYPE liuren_stage_duration_seconds histogram'
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        for stage, histogram in histograms:
+            cumulative, count, total = histogram.snapshot()
+            for bound, value in zip(self.buckets, cumulative):
+                lines.append(f'liuren_stage_duration_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {value}')
+            lines.append(f'liuren_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'liuren_stage_duration_seconds_sum{{stage="{stage}"}} {total:.9f}')
+            lines.append(f'liuren_stage_duration_seconds_count{{stage="{stage}"}} {count}')
+        lines.extend([
+            '# HELP liuren_process_start_time_seconds Start time of the process since unix epoch in seconds.',
+            '# TYPE liuren_process_start_time_seconds gauge',
+            f'liuren_process_start_time_seconds {self.started_at:.3f}'
+        ])
+        return '\n'.join(lines) + '\n'
+
+
+_stage_metrics = StageMetrics()
+
+
+def get_stage_metrics():
+    """进程级共享的阶段耗时统计"""
+    return _stage_metrics
+
+
+def stage_timer(stage):
+    """计时上下文：with stage_timer('pan'): ..."""
+    if not METRICS_ENABLED:
+        return _NULL_TIMER
+    return StageTimer(_stage_metrics.histogram(stage), stage)
+
+
+class collect_timings:
+    """收集 with 块内各阶段的 (阶段名, 秒数)"""
+
+    __slots__ = ('timings', '_token')
+
+    def __init__(self):
+        self.timings = []
+        self._token = None
+
+    def __enter__(self):
+        self._token = _collector.set(self.timings)
+        return self.timings
+
+    def __exit__(self, exc_type, exc, tb):
+        _collector.reset(self._token)
+        return False
+
+
+def timed_call(func, *args):
+    """执行 func(*args) 并带回各阶段耗时（在工作进程中调用）"""
+    with collect_timings() as timings:
+        result = func(*args)
+    return result, timings
+
+
+def observe_timings(timings):
+    """把工作进程带回的耗时计入本进程的统计和当前请求"""
+    if not METRICS_ENABLED:
+        return
+    for stage, seconds in timings:
+        _stage_metrics.observe(stage, seconds)
+
+
+def server_timing_header(timings):
+    """Server-Timing 响应头的值（毫秒），同名阶段合并"""
+    totals = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ', '.join(f'{stage};dur={seconds * 1000:.3f}' for stage, seconds in totals.items())
+
+
+def render_metrics():
+    """/metrics 的响应内容"""
+    return _stage_metrics.render()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预计算排盘表
+排盘中与具体日期无关的部分（时干支、天地盘、四课、三传、六亲、六神、
+十二神将、神煞、贵人、空亡、驿马、长生）只由 日干支 × 时辰 × 月将 决定，
+共 60 × 12 × 12 = 8640 种组合。构建阶段一次性算好写入版本化的表文件，
+运行时 calculate() 只需日历换算加一次查表。表中保存结构化排盘（释义文本见 core.text_table）。
+条目及其子结构为只读结构（core.frozen），查表结果直接放入各次排盘，调用方不能原地修改。
+
+构建：python -m core.pan_table build
+校验：python -m pytest tests/test_pan_table.py（抽样与实时计算比对）
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+
+from core.frozen import freeze
+
+PAN_TABLE_VERSION = 3
+PAN_TABLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'data', 'corpus', 'pan_table.pickle')
+
+TIAN_GAN = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
+DI_ZHI = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
+
+# 表中保存的字段（按 calculate() 的输出顺序）
+PAN_TABLE_FIELDS = [
+    'shi_gan', 'shi_zhi', 'shi_gan_zhi', 'tian_pan', 'di_pan', 'si_ke', 'san_chuan',
+    'liu_qin', 'liu_shen', 'shi_er_shen', 'shen_sha', 'gui_ren', 'kong_wang', 'yi_ma',
+    'chang_sheng'
+]
+
+
+def source_fingerprint():
+    """排盘算法源码的指纹，源码改动后旧表自动失效"""
+    source_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'liu_ren.py')
+    with open(source_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def iter_combinations():
+    """遍历 (日干, 日支, 时辰序号, 月将) 的全部组合"""
+    for cycle in range(60):
+        ri_gan = TIAN_GAN[cycle % 10]
+        ri_zhi = DI_ZHI[cycle % 12]
+        for shi_index in range(12):
+            for yue_jiang in DI_ZHI:
+                yield ri_gan, ri_zhi, shi_index, yue_jiang
+
+
+def compute_entry(pan, ri_gan, ri_zhi, yue_jiang):
+    """用排盘对象计算单个组合的结构部分"""
+    pan.result = {'yue_jiang': yue_jiang, 'ri_gan': ri_gan, 'ri_zhi': ri_zhi}
+    pan._calculate_pan_structure()
+    return {field: pan.result[field] for field in PAN_TABLE_FIELDS}
+
+
+def _share(value, pool):
+    """内容相同的子结构共享同一个（只读）对象，缩小表文件与内存"""
+    key = json.dumps(value, ensure_ascii=False)
+    shared = pool.get(key)
+    if shared is None:
+        shared = pool[key] = freeze(value)
+    return shared
+
+
+def build_entries():
+    """计算全部组合"""
+    from core.liu_ren import LiuRenPan
+
+    # 每个时辰一个排盘对象（时辰只通过 self.hour 参与计算）
+    pans = [LiuRenPan(2000, 1, 1, shi_index * 2, 0) for shi_index in range(12)]
+    pool = {}
+    entries = {}
+    for ri_gan, ri_zhi, shi_index, yue_jiang in iter_combinations():
+        entry = compute_entry(pans[shi_index], ri_gan, ri_zhi, yue_jiang)
+        entries[(ri_gan, ri_zhi, shi_index, yue_jiang)] = {
+            field: _share(value, pool) for field, value in entry.items()
+        }
+    return entries
+
+
+class PanTable:
+    """排盘表：(日干, 日支, 时辰序号, 月将) -> 结构部分"""
+
+    def __init__(self, entries, version=PAN_TABLE_VERSION, fingerprint=None):
+        self.entries = entries
+        self.version = version
+        self.fingerprint = fingerprint
+
+    def lookup(self, ri_gan, ri_zhi, shi_index, yue_jiang):
+        """查表，未收录的组合返回 None"""
+        return self.entries.get((ri_gan, ri_zhi, shi_index, yue_jiang))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def save(self, path=PAN_TABLE_PATH):
+        """写入表文件（先写临时文件再原子替换）"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.tmp{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({
+                'version': self.version,
+                'fingerprint': self.fingerprint,
+                'entries': self.entries
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=PAN_TABLE_PATH):
+        """读取表文件，版本或源码指纹不符时抛出 ValueError"""
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        if data.get('version') != PAN_TABLE_VERSION:
+            raise ValueError(f'排盘表版本不匹配：{data.get("version")}')
+        if data.get('fingerprint') != source_fingerprint():
+            raise ValueError('排盘算法已更新，排盘表已过期')
+        return cls(data['entries'], data['version'], data['fingerprint'])
+
+    @classmethod
+    def build(cls):
+        """重新计算全部组合"""
+        return cls(build_entries(), PAN_TABLE_VERSION, source_fingerprint())
+
+
+def build_pan_table(path=PAN_TABLE_PATH):
+    """构建并写入排盘表"""
+    print(f"正在构建排盘表 {os.path.basename(path)} ...")
+    start = time.perf_counter()
+    table = PanTable.build()
+    table.save(path)
+    print(f"✅ 已写入 {len(table):,} 种组合到 {path}，耗时 {time.perf_counter() - start:.2f} 秒")
+    return table
+
+
+def load_pan_table(path=PAN_TABLE_PATH):
+    """读取排盘表，文件不存在或已过期时先构建"""
+    if os.path.exists(path):
+        try:
+            return PanTable.load(path)
+        except (ValueError, KeyError, EOFError, pickle.UnpicklingError) as e:
+            print(f"⚠️ 排盘表无效，重新构建：{e}")
+
+    try:
+        return build_pan_table(path)
+    except OSError as e:
+        # 目录不可写时只在内存中使用
+        print(f"⚠️ 排盘表无法写入，仅在本进程内使用：{e}")
+        return PanTable.build()
+
+
+_pan_table = None
+_table_lock = threading.Lock()
+
+
+def get_pan_table():
+    """获取进程级共享的排盘表（首次调用时加载）"""
+    global _pan_table
+
+    table = _pan_table
+    if table is not None:
+        return table
+
+    with _table_lock:
+        if _pan_table is None:
+            _pan_table = load_pan_table()
+        return _pan_table
+
+
+def _reset_after_fork():
+    """fork 时其他线程可能正持有加载锁，子进程里排盘表未加载时重建锁"""
+    global _table_lock
+    if _pan_table is None:
+        _table_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def main(argv=None):
+    """命令行：build 构建排盘表"""
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'build'
+
+    if command == 'build':
+        build_pan_table()
+        return 0
+
+    print("用法：python -m core.pan_table [build]")
+    return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按请求开启的性能剖析
+/calculate 请求加上 ?profile=1（或请求头 X-Profile）并携带 X-Admin-Token 时，
+该请求在剖析器下执行，结果保存到剖析目录，响应头 X-Profile-Id 给出编号，
+之后用 GET /api/profiles/<编号>（同样需要令牌）取回：
+
+    profile=1 / cprofile  cProfile 的 pstats 文件；?format=text 返回按累计耗时排序的摘要
+    profile=sample        统计采样得到的折叠栈文本，flamegraph.pl、speedscope 可直接读取
+
+再加 ?nocache=1 时绕过结果缓存和预计算表，请求完整执行三传取法、事件分类和相似案例查找；
+单次请求只有几毫秒，采样前可用 ?repeat=N 在剖析器下重复计算 N 次（最多 MAX_REPEAT 次）。
+
+    LIUREN_ADMIN_TOKEN       管理员令牌，未设置时剖析功能和 ASGI 的 /api/server/stats 关闭
+    LIUREN_PROFILE_DIR       剖析结果目录，默认 data/profiles
+    LIUREN_PROFILE_INTERVAL  采样间隔秒数，默认 0.001
+    LIUREN_PROFILE_KEEP      最多保留的剖析结果个数，默认 100
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+
+ADMIN_TOKEN = os.environ.get('LIUREN_ADMIN_TOKEN', '')
+PROFILE_DIR = os.environ.get('LIUREN_PROFILE_DIR') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'profiles')
+SAMPLE_INTERVAL = float(os.environ.get('LIUREN_PROFILE_INTERVAL', 0.001))
+MAX_PROFILES = int(os.environ.get('LIUREN_PROFILE_KEEP', 100))
+MAX_REPEAT = 200
+
+# 剖析方式 -> 结果文件扩展名
+PROFILE_FORMATS = {'cprofile': 'prof', 'sample': 'collapsed'}
+_PROFILE_ID = re.compile(r'^\d{8}-\d{6}-[0-9a-f]{8}$')
+
+
+def is_authorized(token):
+    """令牌与 LIUREN_ADMIN_TOKEN 一致（未配置令牌时一律拒绝）"""
+    return bool(ADMIN_TOKEN) and bool(token) and hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+def repeat_count(value):
+    """?repeat= 参数，限制在 1 到 MAX_REPEAT 之间"""
+    try:
+        return max(1, min(int(value), MAX_REPEAT))
+    except (TypeError, ValueError):
+        return 1
+
+
+def profile_mode(value):
+    """请求参数 -> 'cprofile'、'sample' 或 None（不剖析）"""
+    value = (value or '').strip().lower()
+    if value in ('1', 'true', 'cprofile'):
+        return 'cprofile'
+    if value == 'sample':
+        return 'sample'
+    return None
+
+
+# 采样期间缩短解释器的线程切换间隔（默认 5 毫秒），否则采样线程拿不到 GIL
+_switch_lock = threading.Lock()
+_active_samplers = 0
+_saved_switch_interval = None
+
+
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """统计采样剖析器：后台线程按固定间隔读取目标线程的调用栈，按栈计数"""
+
+    def __init__(self, thread_id=None, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        global _active_samplers, _saved_switch_interval
+        with _switch_lock:
+            if _active_samplers == 0:
+                _saved_switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(_saved_switch_interval, self.interval))
+            _active_samplers += 1
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        global _active_samplers
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            with _switch_lock:
+                _active_samplers -= 1
+                if _active_samplers == 0:
+                    sys.setswitchinterval(_saved_switch_interval)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if labels:
+                self.stacks[';'.join(reversed(labels))] += 1
+                self.samples += 1
+
+    def collapsed(self):
+        """折叠栈格式：每行 "根;...;叶 次数" """
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def _profile_path(profile_id, mode):
+    return os.path.join(PROFILE_DIR, f'{profile_id}.{PROFILE_FORMATS[mode]}')
+
+
+def _prune_profiles():
+    """只保留最近的 MAX_PROFILES 个结果"""
+    files = sorted(name for name in os.listdir(PROFILE_DIR) if _PROFILE_ID.match(name.split('.')[0]))
+    for name in files[:max(0, len(files) - MAX_PROFILES)]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        except OSError:
+            pass
+
+
+def run_profiled(mode, func, *args, repeat=1):
+    """在剖析器下执行 func(*args) repeat 次，保存剖析结果，返回 (最后一次的结果, 剖析编号)"""
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(4)}"
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = _profile_path(profile_id, mode)
+
+    def run():
+        for _ in range(repeat):
+            result = func(*args)
+        return result
+
+    if mode == 'sample':
+        with StackSampler() as sampler:
+            result = run()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(sampler.collapsed())
+    else:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(run)
+        profiler.dump_stats(path)
+
+    _prune_profiles()
+    return result, profile_id
+
+
+def load_profile(profile_id, as_text=False):
+    """读取剖析结果，返回 (mimetype, 内容)；编号无效或不存在时返回 None"""
+    if not _PROFILE_ID.match(profile_id):
+        return None
+    for mode in PROFILE_FORMATS:
+        path = _profile_path(profile_id, mode)
+        if not os.path.exists(path):
+            continue
+        if mode == 'sample':
+            with open(path, 'rb') as f:
+                return 'text/plain; charset=utf-8', f.read()
+        if as_text:
+            output = io.StringIO()
+            pstats.Stats(path, stream=output).sort_stats('cumulative').print_stats(60)
+            return 'text/plain; charset=utf-8', output.getvalue().encode('utf-8')
+        with open(path, 'rb') as f:
+            return 'application/octet-stream', f.read()
+    return None
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常见问题预计算表
+把出现频率最高的 N 个问题（按预处理后的文本去重计数）的事件分析结果预先算好，
+EventAnalyzer 启动时载入，这些问题无需分词和分类即可返回。
+问题来源为每行一个问题的文本文件（可以是访问日志导出，重复行即频次），
+默认使用 data/common_questions.txt（首页快捷问题等）。
+
+构建：python -m core.question_table build [问题文件] [--top N]
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+import time
+from collections import Counter
+
+from core.frozen import freeze
+
+QUESTION_TABLE_VERSION = 1
+ASSETS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUESTION_TABLE_PATH = os.path.join(ASSETS_DIR, 'data', 'corpus', 'question_table.pickle')
+COMMON_QUESTIONS_PATH = os.path.join(ASSETS_DIR, 'data', 'common_questions.txt')
+DEFAULT_TOP_N = 1000
+
+
+def source_fingerprint():
+    """事件分析源码的指纹，源码改动后旧表自动失效"""
+    digest = hashlib.sha256()
+    core_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in ('event_analyzer.py', 'keyword_matcher.py'):
+        with open(os.path.join(core_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def read_questions(path=COMMON_QUESTIONS_PATH):
+    """读取问题文件，忽略空行和 # 开头的注释"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def build_question_table(questions, top_n=DEFAULT_TOP_N, path=QUESTION_TABLE_PATH):
+    """统计最常见的问题，计算分析结果并写入表文件"""
+    from core.event_analyzer import EventAnalyzer
+
+    start = time.perf_counter()
+    analyzer = EventAnalyzer()
+    # 预计算结果必须来自 jieba 分词
+    analyzer.segmenter.wait()
+    if not analyzer.segmenter.ready:
+        raise RuntimeError('jieba 不可用，无法构建常见问题表')
+
+    counts = Counter(analyzer._preprocess_text(question) for question in questions)
+    entries = {}
+    for processed_text, _ in counts.most_common(top_n):
+        if processed_text:
+            entries[processed_text] = analyzer.compute_event_analysis(processed_text)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({
+            'version': QUESTION_TABLE_VERSION,
+            'fingerprint': source_fingerprint(),
+            'entries': entries
+        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    print(f"✅ 已写入 {len(entries):,} 个常见问题到 {path}，耗时 {time.perf_counter() - start:.2f} 秒")
+    return entries
+
+
+def load_question_table(path=QUESTION_TABLE_PATH):
+    """读取常见问题表；文件不存在或已过期时返回空表（该表是可选的）"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        if data.get('version') != QUESTION_TABLE_VERSION:
+            raise ValueError(f'常见问题表版本不匹配：{data.get("version")}')
+        if data.get('fingerprint') != source_fingerprint():
+            raise ValueError('事件分析已更新，常见问题表已过期')
+        # 各请求共用表中的结果，载入后转为只读结构
+        return {text: freeze(entry) for text, entry in data['entries'].items()}
+    except (ValueError, KeyError, EOFError, pickle.UnpicklingError) as e:
+        print(f"⚠️ 常见问题表无效，已忽略（python -m core.question_table build 重新构建）：{e}")
+        return {}
+
+
+def main(argv=None):
+    """命令行：build 构建常见问题表"""
+    parser = argparse.ArgumentParser(description='常见问题预计算表')
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('questions', nargs='?', default=COMMON_QUESTIONS_PATH, help='每行一个问题的文本文件')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP_N, help='收录出现次数最多的前 N 个问题')
+    args = parser.parse_args(argv)
+
+    build_question_table(read_questions(args.questions), args.top)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析结果缓存
+进程级共享、容量有限的 LRU/TTL 缓存，带命中、未命中、淘汰计数。
+后端可选内存或本地 SQLite 文件（跨进程、跨重启复用），通过环境变量配置：
+
+    LIUREN_CACHE_BACKEND  memory（默认）/ sqlite / none
+    LIUREN_CACHE_SIZE     最多缓存条数，默认 1024
+    LIUREN_CACHE_TTL      过期秒数，0 表示不过期，默认 0
+    LIUREN_CACHE_PATH     SQLite 文件路径，默认 data/cache/analysis_cache.sqlite3
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextvars import ContextVar
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'data', 'cache', 'analysis_cache.sqlite3')
+
+# 全部缓存实例，fork 后在子进程中重建各自的锁
+_caches = weakref.WeakSet()
+
+
+class ResultCache:
+    """缓存基类：统一的计数与统计接口"""
+
+    backend = 'none'
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, ttl=0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def _is_expired(self, created):
+        return bool(self.ttl) and time.time() - created > self.ttl
+
+    def get(self, key, default=None):
+        """读取缓存，未命中返回 default"""
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value):
+        """写入缓存"""
+
+    def clear(self):
+        """清空缓存"""
+
+    def __len__(self):
+        return 0
+
+    def stats(self):
+        """缓存统计信息"""
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend,
+            'size': len(self),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class MemoryResultCache(ResultCache):
+    """内存 LRU 缓存"""
+
+    backend = 'memory'
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, ttl=0):
+        super().__init__(maxsize, ttl)
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            created, value = entry
+            if self._is_expired(created):
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteResultCache(ResultCache):
+    """本地 SQLite 文件缓存，按最近访问时间淘汰"""
+
+    backend = 'sqlite'
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, maxsize=DEFAULT_CACHE_SIZE, ttl=0):
+        super().__init__(maxsize, ttl)
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = None
+        self._conn_pid = None
+        # fork 前打开的连接：子进程不能使用，也不能关闭（关闭会影响父进程的锁和 WAL），只保留引用
+        self._inherited = []
+        self._connection()
+
+    def _connection(self):
+        """当前进程的连接；工作进程 fork 后首次使用时重新打开，不沿用父进程的连接"""
+        if self._conn_pid != os.getpid():
+            if self._conn is not None:
+                self._inherited.append(self._conn)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def get(self, key, default=None):
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute('SELECT value, created FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+
+            value, created = row
+            if self._is_expired(created):
+                conn.execute('DELETE FROM results WHERE key = ?', (key,))
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            conn.execute('UPDATE results SET accessed = ? WHERE key = ?', (time.time(), key))
+            self.hits += 1
+        return pickle.loads(value)
+
+    def set(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)', (key, blob, now, now))
+            overflow = conn.execute('SELECT COUNT(*) FROM results').fetchone()[0] - self.maxsize
+            if overflow > 0:
+                conn.execute(
+                    'DELETE FROM results WHERE key IN '
+                    '(SELECT key FROM results ORDER BY accessed LIMIT ?)', (overflow,))
+                self.evictions += overflow
+
+    def clear(self):
+        with self._lock:
+            self._connection().execute('DELETE FROM results')
+
+    def __len__(self):
+        with self._lock:
+            return self._connection().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+
+def create_result_cache(backend=None, maxsize=None, ttl=None, path=None):
+    """按参数或环境变量创建缓存"""
+    backend = (backend or os.environ.get('LIUREN_CACHE_BACKEND', 'memory')).lower()
+    maxsize = maxsize if maxsize is not None else int(os.environ.get('LIUREN_CACHE_SIZE', DEFAULT_CACHE_SIZE))
+    ttl = ttl if ttl is not None else float(os.environ.get('LIUREN_CACHE_TTL', 0))
+
+    if backend == 'sqlite':
+        path = path or os.environ.get('LIUREN_CACHE_PATH', DEFAULT_CACHE_PATH)
+        return SQLiteResultCache(path, maxsize, ttl)
+    if backend == 'memory':
+        return MemoryResultCache(maxsize, ttl)
+    if backend == 'none':
+        return ResultCache(maxsize, ttl)
+    raise ValueError(f'未知的缓存后端：{backend}')
+
+
+# 为真时跳过结果缓存和预计算表，请求完整计算（性能剖析时使用）
+_bypass_caches = ContextVar('liuren_bypass_caches', default=False)
+
+
+def caches_bypassed():
+    """当前请求是否绕过缓存"""
+    return _bypass_caches.get()
+
+
+class bypass_caches:
+    """with 块内绕过结果缓存和预计算表（结果仍会写入缓存）"""
+
+    __slots__ = ('enabled', '_token')
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._token = None
+
+    def __enter__(self):
+        self._token = _bypass_caches.set(self.enabled)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _bypass_caches.reset(self._token)
+        return False
+
+
+_analysis_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    """获取进程级共享的分析结果缓存"""
+    global _analysis_cache
+
+    cache = _analysis_cache
+    if cache is not None:
+        return cache
+
+    with _cache_lock:
+        if _analysis_cache is None:
+            _analysis_cache = create_result_cache()
+        return _analysis_cache
+
+
+def _reset_after_fork():
+    """fork 时其他线程可能正持有缓存的锁，子进程里重建（SQLite 连接在首次使用时重新打开）"""
+    global _cache_lock
+    _cache_lock = threading.Lock()
+    for cache in list(_caches):
+        cache._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
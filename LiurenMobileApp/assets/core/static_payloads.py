@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+静态 JSON 响应
+/theory 与 /api/classics/* 的内容运行期间不会变化，启动时一次性序列化并 gzip 压缩，
+按强 ETag 支持 If-None-Match 条件请求（304），重复请求几乎不消耗带宽和 CPU。
+Flask 路由与 ASGI 入口共用同一份响应。
+"""
+
+import gzip
+import hashlib
+
+# 内容只在发布新版本时变化，过期后凭 ETag 重新验证
+CACHE_CONTROL = 'public, max-age=3600'
+
+
+class StaticPayload:
+    """一份预先序列化的 JSON 响应：原文、gzip 压缩版本及各自的强 ETag"""
+
+    __slots__ = ('body', 'gzip_body', 'etag', 'gzip_etag')
+
+    def __init__(self, body):
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # 不同内容编码的强 ETag 必须不同
+        self.gzip_etag = f'"{digest}-gz"'
+
+    def respond(self, if_none_match='', accept_encoding=''):
+        """按条件请求与内容协商返回 (状态码, 响应头列表, 响应体)"""
+        use_gzip = accepts_gzip(accept_encoding)
+        etag = self.gzip_etag if use_gzip else self.etag
+        headers = [
+            ('ETag', etag),
+            ('Cache-Control', CACHE_CONTROL),
+            ('Vary', 'Accept-Encoding')
+        ]
+        if etag_matches(if_none_match, (self.etag, self.gzip_etag)):
+            return 304, headers, b''
+
+        headers.append(('Content-Type', 'application/json'))
+        if use_gzip:
+            headers.append(('Content-Encoding', 'gzip'))
+            return 200, headers, self.gzip_body
+        return 200, headers, self.body
+
+
+def etag_matches(if_none_match, etags):
+    """If-None-Match 使用弱比较：忽略 W/ 前缀，* 匹配任意内容"""
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate in etags:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding):
+    """Accept-Encoding 中 gzip（或 *）的 q 值大于 0"""
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip() not in ('gzip', '*'):
+            continue
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+class StaticPayloads:
+    """/theory 与 /api/classics/* 的全部预生成响应"""
+
+    def __init__(self, classics_db, modern_theory, dumps):
+        self.dumps = dumps
+        self.theory = self._payload(modern_theory.get_all_theories())
+        self.classics_all = self._payload(classics_db.get_all_theories())
+        self.classics = {
+            category: self._payload(classics_db.get_all_content(category))
+            for category in classics_db.classics_data
+        }
+        # 未收录的类别 get_all_content 返回空字典
+        self.classics_missing = self._payload({})
+
+    def _payload(self, obj):
+        # 与 jsonify 的紧凑输出一致
+        return StaticPayload(f'{self.dumps(obj, separators=(",", ":"))}\n'.encode('utf-8'))
+
+    def get_classics(self, category):
+        """指定类别的古籍内容响应"""
+        if category == 'all':
+            return self.classics_all
+        return self.classics.get(category, self.classics_missing)
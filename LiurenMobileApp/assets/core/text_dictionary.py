@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+紧凑二进制响应的文本字典
+排盘结果中的释义、影响、天地盘位置名等静态文本（以及各层字段名）在每次响应里重复出现。
+客户端在 Accept 中声明 application/cbor 时，/calculate 以 CBOR 返回，静态文本换成
+字典中的整数编号，响应头 X-Text-Dictionary 给出字典版本；客户端按版本从
+GET /api/text-dictionary 下载一次字典并缓存，版本变化时重新下载。
+
+字典分两部分：
+    strings  排盘表、现代理论和事件分类中出现的全部字符串，按出现次数从多到少编号
+    values   排盘表中反复出现的整块字段值（长生、六亲、十二神将、三传等），按字段名查找
+版本是字典内容的摘要，同一份数据在任何进程中得到相同的字典。
+"""
+
+import hashlib
+import json
+from collections import Counter, defaultdict
+
+from core import cbor
+
+CBOR_MIMETYPE = 'application/cbor'
+
+# 平均每个取值至少被这么多条排盘表记录共用的字段，整块放入字典
+MIN_VALUE_REUSE = 8
+
+
+def collect_strings(sources):
+    """统计各数据源中（含 dict 键）每个字符串出现的次数，共享的子对象只统计一次"""
+    counts = Counter()
+    seen = set()
+    stack = list(sources)
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            counts[value] += 1
+        elif isinstance(value, (dict, list, tuple)):
+            if id(value) in seen:
+                continue
+            seen.add(id(value))
+            if isinstance(value, dict):
+                counts.update(key for key in value if isinstance(key, str))
+                stack.extend(value.values())
+            else:
+                stack.extend(value)
+    return counts
+
+
+def collect_values(records, min_reuse=MIN_VALUE_REUSE):
+    """从记录中找出取值反复出现的字段，返回 {字段名: [取值, ...]}"""
+    occurrences = Counter()
+    distinct = defaultdict(dict)
+    canonical_by_id = {}
+    for record in records:
+        for field, value in record.items():
+            if not isinstance(value, (dict, list, tuple)):
+                continue
+            # 排盘表中共享的子对象只需序列化一次
+            key = canonical_by_id.get(id(value))
+            if key is None:
+                key = canonical_by_id[id(value)] = cbor.canonical(value)
+            occurrences[field] += 1
+            distinct[field].setdefault(key, value)
+    return {
+        field: [values[key] for key in sorted(values)]
+        for field, values in sorted(distinct.items())
+        if occurrences[field] >= len(values) * min_reuse
+    }
+
+
+class TextDictionary:
+    """版本化的静态文本字典：编号 <-> 字符串 / 整块字段值"""
+
+    __slots__ = ('strings', 'values', 'string_ids', 'value_ids', 'version')
+
+    def __init__(self, strings, values=None):
+        self.strings = list(strings)
+        self.string_ids = {text: index for index, text in enumerate(self.strings)}
+        # values 按字段分组，编号在全部字段间连续
+        self.values = []
+        self.value_ids = {}
+        for field, field_values in (values or {}).items():
+            refs = self.value_ids[field] = {}
+            for value in field_values:
+                refs[cbor.canonical(value)] = len(self.values)
+                self.values.append(value)
+        content = json.dumps([self.strings, values or {}], ensure_ascii=False, sort_keys=True)
+        self.version = hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def build(cls, sources, value_records=()):
+        """sources 提供字符串，value_records（排盘表记录）提供整块字段值"""
+        values = collect_values(value_records)
+        counts = collect_strings([*sources, *value_records])
+        return cls(sorted(counts, key=lambda text: (-counts[text], text)), values)
+
+    def __len__(self):
+        return len(self.strings) + len(self.values)
+
+    def encode(self, payload):
+        """编码为使用本字典的 CBOR"""
+        return cbor.dumps(payload, self.string_ids, self.value_ids)
+
+    def decode(self, data):
+        return cbor.loads(data, self.strings, self.values)
+
+    def to_json(self):
+        """/api/text-dictionary 的响应内容"""
+        return {
+            'version': self.version,
+            'string_tag': cbor.TEXT_REF_TAG,
+            'value_tag': cbor.VALUE_REF_TAG,
+            'strings': self.strings,
+            'values': self.values
+        }
+
+
+def accepts_cbor(accept):
+    """Accept 中 application/cbor 的 q 值大于 0"""
+    for part in accept.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip() != CBOR_MIMETYPE:
+            continue
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
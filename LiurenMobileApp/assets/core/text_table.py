@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+排盘释义文本表
+六亲、六神、十二神将、长生十二神、空亡、驿马的含义与影响是固定文本，集中放在模块级的表中，
+字符串经 sys.intern 驻留，整个进程只有一份。排盘引擎只产出结构（干支、序号、起始神将），
+render_pan() 在输出排盘时再补全释义，得到与原先相同的完整格式。
+
+渲染结果按结构缓存并在各排盘间共享（六亲、长生各 10 种，六神 60 种），缓存的是只读结构（core.frozen）。
+"""
+
+import sys
+
+from core.frozen import freeze
+
+UNKNOWN = '未知'
+
+
+def _intern(value):
+    """递归驻留表中的字符串"""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, tuple):
+        return tuple(_intern(item) for item in value)
+    if isinstance(value, dict):
+        return {_intern(key): _intern(item) for key, item in value.items()}
+    return value
+
+
+# 六亲：关系 -> (含义, 影响)
+LIU_QIN_TEXT = _intern({
+    '比劫': ('同辈、朋友、竞争关系，代表助力或阻力', '助力时有利合作，阻力时易有竞争'),
+    '食神': ('智慧、才华、表达能力，代表创造力和智慧', '旺相时智慧开启，衰弱时思维混乱'),
+    '偏财': ('意外之财、投资机会，代表偏门收入', '旺相时财运亨通，衰弱时破财损财'),
+    '正财': ('正当收入、稳定财富，代表正当收入', '旺相时收入稳定，衰弱时收入减少'),
+    '七杀': ('挑战、压力、竞争，代表困难和挑战', '旺相时勇敢面对，衰弱时畏缩不前'),
+    '正官': ('权威、地位、名誉，代表官方和权威', '旺相时地位提升，衰弱时地位下降'),
+    '偏印': ('学习、知识、文化，代表学习和知识', '旺相时学习进步，衰弱时学习困难'),
+    '正印': ('贵人、长辈、保护，代表贵人和保护', '旺相时贵人相助，衰弱时孤立无援')
+})
+
+# 六神：神 -> (含义, 影响)
+LIU_SHEN_TEXT = _intern({
+    '青龙': ('东方之神，属木，代表贵人相助、事业有成、升迁机会', '旺相时贵人相助，衰弱时孤立无援'),
+    '朱雀': ('南方之神，属火，代表文书、考试、学习、文化事业', '旺相时文书顺利，衰弱时文书受阻'),
+    '勾陈': ('中央之神，属土，代表土地、房产、稳定、积累', '旺相时稳定发展，衰弱时变动不安'),
+    '螣蛇': ('南方之神，属火，代表口舌、是非、变动、突发事件', '旺相时变动有利，衰弱时变动不利'),
+    '白虎': ('西方之神，属金，代表刀兵、竞争、压力、挑战', '旺相时勇敢面对，衰弱时畏缩不前'),
+    '玄武': ('北方之神，属水，代表智慧、谋略、暗中行动、秘密', '旺相时智慧开启，衰弱时智慧受阻')
+})
+
+# 十二神将：神将 -> (含义, 影响, 五行)
+SHI_ER_SHEN_TEXT = _intern({
+    '贵人': ('贵人相助，代表有贵人出现', '旺相时贵人相助，衰弱时孤立无援', '土'),
+    '螣蛇': ('口舌是非，代表有口舌是非', '旺相时变动有利，衰弱时变动不利', '火'),
+    '朱雀': ('文书考试，代表有文书考试', '旺相时文书顺利，衰弱时文书受阻', '火'),
+    '六合': ('合作和谐，代表有合作和谐', '旺相时合作顺利，衰弱时合作受阻', '木'),
+    '勾陈': ('土地房产，代表有土地房产', '旺相时稳定发展，衰弱时变动不安', '土'),
+    '青龙': ('贵人相助，代表有贵人相助', '旺相时贵人相助，衰弱时孤立无援', '木'),
+    '天空': ('天空之神，代表有空中的事情', '旺相时空中有利，衰弱时空中有害', '金'),
+    '白虎': ('刀兵竞争，代表有刀兵竞争', '旺相时勇敢面对，衰弱时畏缩不前', '金'),
+    '太常': ('太常之神，代表有太常的事情', '旺相时常事顺利，衰弱时常事受阻', '土'),
+    '玄武': ('智慧谋略，代表有智慧谋略', '旺相时智慧开启，衰弱时智慧受阻', '水'),
+    '太阴': ('太阴之神，代表有太阴的事情', '旺相时阴事顺利，衰弱时阴事受阻', '水'),
+    '天后': ('天后之神，代表有天后的事情', '旺相时天后相助，衰弱时天后不助', '水')
+})
+
+# 长生十二神（顺序即排盘中地支列表的顺序）：名称 -> (含义, 影响)
+CHANG_SHENG_NAMES = _intern(('长生', '沐浴', '冠带', '临官', '帝旺', '衰', '病', '死', '墓', '绝', '胎', '养'))
+CHANG_SHENG_TEXT = _intern({
+    '长生': ('万物开始生长，代表开始、新生', '旺相时开始顺利，衰弱时开始困难'),
+    '沐浴': ('万物开始清洁，代表清洁、净化', '旺相时清洁顺利，衰弱时清洁困难'),
+    '冠带': ('万物开始装饰，代表装饰、美化', '旺相时装饰顺利，衰弱时装饰困难'),
+    '临官': ('万物开始当官，代表当官、掌权', '旺相时当官顺利，衰弱时当官困难'),
+    '帝旺': ('万物达到极盛，代表极盛、顶峰', '旺相时极盛顺利，衰弱时极盛困难'),
+    '衰': ('万物开始衰落，代表衰落、衰退', '旺相时衰落顺利，衰弱时衰落困难'),
+    '病': ('万物开始生病，代表生病、疾病', '旺相时生病顺利，衰弱时生病困难'),
+    '死': ('万物开始死亡，代表死亡、结束', '旺相时死亡顺利，衰弱时死亡困难'),
+    '墓': ('万物开始埋葬，代表埋葬、隐藏', '旺相时埋葬顺利，衰弱时埋葬困难'),
+    '绝': ('万物开始断绝，代表断绝、分离', '旺相时断绝顺利，衰弱时断绝困难'),
+    '胎': ('万物开始孕育，代表孕育、孕育', '旺相时孕育顺利，衰弱时孕育困难'),
+    '养': ('万物开始养育，代表养育、培养', '旺相时养育顺利，衰弱时养育困难')
+})
+
+# 空亡、驿马：(含义, 影响)
+KONG_WANG_TEXT = _intern(('空亡代表虚无、不实、无结果', '空亡当值，事情容易落空或没有结果'))
+YI_MA_TEXT = _intern(('驿马代表变动、迁移、旅行', '驿马当值，事情容易变动或迁移'))
+
+_UNKNOWN_TEXT = (UNKNOWN, UNKNOWN, UNKNOWN)
+
+# (字段, 结构) -> 渲染结果
+_rendered = {}
+
+
+def _cached(field, key, build):
+    rendered = _rendered.get((field, key))
+    if rendered is None:
+        rendered = _rendered.setdefault((field, key), freeze(build()))
+    return rendered
+
+
+def render_liu_qin(liu_qin):
+    """{关系: 天干} -> {关系: {gan, meaning, influence}}"""
+    def build():
+        detailed = {}
+        for relation, gan in liu_qin.items():
+            meaning, influence = LIU_QIN_TEXT.get(relation, _UNKNOWN_TEXT[:2])
+            detailed[relation] = {'gan': gan, 'meaning': meaning, 'influence': influence}
+        return detailed
+    return _cached('liu_qin', tuple(liu_qin.items()), build)
+
+
+def render_liu_shen(liu_shen):
+    """{shen, start_shen, shi_index} -> 含释义、位置和推算方法的六神"""
+    shen = liu_shen['shen']
+    start_shen = liu_shen['start_shen']
+    shi_index = liu_shen['shi_index']
+
+    def build():
+        meaning, influence = LIU_SHEN_TEXT.get(shen, _UNKNOWN_TEXT[:2])
+        return {
+            'shen': shen,
+            'meaning': meaning,
+            'influence': influence,
+            'position': f'第{shi_index + 1}位',
+            'start_shen': start_shen,
+            'calculation_method': f'以{start_shen}为起始，按时辰推算'
+        }
+    return _cached('liu_shen', (shen, start_shen, shi_index), build)
+
+
+def render_shi_er_shen(shi_er_shen):
+    """按位置排列的神将列表 -> {神将: {position, meaning, influence, wuxing}}"""
+    def build():
+        detailed = {}
+        for i, shen in enumerate(shi_er_shen):
+            meaning, influence, wuxing = SHI_ER_SHEN_TEXT.get(shen, _UNKNOWN_TEXT)
+            detailed[shen] = {
+                'position': f'第{i+1}位',
+                'meaning': meaning,
+                'influence': influence,
+                'wuxing': wuxing
+            }
+        return detailed
+    return _cached('shi_er_shen', tuple(shi_er_shen), build)
+
+
+def render_chang_sheng(chang_sheng):
+    """长生至养依次所在的地支列表 -> {名称: {zhi, meaning, influence}}"""
+    def build():
+        detailed = {}
+        for name, zhi in zip(CHANG_SHENG_NAMES, chang_sheng):
+            meaning, influence = CHANG_SHENG_TEXT[name]
+            detailed[name] = {'zhi': zhi, 'meaning': meaning, 'influence': influence}
+        return detailed
+    return _cached('chang_sheng', tuple(chang_sheng), build)
+
+
+def render_kong_wang(kong_wang):
+    """空亡地支 -> {kong_wang, meaning, influence}"""
+    return _cached('kong_wang', kong_wang, lambda: {
+        'kong_wang': kong_wang,
+        'meaning': KONG_WANG_TEXT[0],
+        'influence': KONG_WANG_TEXT[1]
+    })
+
+
+def render_yi_ma(yi_ma):
+    """驿马地支 -> {yi_ma, meaning, influence}"""
+    return _cached('yi_ma', yi_ma, lambda: {
+        'yi_ma': yi_ma,
+        'meaning': YI_MA_TEXT[0],
+        'influence': YI_MA_TEXT[1]
+    })
+
+
+# 需要补全释义的字段
+RENDERERS = {
+    'liu_qin': render_liu_qin,
+    'liu_shen': render_liu_shen,
+    'shi_er_shen': render_shi_er_shen,
+    'kong_wang': render_kong_wang,
+    'yi_ma': render_yi_ma,
+    'chang_sheng': render_chang_sheng
+}
+
+
+def render_pan(chart):
+    """结构化排盘 -> 带释义文本的完整排盘（新字典，字段顺序不变）"""
+    rendered = dict(chart)
+    for field, render in RENDERERS.items():
+        if field in chart:
+            rendered[field] = render(chart[field])
+    return rendered
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预派生工作进程池
+父进程先加载分析引擎、案例库（mmap）、排盘表和古籍数据，再 fork 出一个派生进程，
+之后的工作进程都由派生进程 fork，只读数据以写时复制的方式共享，不在每个进程里重复构建。
+派生进程在调度线程启动前创建，始终是单线程的；父进程里有调度线程和其他线程持有锁，
+直接从中 fork 出的替补进程可能继承处于持有状态的锁。
+每个工作进程由父进程中的一个调度线程负责：取任务、转发、收结果，空闲时做健康检查，
+进程退出、无响应或任务超时时立即重新派生。
+工作进程不是父进程的子进程，父进程通过派生进程交回的 pidfd 判断其存活、发送信号，
+pid 被系统复用也不会误判（没有 pidfd 的平台退回按 pid 判断）。
+任务抛出的异常连同类型传回父进程，在 Future 上以同一类型重新抛出。
+
+环境变量：
+    LIUREN_POOL_WORKERS         工作进程数，默认 CPU 核数
+    LIUREN_POOL_HEALTH_INTERVAL 空闲时健康检查间隔秒数，默认 5
+    LIUREN_POOL_HEALTH_TIMEOUT  健康检查应答超时秒数，默认 2
+    LIUREN_POOL_TASK_TIMEOUT    单个任务的最长执行秒数，超时后重启该工作进程，0 表示不限，默认 60
+"""
+
+import gc
+import multiprocessing
+import os
+import pickle
+import queue
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import Executor, Future
+from multiprocessing import reduction
+from multiprocessing.connection import Connection
+
+
+class WorkerCrashedError(RuntimeError):
+    """工作进程在执行任务期间退出"""
+
+
+class WorkerTimeoutError(TimeoutError):
+    """任务超过最长执行时间"""
+
+
+class RemoteTraceback(Exception):
+    """工作进程中的调用栈，作为重新抛出的异常的 __cause__"""
+
+    def __str__(self):
+        return self.args[0]
+
+
+_HAS_PIDFD = hasattr(os, 'pidfd_open') and hasattr(signal, 'pidfd_send_signal')
+
+
+def preload():
+    """在父进程中加载所有只读数据，供 fork 出的工作进程共享"""
+    from app import warm_up_all
+    from core.calendar_table import get_calendar_table
+    from core.pan_table import get_pan_table
+    from core.segmenter import get_segmenter
+    from data.case_corpus import ensure_case_corpora
+
+    # 语料库只在这里（fork 之前）构建，工作进程只打开
+    ensure_case_corpora()
+    get_calendar_table()
+    get_pan_table()
+    # 古籍、现代理论、事件分析器和分析引擎
+    warm_up_all()
+    get_segmenter().wait()
+    # 已加载的对象移出 GC 跟踪，避免子进程中的回收扫描触发写时复制
+    gc.collect()
+    gc.freeze()
+
+
+def _worker_main(conn):
+    """工作进程主循环：执行任务并应答健康检查"""
+    # 中断信号交给父进程统一处理
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    handled = 0
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        kind = message[0]
+        if kind == 'ping':
+            conn.send(('pong', os.getpid(), handled))
+        elif kind == 'task':
+            _, func, args, kwargs = message
+            try:
+                # 与 conn.send 相同的序列化，结果无法序列化时同样作为异常返回
+                reply = reduction.ForkingPickler.dumps(('ok', func(*args, **kwargs)))
+            except Exception as e:
+                reply = reduction.ForkingPickler.dumps(
+                    ('error', _exception_payload(e), ''.join(traceback.format_exception(e))))
+            conn.send_bytes(reply)
+            handled += 1
+        elif kind == 'stop':
+            break
+    conn.close()
+
+
+def _exception_payload(e):
+    """能完整往返序列化的异常原样传回，否则传回 (类型, 消息)，类型也无法序列化时传回 (None, 类型名: 消息)"""
+    try:
+        pickle.loads(pickle.dumps(e))
+        return e
+    except Exception:
+        pass
+    try:
+        pickle.loads(pickle.dumps(type(e)))
+        return type(e), str(e)
+    except Exception:
+        return None, f'{type(e).__name__}: {e}'
+
+
+def _rebuild_exception(payload, remote_traceback):
+    """按工作进程传回的内容重建异常，类型无法重建时退回 RuntimeError"""
+    if isinstance(payload, BaseException):
+        exc = payload
+    else:
+        exc_type, message = payload
+        try:
+            exc = exc_type(message) if exc_type is not None else RuntimeError(message)
+        except Exception:
+            exc = RuntimeError(f'{exc_type.__name__}: {message}')
+    exc.__cause__ = RemoteTraceback(remote_traceback)
+    return exc
+
+
+def _reap_workers(signum, frame):
+    """回收已退出的工作进程"""
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+
+
+def _spawner_main(conn):
+    """派生进程主循环：每收到一个 spawn 请求 fork 一个工作进程，把 pid 和连接交回父进程"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # 工作进程是派生进程的子进程，退出后在 SIGCHLD 中回收
+    signal.signal(signal.SIGCHLD, _reap_workers)
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message[0] != 'spawn':
+            break
+
+        parent_sock, child_sock = socket.socketpair()
+        # 打开 pidfd 之前不回收，工作进程即使已经退出，pid 也不会被复用
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGCHLD})
+        pid = os.fork()
+        if pid == 0:
+            conn.close()
+            parent_sock.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGCHLD})
+            try:
+                _worker_main(Connection(child_sock.detach()))
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(0)
+        pidfd = os.pidfd_open(pid) if _HAS_PIDFD else None
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGCHLD})
+        child_sock.close()
+        conn.send((pid, pidfd is not None))
+        reduction.send_handle(conn, parent_sock.fileno(), None)
+        parent_sock.close()
+        if pidfd is not None:
+            reduction.send_handle(conn, pidfd, None)
+            os.close(pidfd)
+    conn.close()
+
+
+class _Spawner:
+    """父进程中对派生进程的记录，spawn() 可在任意调度线程中调用"""
+
+    def __init__(self, context):
+        self.context = context
+        self.process = None
+        self.conn = None
+        self._lock = threading.Lock()
+        self._start()
+
+    def _start(self):
+        parent_conn, child_conn = self.context.Pipe()
+        self.process = self.context.Process(target=_spawner_main, args=(child_conn,),
+                                            name='liuren-spawner', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def spawn(self):
+        """派生一个工作进程，返回 (pid, pidfd 或 None, 连接)"""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    self.conn.send(('spawn',))
+                    pid, has_pidfd = self.conn.recv()
+                    conn = Connection(reduction.recv_handle(self.conn))
+                    pidfd = reduction.recv_handle(self.conn) if has_pidfd else None
+                    return pid, pidfd, conn
+                except (EOFError, OSError):
+                    if attempt:
+                        raise
+                # 派生进程意外退出时只能从父进程重新 fork，此后的工作进程仍由新的派生进程派生
+                print("⚠️ 派生进程已退出，重新启动")
+                self.conn.close()
+                if self.process.is_alive():
+                    self.process.kill()
+                self.process.join()
+                self._start()
+
+    def stop(self):
+        with self._lock:
+            try:
+                self.conn.send(('stop',))
+            except (OSError, ValueError):
+                pass
+            self.process.join(1.0)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+            self.conn.close()
+
+
+class _Worker:
+    """父进程中对单个工作进程的记录"""
+
+    def __init__(self, index, spawner):
+        self.index = index
+        self.spawner = spawner
+        self.pid = None
+        self.pidfd = None
+        self.conn = None
+        self.handled = 0
+        self.restarts = 0
+        self.last_health_check = None
+        self.healthy = False
+        self.start()
+
+    def start(self):
+        self.pid, self.pidfd, self.conn = self.spawner.spawn()
+        self.healthy = True
+
+    def restart(self):
+        self.stop(timeout=0)
+        self.restarts += 1
+        self.start()
+
+    def is_alive(self):
+        if self.conn is None:
+            return False
+        if self.pidfd is not None:
+            # 进程退出后 pidfd 变为可读
+            return not select.select([self.pidfd], [], [], 0)[0]
+        # 没有 pidfd 时只能按 pid 判断，工作进程退出后 pid 被复用会误判为存活
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _wait_exit(self, timeout):
+        if self.pidfd is not None:
+            select.select([self.pidfd], [], [], timeout)
+            return
+        deadline = time.monotonic() + timeout
+        while self.is_alive() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _kill(self):
+        if self.pidfd is not None:
+            signal.pidfd_send_signal(self.pidfd, signal.SIGKILL)
+        else:
+            os.kill(self.pid, signal.SIGKILL)
+
+    def stop(self, timeout=1.0):
+        if self.conn is None:
+            return
+        try:
+            if timeout and self.is_alive():
+                self.conn.send(('stop',))
+                self._wait_exit(timeout)
+        except (OSError, ValueError):
+            pass
+        if self.is_alive():
+            self._kill()
+            self._wait_exit(5.0)
+        self.conn.close()
+        self.conn = None
+        if self.pidfd is not None:
+            os.close(self.pidfd)
+            self.pidfd = None
+        self.healthy = False
+
+    def request(self, message, timeout=None):
+        """发送消息并等待应答，超时或进程退出时返回 None"""
+        self.conn.send(message)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = 0.5 if deadline is None else min(0.5, deadline - time.monotonic())
+            if wait <= 0:
+                return None
+            try:
+                if self.conn.poll(wait):
+                    return self.conn.recv()
+            except (EOFError, OSError):
+                return None
+            if not self.is_alive():
+                return None
+
+    def status(self):
+        return {
+            'index': self.index,
+            'pid': self.pid,
+            'alive': self.is_alive(),
+            'healthy': self.healthy,
+            'handled': self.handled,
+            'restarts': self.restarts,
+            'last_health_check': self.last_health_check
+        }
+
+
+class WorkerPool(Executor):
+    """预派生进程池，接口与 concurrent.futures.Executor 一致"""
+
+    def __init__(self, workers=None, health_interval=None, health_timeout=None, task_timeout=None,
+                 preload_data=True):
+        self.workers = workers or int(os.environ.get('LIUREN_POOL_WORKERS', 0)) or os.cpu_count() or 1
+        self.health_interval = health_interval or float(os.environ.get('LIUREN_POOL_HEALTH_INTERVAL', 5))
+        self.health_timeout = health_timeout or float(os.environ.get('LIUREN_POOL_HEALTH_TIMEOUT', 2))
+        if task_timeout is None:
+            task_timeout = float(os.environ.get('LIUREN_POOL_TASK_TIMEOUT', 60))
+        self.task_timeout = task_timeout or None
+
+        if preload_data:
+            preload()
+
+        context = multiprocessing.get_context('fork')
+        self._tasks = queue.SimpleQueue()
+        self._shutdown = False
+        self._lock = threading.Lock()
+        # 派生进程在调度线程启动前 fork，不带上调度线程的锁状态；替补进程也都由它派生
+        self._spawner = _Spawner(context)
+        self._workers = [_Worker(index, self._spawner) for index in range(self.workers)]
+        self._threads = [
+            threading.Thread(target=self._dispatch, args=(worker,),
+                             name=f'liuren-pool-dispatch-{worker.index}', daemon=True)
+            for worker in self._workers
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('进程池已关闭')
+            future = Future()
+            self._tasks.put((future, fn, args, kwargs))
+            return future
+
+    def _dispatch(self, worker):
+        """调度线程：把任务转发给对应的工作进程，空闲时做健康检查"""
+        while True:
+            try:
+                item = self._tasks.get(timeout=self.health_interval)
+            except queue.Empty:
+                if not self._shutdown:
+                    self._check(worker)
+                continue
+            if item is None:
+                return
+
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            started = time.monotonic()
+            try:
+                reply = worker.request(('task', fn, args, kwargs), timeout=self.task_timeout)
+            except Exception as e:
+                # 参数无法序列化等发送失败
+                future.set_exception(e)
+                continue
+
+            if reply is None:
+                # 进程退出时连接先于进程关闭，按是否到期区分超时和退出
+                if self.task_timeout is not None and time.monotonic() - started >= self.task_timeout:
+                    future.set_exception(WorkerTimeoutError(f'任务超过 {self.task_timeout:g} 秒未完成'))
+                    print(f"⚠️ 工作进程 {worker.index} 执行超时，重新派生")
+                else:
+                    future.set_exception(WorkerCrashedError(f'工作进程 {worker.pid} 已退出'))
+                    print(f"⚠️ 工作进程 {worker.index} 异常退出，重新派生")
+                worker.restart()
+                continue
+
+            worker.handled += 1
+            if reply[0] == 'ok':
+                future.set_result(reply[1])
+            else:
+                future.set_exception(_rebuild_exception(*reply[1:]))
+
+    def _check(self, worker):
+        """健康检查：进程存活且在超时内应答，否则重新派生"""
+        reply = None
+        if worker.is_alive():
+            try:
+                reply = worker.request(('ping',), timeout=self.health_timeout)
+            except (OSError, ValueError):
+                reply = None
+        worker.last_health_check = time.time()
+        worker.healthy = reply is not None and reply[0] == 'pong'
+        if not worker.healthy:
+            print(f"⚠️ 工作进程 {worker.index} 健康检查失败，重新派生")
+            worker.restart()
+
+    def health(self):
+        """各工作进程状态"""
+        return [worker.status() for worker in self._workers]
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        item = self._tasks.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        item[0].cancel()
+            for _ in self._threads:
+                self._tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+            for worker in self._workers:
+                worker.stop()
+            self._spawner.stop()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化案例语料库
+构建阶段一次性把案例写入紧凑的列式文件，运行时通过 mmap 打开，
+启动耗时与案例数量无关，且多个工作进程共享同一份页缓存。
+案例由固定种子分块生成，各分块可在进程池中并行构建，同一种子得到逐字节相同的文件。
+
+服务进程只打开语料库，文件缺失或过期时报错而不构建（多个预派生进程会同时构建同一文件）；
+构建在开始服务之前进行：
+
+    python -m data.case_corpus [--workers N]               构建全部语料库
+    python -m data.case_corpus --if-needed [--workers N]   只构建缺失或过期的语料库
+
+ensure_case_corpora() 与 --if-needed 相同，由 core.worker_pool.preload、python app.py
+和 LIUREN_WARM_UP=1 的主进程在开始服务前调用。
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import uuid
+from array import array
+from datetime import date
+
+from data.case_store import (CASE_SEED, DATE_ORIGIN, CaseStore, build_bucket_index, build_index_columns,
+                             generate_case_columns, load_bucket_index)
+
+CORPUS_MAGIC = b'LRCORPUS'
+CORPUS_VERSION = 3
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+BUILD_HINT = '请先运行 python -m data.case_corpus 构建'
+
+
+class CorpusNotBuiltError(RuntimeError):
+    """语料库文件缺失、无效或与当前种子不符"""
+
+
+def default_build_workers():
+    """构建语料库的并行进程数，LIUREN_CORPUS_BUILD_WORKERS 可覆盖"""
+    return int(os.environ.get('LIUREN_CORPUS_BUILD_WORKERS', os.cpu_count() or 1))
+
+
+def write_case_corpus(path, categories, columns, case_templates, source='历史案例库', id_width=7,
+                      seed=CASE_SEED):
+    """把列数据写入语料库文件（先写临时文件再原子替换）"""
+    count = len(columns['category'])
+    index_columns, index_groups = build_index_columns(categories, columns)
+    index_columns['bucket'], buckets = build_bucket_index(columns)
+
+    layout = []
+    offset = 0
+    blobs = []
+    for name, data in list(columns.items()) + [('order_' + k, v) for k, v in index_columns.items()]:
+        blob = data.tobytes()
+        layout.append({'name': name, 'typecode': data.typecode, 'offset': offset})
+        blobs.append(blob)
+        # 每列按 8 字节对齐，便于直接 cast
+        offset += len(blob) + (-len(blob)) % 8
+
+    header = json.dumps({
+        'version': CORPUS_VERSION,
+        'seed': seed,
+        'count': count,
+        'categories': categories,
+        'templates': case_templates,
+        'source': source,
+        'id_width': id_width,
+        'date_origin': DATE_ORIGIN.isoformat(),
+        'columns': layout,
+        'index': index_groups,
+        'buckets': buckets,
+    }, ensure_ascii=False).encode('utf-8')
+    header += b' ' * ((-(len(CORPUS_MAGIC) + 4 + len(header))) % 8)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # 临时文件与目标同目录，os.replace 原子替换；读取方不会看到写了一半的文件
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    try:
+        with open(tmp_path, 'xb') as f:
+            f.write(CORPUS_MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+                f.write(b'\0' * ((-len(blob)) % 8))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def build_case_corpus(path, base_pan_results, case_templates, cases_per_category,
+                      source='历史案例库', id_width=7, seed=CASE_SEED, workers=None):
+    """构建语料库文件"""
+    workers = workers or default_build_workers()
+    print(f"正在构建案例语料库 {os.path.basename(path)}（{workers} 个进程）...")
+    categories, columns = generate_case_columns(base_pan_results, case_templates,
+                                                cases_per_category, seed, workers)
+    write_case_corpus(path, categories, columns, case_templates, source, id_width, seed)
+    print(f"✅ 已写入 {len(columns['category']):,} 个案例到 {path}")
+
+
+class CaseCorpus(CaseStore):
+    """mmap 打开的只读案例语料库"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(CORPUS_MAGIC)] != CORPUS_MAGIC:
+            raise ValueError(f'不是有效的案例语料库文件：{path}')
+        header_start = len(CORPUS_MAGIC) + 4
+        (header_len,) = struct.unpack_from('<I', self._mmap, len(CORPUS_MAGIC))
+        header = json.loads(self._mmap[header_start:header_start + header_len].decode('utf-8'))
+        if header['version'] != CORPUS_VERSION:
+            raise ValueError(f'语料库版本不匹配：{header["version"]}')
+
+        self.seed = header['seed']
+        count = header['count']
+        data_start = header_start + header_len
+        view = memoryview(self._mmap)
+        columns = {}
+        for column in header['columns']:
+            itemsize = array(column['typecode']).itemsize
+            start = data_start + column['offset']
+            columns[column['name']] = view[start:start + count * itemsize].cast(column['typecode'])
+
+        # 分组索引：组名 -> 行号序列（mmap 上的切片，无需复制）
+        index = {}
+        for group_name, groups in header['index'].items():
+            order = columns['order_' + group_name]
+            index[group_name] = {
+                label: order[start:start + length] for label, (start, length) in groups.items()
+            }
+
+        buckets = load_bucket_index(columns['order_bucket'], header['buckets'])
+
+        super().__init__(columns, header['categories'], header['templates'], index, buckets,
+                         source=header['source'], id_width=header['id_width'],
+                         date_origin=date.fromisoformat(header['date_origin']))
+
+    def close(self):
+        """释放 mmap"""
+        for groups in self.index.values():
+            for rows in groups.values():
+                rows.release()
+        for bucket in self.buckets.values():
+            bucket['rows'].release()
+        self.buckets = {}
+        for column in self.columns.values():
+            column.release()
+        self.columns = {}
+        self.index = {}
+        self._mmap.close()
+
+
+def load_case_corpus(path, seed=CASE_SEED):
+    """打开语料库文件；文件不存在、版本过期或种子不符时抛出 CorpusNotBuiltError，不在此构建"""
+    try:
+        corpus = CaseCorpus(path)
+    except FileNotFoundError:
+        raise CorpusNotBuiltError(f'案例语料库不存在：{path}，{BUILD_HINT}') from None
+    except (ValueError, KeyError, struct.error) as e:
+        raise CorpusNotBuiltError(f'案例语料库无效：{path}（{e}），{BUILD_HINT}') from e
+    if corpus.seed != seed:
+        corpus.close()
+        raise CorpusNotBuiltError(f'案例语料库种子 {corpus.seed} 与 {seed} 不符：{path}，{BUILD_HINT}')
+    return corpus
+
+
+def is_corpus_current(path, seed=CASE_SEED):
+    """语料库文件存在、版本一致且种子相符"""
+    try:
+        load_case_corpus(path, seed).close()
+    except CorpusNotBuiltError:
+        return False
+    return True
+
+
+def _corpus_databases():
+    from data.case_database_ultra_massive_fast import UltraMassiveCaseDatabaseFast
+    from data.case_database_ultra_massive import UltraMassiveCaseDatabase
+    return UltraMassiveCaseDatabaseFast, UltraMassiveCaseDatabase
+
+
+def ensure_case_corpora(workers=None):
+    """构建缺失或过期的语料库（开始服务、fork 工作进程之前调用）"""
+    for db_class in _corpus_databases():
+        if not is_corpus_current(db_class.CORPUS_PATH):
+            print(f"⚠️ 案例语料库 {os.path.basename(db_class.CORPUS_PATH)} 缺失或已过期，开始构建")
+            db_class.build_corpus(workers=workers)
+
+
+def main(argv=None):
+    """构建步骤：python -m data.case_corpus [--workers N] [--if-needed]"""
+    parser = argparse.ArgumentParser(description='构建案例语料库')
+    parser.add_argument('--workers', type=int, default=None, help='并行进程数（默认 CPU 核数）')
+    parser.add_argument('--if-needed', action='store_true', help='只构建缺失或过期的语料库')
+    args = parser.parse_args(argv)
+
+    if args.if_needed:
+        ensure_case_corpora(workers=args.workers)
+        return 0
+    for db_class in _corpus_databases():
+        db_class.build_corpus(workers=args.workers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,21 +4,37 @@
 超超大规模案例数据库 - 包含100万个案例
 """
 
-import random
-from datetime import datetime, timedelta
+import os
+
+from data.case_corpus import CORPUS_DIR, build_case_corpus, load_case_corpus
 
 class UltraMassiveCaseDatabase:
     """超超大规模案例数据库"""
     
-    def __init__(self):
+    CORPUS_PATH = os.path.join(CORPUS_DIR, 'ultra_massive.cases')
+    CASES_PER_CATEGORY = 125000
+    
+    def __init__(self, corpus_path=None):
+        self.corpus_path = corpus_path or self.CORPUS_PATH
         self.cases = {}
         self._initialize_ultra_massive_cases()
         self._build_case_index()
     
     def _initialize_ultra_massive_cases(self):
-        """初始化超超大规模案例数据"""
-        print("正在初始化超超大规模案例数据库...")
-        
+        """从持久化语料库加载案例（mmap 打开，不在运行时生成）"""
+        self.corpus = load_case_corpus(self.corpus_path)
+        self.cases = self.corpus
+    
+    @classmethod
+    def build_corpus(cls, corpus_path=None, workers=None):
+        """构建步骤：生成案例并写入语料库文件"""
+        base_pan_results, case_templates = cls._get_case_templates()
+        build_case_corpus(corpus_path or cls.CORPUS_PATH, base_pan_results, case_templates,
+                          cls.CASES_PER_CATEGORY, workers=workers)
+    
+    @staticmethod
+    def _get_case_templates():
+        """案例生成模板"""
         # 扩展基础数据模板
         base_pan_results = [
             {'ri_gan': '甲', 'ri_zhi': '子', 'san_chuan': '贼克法', 'yue_jiang': '寅', 'liu_shen': '青龙'},
@@ -488,118 +504,15 @@ class UltraMassiveCaseDatabase:
             }
         }
         
-        # 生成100万个案例
-        case_id = 1
-        categories = list(case_templates.keys())
-        
-        for category in categories:
-            template = case_templates[category]
-            
-            # 每个类别生成125万个案例
-            for i in range(125000):
-                # 随机选择基础数据
-                pan_result = random.choice(base_pan_results).copy()
-                
-                # 随机选择案例内容
-                title = random.choice(template['titles'])
-                background = random.choice(template['backgrounds'])
-                prediction = random.choice(template['predictions'])
-                actual_result = random.choice(template['actual_results'])
-                
-                # 生成随机准确率
-                accuracy = random.uniform(0.6, 0.95)
-                
-                # 生成随机日期
-                start_date = datetime(2020, 1, 1)
-                end_date = datetime(2024, 12, 31)
-                random_date = start_date + timedelta(days=random.randint(0, (end_date - start_date).days))
-                
-                # 创建案例
-                case_id_str = f"{category}_{case_id:07d}"
-                self.cases[case_id_str] = {
-                    'title': f"{title}_{i+1}",
-                    'background': background,
-                    'pan_result': pan_result,
-                    'prediction': prediction,
-                    'actual_result': actual_result,
-                    'key_points': [
-                        f"{category}相关分析要点1",
-                        f"{category}相关分析要点2",
-                        f"{category}相关分析要点3"
-                    ],
-                    'accuracy': round(accuracy, 2),
-                    'source': '历史案例库',
-                    'category': category,
-                    'date': random_date.strftime('%Y-%m-%d'),
-                    'analysis_notes': f"基于{pan_result['ri_gan']}日干{pan_result['ri_zhi']}日支的分析，{category}方面表现良好。"
-                }
-                
-                case_id += 1
-        
-        print(f"✅ 成功生成 {len(self.cases)} 个案例")
+        return base_pan_results, case_templates
     
     def _build_case_index(self):
-        """构建案例索引"""
-        self.index = {
-            'by_category': {},
-            'by_accuracy': {},
-            'by_method': {},
-            'by_liu_shen': {}
-        }
-        
-        for case_id, case_data in self.cases.items():
-            category = case_data['category']
-            accuracy = case_data['accuracy']
-            pan_result = case_data['pan_result']
-            
-            # 按类别索引
-            if category not in self.index['by_category']:
-                self.index['by_category'][category] = []
-            self.index['by_category'][category].append(case_id)
-            
-            # 按准确率索引
-            if accuracy >= 0.9:
-                if 'high_accuracy' not in self.index['by_accuracy']:
-                    self.index['by_accuracy']['high_accuracy'] = []
-                self.index['by_accuracy']['high_accuracy'].append(case_id)
-            elif accuracy >= 0.8:
-                if 'medium_accuracy' not in self.index['by_accuracy']:
-                    self.index['by_accuracy']['medium_accuracy'] = []
-                self.index['by_accuracy']['medium_accuracy'].append(case_id)
-            
-            # 按方法索引
-            method = pan_result.get('san_chuan', '')
-            if method not in self.index['by_method']:
-                self.index['by_method'][method] = []
-            self.index['by_method'][method].append(case_id)
-            
-            # 按六神索引
-            liu_shen = pan_result.get('liu_shen', '')
-            if liu_shen not in self.index['by_liu_shen']:
-                self.index['by_liu_shen'][liu_shen] = []
-            self.index['by_liu_shen'][liu_shen].append(case_id)
+        """构建案例索引（直接使用语料库中预先排好序的行号，无需遍历案例）"""
+        self.index = self.corpus.index
     
     def find_similar_cases(self, pan_result, category=None, min_similarity=0.3, limit=10):
-        """查找相似案例"""
-        similar_cases = []
-        
-        for case_id, case_data in self.cases.items():
-            if category and case_data['category'] != category:
-                continue
-            
-            similarity = self._calculate_similarity(pan_result, case_data['pan_result'])
-            
-            if similarity >= min_similarity:
-                similar_cases.append({
-                    'case_id': case_id,
-                    'similarity': similarity,
-                    'case_data': case_data
-                })
-        
-        # 按相似度排序
-        similar_cases.sort(key=lambda x: x['similarity'], reverse=True)
-        
-        return similar_cases[:limit]
+        """查找相似案例（只为前 limit 个结果生成完整字典）"""
+        return self.corpus.find_similar_cases(pan_result, category, min_similarity, limit)
     
     def _calculate_similarity(self, pan1, pan2):
         """计算相似度"""
@@ -641,16 +554,16 @@ class UltraMassiveCaseDatabase:
         if category not in self.index['by_category']:
             return []
         
-        case_ids = self.index['by_category'][category][:limit]
-        return [self.cases[case_id] for case_id in case_ids]
+        rows = self.index['by_category'][category][:limit]
+        return [self.corpus.get_case(row) for row in rows]
     
     def get_high_accuracy_cases(self, min_accuracy=0.8, limit=50):
         """获取高准确率案例"""
-        high_accuracy_ids = self.index['by_accuracy'].get('high_accuracy', [])
-        medium_accuracy_ids = self.index['by_accuracy'].get('medium_accuracy', [])
+        high_accuracy_rows = self.index['by_accuracy'].get('high_accuracy', [])
+        medium_accuracy_rows = self.index['by_accuracy'].get('medium_accuracy', [])
         
-        all_ids = high_accuracy_ids + medium_accuracy_ids
-        return [self.cases[case_id] for case_id in all_ids[:limit]]
+        all_rows = list(high_accuracy_rows[:limit]) + list(medium_accuracy_rows[:limit])
+        return [self.corpus.get_case(row) for row in all_rows[:limit]]
     
     def get_total_cases_count(self):
         """获取总案例数"""
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列式案例存储
+分类字段以 int8 编码列保存，重复的文本模板全部驻留（intern），
+只有在返回 find_similar_cases 的前 k 个结果时才生成完整案例字典
+"""
+
+import heapq
+import multiprocessing
+import random
+import sys
+from array import array
+from itertools import islice, repeat
+from collections.abc import Mapping
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 定长整数编码所用的词表（-1 表示未知）
+TIAN_GAN = ['甲', '乙', '丙', '丁', '戊', '己', '庚', '辛', '壬', '癸']
+DI_ZHI = ['子', '丑', '寅', '卯', '辰', '巳', '午', '未', '申', '酉', '戌', '亥']
+SAN_CHUAN_METHODS = ['贼克法', '知一法', '涉害法', '遥克法', '昴星法', '别责法',
+                     '八专法', '伏吟法', '反吟法', '强制取传']
+LIU_SHEN = ['贵人', '螣蛇', '朱雀', '六合', '勾陈', '青龙',
+            '天空', '白虎', '太常', '玄武', '太阴', '天后']
+
+DATE_ORIGIN = date(2020, 1, 1)
+DATE_SPAN_DAYS = (date(2024, 12, 31) - DATE_ORIGIN).days
+
+# 列名与 array 类型码
+CASE_COLUMNS = [
+    ('ri_gan', 'b'),
+    ('ri_zhi', 'b'),
+    ('yue_jiang', 'b'),
+    ('method', 'b'),
+    ('liu_shen', 'b'),
+    ('category', 'b'),
+    ('accuracy', 'B'),       # 准确率百分数
+    ('title', 'b'),          # 以下四列为各类别模板下标
+    ('background', 'b'),
+    ('prediction', 'b'),
+    ('actual_result', 'b'),
+    ('serial', 'i'),         # 标题序号
+    ('date', 'H'),           # 距 DATE_ORIGIN 的天数
+]
+
+TEMPLATE_FIELDS = ['titles', 'backgrounds', 'predictions', 'actual_results']
+
+
+def _build_similarity_table():
+    """按匹配位掩码预先算好相似度（与逐项累加的 _calculate_similarity 完全一致）"""
+    table = []
+    for mask in range(16):
+        similarity = 0.0
+        for bit, weight in enumerate((0.3, 0.3, 0.2, 0.2)):
+            if mask & (1 << bit):
+                similarity += weight
+        table.append(similarity / 4)
+    return table
+
+
+# 位 0 日干、位 1 日支、位 2 月将、位 3 三传方法
+SIMILARITY_BY_MASK = _build_similarity_table()
+
+# 相似度在所有取值中的名次（越大越相似），用作整数排序键
+_SIMILARITY_LEVELS = sorted(set(SIMILARITY_BY_MASK))
+RANK_BY_MASK = [_SIMILARITY_LEVELS.index(similarity) for similarity in SIMILARITY_BY_MASK]
+
+# 分桶所用的编码列，即相似度计算的四个分量
+BUCKET_COLUMNS = ['ri_gan', 'ri_zhi', 'yue_jiang', 'method']
+
+
+def encode(vocab, value):
+    """把文本值编码为词表下标"""
+    try:
+        return vocab.index(value)
+    except ValueError:
+        return -1
+
+
+def encode_query(pan_result):
+    """把查询排盘编码为 (日干, 日支, 月将, 三传方法)，未知值编码为 -2，不与任何案例匹配"""
+    san_chuan = pan_result.get('san_chuan')
+    if isinstance(san_chuan, dict):
+        san_chuan = san_chuan.get('method_used')
+
+    codes = (
+        encode(TIAN_GAN, pan_result.get('ri_gan')),
+        encode(DI_ZHI, pan_result.get('ri_zhi')),
+        encode(DI_ZHI, pan_result.get('yue_jiang')),
+        encode(SAN_CHUAN_METHODS, san_chuan),
+    )
+    return tuple(code if code >= 0 else -2 for code in codes)
+
+
+# 案例生成的随机种子：同一种子生成的语料库逐字节相同
+CASE_SEED = 20240101
+# 每个类别按固定大小分块生成，分块边界与并行进程数无关
+CHUNK_SIZE = 25000
+
+
+def _chunk_rng(seed, category, start):
+    """分块独立的随机源，只取决于种子、类别和分块起点"""
+    return random.Random(f'{seed}:{category}:{start}')
+
+
+def generate_case_chunk(base_pan_results, case_templates, category_code, start, count, seed=CASE_SEED):
+    """生成某个类别第 start 个起的 count 个案例的列数据"""
+    category = list(case_templates)[category_code]
+    template = case_templates[category]
+    rng = _chunk_rng(seed, category, start)
+    columns = {name: array(typecode) for name, typecode in CASE_COLUMNS}
+
+    for i in range(start, start + count):
+        pan_result = rng.choice(base_pan_results)
+        title = rng.randrange(len(template['titles']))
+        background = rng.randrange(len(template['backgrounds']))
+        prediction = rng.randrange(len(template['predictions']))
+        actual_result = rng.randrange(len(template['actual_results']))
+        accuracy = round(rng.uniform(0.6, 0.95), 2)
+        days = rng.randint(0, DATE_SPAN_DAYS)
+
+        columns['ri_gan'].append(encode(TIAN_GAN, pan_result['ri_gan']))
+        columns['ri_zhi'].append(encode(DI_ZHI, pan_result['ri_zhi']))
+        columns['yue_jiang'].append(encode(DI_ZHI, pan_result['yue_jiang']))
+        columns['method'].append(encode(SAN_CHUAN_METHODS, pan_result['san_chuan']))
+        columns['liu_shen'].append(encode(LIU_SHEN, pan_result['liu_shen']))
+        columns['category'].append(category_code)
+        columns['accuracy'].append(int(round(accuracy * 100)))
+        columns['title'].append(title)
+        columns['background'].append(background)
+        columns['prediction'].append(prediction)
+        columns['actual_result'].append(actual_result)
+        columns['serial'].append(i + 1)
+        columns['date'].append(days)
+
+    return columns
+
+
+def case_chunks(category_count, cases_per_category, chunk_size=CHUNK_SIZE):
+    """按类别、分块顺序列出 (类别编码, 起点, 数量)"""
+    return [
+        (category_code, start, min(chunk_size, cases_per_category - start))
+        for category_code in range(category_count)
+        for start in range(0, cases_per_category, chunk_size)
+    ]
+
+
+def generate_case_columns(base_pan_results, case_templates, cases_per_category, seed=CASE_SEED,
+                          workers=1, chunk_size=CHUNK_SIZE):
+    """按模板生成案例列数据；workers > 1 时各分块在进程池中并行生成，结果与串行完全相同"""
+    categories = list(case_templates.keys())
+    chunks = case_chunks(len(categories), cases_per_category, chunk_size)
+    codes, starts, counts = zip(*chunks) if chunks else ((), (), ())
+
+    # 守护进程（如预派生的工作进程）不能再创建子进程
+    if workers > 1 and len(chunks) > 1 and not multiprocessing.current_process().daemon:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            results = list(executor.map(generate_case_chunk, repeat(base_pan_results), repeat(case_templates),
+                                        codes, starts, counts, repeat(seed)))
+    else:
+        results = map(generate_case_chunk, repeat(base_pan_results), repeat(case_templates),
+                      codes, starts, counts, repeat(seed))
+
+    # 按分块顺序拼接
+    columns = {name: array(typecode) for name, typecode in CASE_COLUMNS}
+    for chunk in results:
+        for name, data in chunk.items():
+            columns[name].extend(data)
+
+    return categories, columns
+
+
+def _accuracy_band(accuracy):
+    """准确率分档：0 高、1 中、2 其他"""
+    if accuracy >= 90:
+        return 0
+    if accuracy >= 80:
+        return 1
+    return 2
+
+
+def build_index_columns(categories, columns):
+    """预先计算分组索引（排好序的行号 + 每组的起止位置）"""
+    group_keys = {
+        'by_category': (columns['category'], categories),
+        'by_accuracy': ([_accuracy_band(a) for a in columns['accuracy']],
+                        ['high_accuracy', 'medium_accuracy', None]),
+    }
+
+    index_columns = {}
+    index_groups = {}
+    for group_name, (keys, labels) in group_keys.items():
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        index_columns[group_name] = array('i', order)
+
+        groups = {}
+        start = 0
+        while start < len(order):
+            code = keys[order[start]]
+            end = start
+            while end < len(order) and keys[order[end]] == code:
+                end += 1
+            label = labels[code] if 0 <= code < len(labels) else None
+            if label is not None:
+                groups[label] = [start, end - start]
+            start = end
+        index_groups[group_name] = groups
+
+    return index_columns, index_groups
+
+
+def build_bucket_index(columns):
+    """按 (日干, 日支, 月将, 三传方法) 分桶，返回按桶排好序的行号与每桶的 [键..., 起点, 数量, 准确率合计, 高, 中]"""
+    keys = list(zip(*(columns[name] for name in BUCKET_COLUMNS)))
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    accuracy = columns['accuracy']
+
+    buckets = []
+    start = 0
+    while start < len(order):
+        key = keys[order[start]]
+        end = start
+        total = 0
+        bands = [0, 0, 0]
+        while end < len(order) and keys[order[end]] == key:
+            value = accuracy[order[end]]
+            total += value
+            bands[_accuracy_band(value)] += 1
+            end += 1
+        buckets.append([*key, start, end - start, total, bands[0], bands[1]])
+        start = end
+
+    return array('i', order), buckets
+
+
+def load_bucket_index(order, entries):
+    """由行号序列与桶统计生成 桶键 -> 桶信息"""
+    buckets = {}
+    for gan, zhi, jiang, method, start, count, total, high, medium in entries:
+        buckets[(gan, zhi, jiang, method)] = {
+            'rows': order[start:start + count],
+            'count': count,
+            'avg_accuracy': round(total / count / 100, 4),
+            'high_accuracy': high,
+            'medium_accuracy': medium
+        }
+    return buckets
+
+
+class CaseRecord:
+    """单个案例的轻量记录，只保存所属存储和行号"""
+
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    @property
+    def case_id(self):
+        return self.store.case_id(self.row)
+
+    @property
+    def category(self):
+        return self.store.categories[self.store.columns['category'][self.row]]
+
+    @property
+    def accuracy(self):
+        return self.store.columns['accuracy'][self.row] / 100
+
+    def to_dict(self):
+        """生成完整案例字典"""
+        return self.store.get_case(self.row)
+
+    def __repr__(self):
+        return f'CaseRecord({self.case_id!r})'
+
+
+class CaseStore(Mapping):
+    """列式案例存储，按 case_id 访问时才生成案例字典"""
+
+    def __init__(self, columns, categories, templates, index, buckets, source='历史案例库',
+                 id_width=7, date_origin=DATE_ORIGIN):
+        self.columns = columns
+        self.count = len(columns['category'])
+        self.categories = [sys.intern(category) for category in categories]
+        self.source = sys.intern(source)
+        self.id_width = id_width
+        self.date_origin = date_origin
+        self.index = index
+        self.buckets = buckets
+
+        # 驻留所有模板文本，生成的案例字典共享同一批字符串对象
+        self.templates = {
+            sys.intern(category): {
+                field: [sys.intern(text) for text in template[field]]
+                for field in TEMPLATE_FIELDS
+            }
+            for category, template in templates.items()
+        }
+        self._key_points = {
+            category: [sys.intern(f"{category}相关分析要点{n}") for n in (1, 2, 3)]
+            for category in self.categories
+        }
+        self._analysis_notes = {}
+
+    @classmethod
+    def from_columns(cls, categories, columns, templates, **options):
+        """由内存中的 array 列构建存储"""
+        index_columns, index_groups = build_index_columns(categories, columns)
+        index = {
+            group_name: {
+                label: index_columns[group_name][start:start + length]
+                for label, (start, length) in groups.items()
+            }
+            for group_name, groups in index_groups.items()
+        }
+        bucket_order, bucket_entries = build_bucket_index(columns)
+        buckets = load_bucket_index(bucket_order, bucket_entries)
+        return cls(columns, categories, templates, index, buckets, **options)
+
+    @classmethod
+    def generate(cls, base_pan_results, case_templates, cases_per_category, seed=CASE_SEED, workers=1, **options):
+        """按模板生成案例（同一种子结果相同）并直接写入列"""
+        categories, columns = generate_case_columns(base_pan_results, case_templates,
+                                                    cases_per_category, seed, workers)
+        return cls.from_columns(categories, columns, case_templates, **options)
+
+    def case_id(self, row):
+        """行号 -> 案例编号"""
+        category = self.categories[self.columns['category'][row]]
+        return f"{category}_{row + 1:0{self.id_width}d}"
+
+    def row_of(self, case_id):
+        """案例编号 -> 行号"""
+        try:
+            category, number = case_id.rsplit('_', 1)
+            row = int(number) - 1
+        except (AttributeError, ValueError):
+            return None
+        if 0 <= row < self.count and self.categories[self.columns['category'][row]] == category:
+            return row
+        return None
+
+    def record(self, row):
+        """获取指定行的轻量记录"""
+        return CaseRecord(self, row)
+
+    def _get_analysis_notes(self, ri_gan, ri_zhi, category):
+        key = (ri_gan, ri_zhi, category)
+        notes = self._analysis_notes.get(key)
+        if notes is None:
+            notes = sys.intern(f"基于{ri_gan}日干{ri_zhi}日支的分析，{category}方面表现良好。")
+            self._analysis_notes[key] = notes
+        return notes
+
+    def get_case(self, row):
+        """生成指定行的完整案例字典"""
+        columns = self.columns
+        category = self.categories[columns['category'][row]]
+        template = self.templates[category]
+        ri_gan = TIAN_GAN[columns['ri_gan'][row]]
+        ri_zhi = DI_ZHI[columns['ri_zhi'][row]]
+
+        return {
+            'title': f"{template['titles'][columns['title'][row]]}_{columns['serial'][row]}",
+            'background': template['backgrounds'][columns['background'][row]],
+            'pan_result': {
+                'ri_gan': ri_gan,
+                'ri_zhi': ri_zhi,
+                'san_chuan': SAN_CHUAN_METHODS[columns['method'][row]],
+                'yue_jiang': DI_ZHI[columns['yue_jiang'][row]],
+                'liu_shen': LIU_SHEN[columns['liu_shen'][row]]
+            },
+            'prediction': template['predictions'][columns['prediction'][row]],
+            'actual_result': template['actual_results'][columns['actual_result'][row]],
+            'key_points': list(self._key_points[category]),
+            'accuracy': columns['accuracy'][row] / 100,
+            'source': self.source,
+            'category': category,
+            'date': (self.date_origin + timedelta(days=columns['date'][row])).strftime('%Y-%m-%d'),
+            'analysis_notes': self._get_analysis_notes(ri_gan, ri_zhi, category)
+        }
+
+    def find_similar_rows(self, pan_result, category=None, min_similarity=0.3, limit=None):
+        """返回按相似度降序排列的 (相似度, 行号)，相同相似度时保持原有行顺序
+
+        相似度只取决于四个分量是否相同，因此同一桶内的案例相似度相同：
+        先为每个桶计算相似度，只读取达到阈值的桶，指定 limit 时取够即停
+        """
+        if category and category not in self.categories:
+            return []
+        category_code = self.categories.index(category) if category else None
+        q_gan, q_zhi, q_jiang, q_method = encode_query(pan_result)
+
+        levels = {}
+        for (gan, zhi, jiang, method), bucket in self.buckets.items():
+            similarity = SIMILARITY_BY_MASK[(gan == q_gan) | (zhi == q_zhi) << 1
+                                            | (jiang == q_jiang) << 2 | (method == q_method) << 3]
+            if similarity >= min_similarity:
+                levels.setdefault(similarity, []).append(bucket['rows'])
+
+        matches = []
+        for similarity in sorted(levels, reverse=True):
+            remaining = None if limit is None else limit - len(matches)
+            if remaining is not None and remaining <= 0:
+                break
+            rows = self._merge_bucket_rows(levels[similarity], category_code, remaining)
+            matches.extend((similarity, row) for row in rows)
+        return matches
+
+    def _merge_bucket_rows(self, bucket_rows, category_code, limit):
+        """按行号顺序合并若干桶的行（可按类别过滤），最多取 limit 个"""
+        if np is not None:
+            rows = np.concatenate([np.frombuffer(rows, dtype=np.intc) for rows in bucket_rows])
+            if category_code is not None:
+                categories = np.frombuffer(self.columns['category'], dtype=np.int8)
+                rows = rows[categories[rows] == category_code]
+            if limit is not None and limit < len(rows):
+                rows = np.partition(rows, limit - 1)[:limit]
+            rows.sort()
+            return rows.tolist()
+
+        # 各桶内行号已升序，归并即可
+        merged = heapq.merge(*bucket_rows)
+        if category_code is not None:
+            category_column = self.columns['category']
+            merged = (row for row in merged if category_column[row] == category_code)
+        return list(islice(merged, limit))
+
+    def find_similar_cases(self, pan_result, category=None, min_similarity=0.3, limit=10,
+                           score_key='similarity'):
+        """查找相似案例，只为前 limit 个结果生成完整字典"""
+        matches = self.find_similar_rows(pan_result, category, min_similarity, limit)
+        return [
+            {
+                'case_id': self.case_id(row),
+                score_key: similarity,
+                'case_data': self.get_case(row)
+            }
+            for similarity, row in matches
+        ]
+
+    def get_statistics(self):
+        """获取统计信息"""
+        stats = {
+            'total_cases': self.count,
+            'categories': len(self.index['by_category']),
+            'high_accuracy_cases': len(self.index['by_accuracy'].get('high_accuracy', [])),
+            'medium_accuracy_cases': len(self.index['by_accuracy'].get('medium_accuracy', [])),
+            'buckets': len(self.buckets),
+            'category_distribution': {}
+        }
+
+        for category, rows in self.index['by_category'].items():
+            stats['category_distribution'][category] = len(rows)
+
+        return stats
+
+    def get_bucket_statistics(self):
+        """各桶的案例数与准确率统计，键为 (日干, 日支, 月将, 三传方法)"""
+        return {
+            (TIAN_GAN[gan], DI_ZHI[zhi], DI_ZHI[jiang], SAN_CHUAN_METHODS[method]): {
+                name: value for name, value in bucket.items() if name != 'rows'
+            }
+            for (gan, zhi, jiang, method), bucket in self.buckets.items()
+        }
+
+    def __getitem__(self, case_id):
+        row = self.row_of(case_id)
+        if row is None:
+            raise KeyError(case_id)
+        return self.get_case(row)
+
+    def __iter__(self):
+        for row in range(self.count):
+            yield self.case_id(row)
+
+    def __len__(self):
+        return self.count
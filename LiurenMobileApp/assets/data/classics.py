@@ -4,11 +4,15 @@
 基于网络搜索和历史文献扩展的完整数据库
 """
 
+from data.classics_index import ClassicsIndex
+
 class ClassicsDatabase:
     """古籍数据库类 - 全面扩展版"""
     
     def __init__(self):
         self.classics_data = self._initialize_classics_data()
+        # 全文索引在首次搜索时构建
+        self._keyword_index = None
         
     def _initialize_classics_data(self):
         """初始化古籍数据"""
@@ -461,18 +465,16 @@ class ClassicsDatabase:
         """获取指定要素类型的所有内容"""
         return self.classics_data.get(element_type, {})
         
-    def search_by_keyword(self, keyword):
-        """根据关键词搜索古籍内容"""
-        results = []
-        for element_type, elements in self.classics_data.items():
-            for element_value, content in elements.items():
-                if keyword in content['content'] or keyword in content['title']:
-                    results.append({
-                        'element_type': element_type,
-                        'element_value': element_value,
-                        'content': content
-                    })
-        return results
+    @property
+    def keyword_index(self):
+        """古籍全文倒排索引"""
+        if self._keyword_index is None:
+            self._keyword_index = ClassicsIndex(self.classics_data)
+        return self._keyword_index
+        
+    def search_by_keyword(self, keyword, limit=None):
+        """根据关键词搜索古籍内容（检索全部文本字段，按相关度排序）"""
+        return self.keyword_index.search(keyword, limit=limit)
     
     def get_all_theories(self):
         """获取所有理论内容"""
@@ -0,0 +1,148 @@
+"""
+古籍全文索引
+对古籍数据库的全部文本字段（content、interpretation、detailed_analysis、case_study 等）
+建立字符二元组（bigram）倒排索引；单字查询使用单字索引。
+查询时只需求几个倒排表的交集，再在候选字段上确认匹配、计分和高亮，
+耗时取决于命中数量而非古籍总量。
+"""
+
+import html
+
+# 字段权重：标题、要素名命中比正文更相关
+FIELD_WEIGHTS = {
+    'element_value': 4.0,
+    'title': 3.0,
+    'content': 2.0,
+    'interpretation': 1.5,
+    'source': 1.5,
+}
+DEFAULT_FIELD_WEIGHT = 1.0
+
+# 高亮片段在首个命中位置前后保留的字数
+SNIPPET_CONTEXT = 30
+
+
+def _grams(text):
+    """查询/索引使用的字符 n 元组：两个字及以上用二元组，单字用单字"""
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _iter_entries(classics_data):
+    """遍历所有古籍条目，嵌套分组中的条目一并展开：(要素类型, 分组, 要素值, 内容)"""
+    for element_type, elements in classics_data.items():
+        for element_value, content in elements.items():
+            if 'content' in content:
+                yield element_type, None, element_value, content
+                continue
+            for inner_value, inner_content in content.items():
+                if isinstance(inner_content, dict):
+                    yield element_type, element_value, inner_value, inner_content
+
+
+def _field_text(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return '\n'.join(_field_text(item) for item in value)
+    if isinstance(value, dict):
+        return '\n'.join(_field_text(item) for item in value.values())
+    return str(value)
+
+
+def highlight(text, keyword, context=SNIPPET_CONTEXT):
+    """截取首个命中位置附近的片段，命中处用 <mark> 包裹（其余文本已转义）"""
+    first = text.find(keyword)
+    if first < 0:
+        return html.escape(text)
+    start = max(0, first - context)
+    end = min(len(text), first + len(keyword) + context)
+    snippet = text[start:end]
+
+    parts = []
+    position = 0
+    while True:
+        found = snippet.find(keyword, position)
+        if found < 0:
+            break
+        parts.append(html.escape(snippet[position:found]))
+        parts.append(f'<mark>{html.escape(keyword)}</mark>')
+        position = found + len(keyword)
+    parts.append(html.escape(snippet[position:]))
+    return ('…' if start > 0 else '') + ''.join(parts) + ('…' if end < len(text) else '')
+
+
+class ClassicsIndex:
+    """古籍倒排索引"""
+
+    def __init__(self, classics_data):
+        self.entries = []     # (要素类型, 分组, 要素值, 内容)
+        self.documents = []   # (条目序号, 字段名, 文本)
+        self.postings = {}    # n 元组 -> 包含它的文档序号集合
+
+        postings = {}
+        for entry_id, entry in enumerate(_iter_entries(classics_data)):
+            self.entries.append(entry)
+            fields = [('element_value', entry[2])]
+            fields.extend((field, _field_text(value)) for field, value in entry[3].items())
+            for field, text in fields:
+                doc_id = len(self.documents)
+                self.documents.append((entry_id, field, text))
+                for gram in _grams(text) | set(text):
+                    postings.setdefault(gram, []).append(doc_id)
+        self.postings = {gram: frozenset(doc_ids) for gram, doc_ids in postings.items()}
+
+    def _candidates(self, keyword):
+        """倒排表求交集，得到可能包含关键词的文档"""
+        lists = []
+        for gram in _grams(keyword):
+            posting = self.postings.get(gram)
+            if not posting:
+                return frozenset()
+            lists.append(posting)
+        lists.sort(key=len)
+        return lists[0].intersection(*lists[1:])
+
+    def search(self, keyword, limit=None):
+        """检索关键词，按相关度排序，返回带命中字段和高亮片段的条目（limit 为 None 时不限条数）"""
+        if limit is not None and limit < 1:
+            raise ValueError(f'limit 必须为正整数：{limit}')
+        keyword = keyword.strip()
+        if not keyword:
+            return []
+
+        scores = {}
+        matched = {}
+        for doc_id in self._candidates(keyword):
+            entry_id, field, text = self.documents[doc_id]
+            # 二元组全部出现不代表连续出现，需要确认
+            count = text.count(keyword)
+            if not count:
+                continue
+            weight = FIELD_WEIGHTS.get(field, DEFAULT_FIELD_WEIGHT)
+            if field == 'element_value' and text == keyword:
+                weight *= 2
+            scores[entry_id] = scores.get(entry_id, 0.0) + weight * count
+            matched.setdefault(entry_id, []).append((field, text))
+
+        ranked = sorted(scores, key=lambda entry_id: (-scores[entry_id], entry_id))
+        if limit is not None:
+            ranked = ranked[:limit]
+
+        results = []
+        for entry_id in ranked:
+            element_type, group, element_value, content = self.entries[entry_id]
+            fields = sorted(matched[entry_id], key=lambda item: -FIELD_WEIGHTS.get(item[0], DEFAULT_FIELD_WEIGHT))
+            result = {
+                'element_type': element_type,
+                'element_value': element_value,
+                'content': content,
+                'score': round(scores[entry_id], 2),
+                'matched_fields': [field for field, _ in fields],
+                'highlights': {field: highlight(text, keyword) for field, text in fields}
+            }
+            if group is not None:
+                result['group'] = group
+            results.append(result)
+        return results
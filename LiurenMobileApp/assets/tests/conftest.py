@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""测试从 assets 目录导入 app、core、data"""
+
+import os
+import sys
+
+ASSETS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ASSETS_DIR not in sys.path:
+    sys.path.insert(0, ASSETS_DIR)
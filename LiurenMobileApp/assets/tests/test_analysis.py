@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""分析引擎结果缓存"""
+
+from core.engine import get_analysis_engine
+from core.liu_ren import LiuRenPan
+
+
+def test_cached_analysis_is_not_shared_between_calls():
+    engine = get_analysis_engine()
+    pan = LiuRenPan(2024, 5, 3, 10, 0).calculate()
+
+    first = engine.analyze(pan)
+    expected = engine.analyze(pan)
+    assert first == expected
+
+    # 修改一次返回结果的嵌套部分，不影响之后命中缓存的结果
+    poisoned = engine.analyze(pan)
+    poisoned['basic_analysis']['__poison__'] = 1
+    poisoned['case_analysis']['case_recommendations'].append('__poison__')
+    poisoned['metadata']['pan_result_summary']['ri_gan'] = '__poison__'
+
+    again = engine.analyze(pan)
+    assert '__poison__' not in again['basic_analysis']
+    assert again == expected
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""ASGI 入口：事件循环中直接返回的轻量路由、管理员令牌、排队已满时的 503"""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip('asgiref')
+import core.profiling  # noqa: E402
+from app import app  # noqa: E402
+from asgi import CpuOffloader, LiurenASGI  # noqa: E402
+
+CALCULATE_REQUEST = {'year': 2024, 'month': 5, 'day': 3, 'hour': 10, 'minute': 0}
+
+
+class Response:
+    def __init__(self, messages):
+        start = messages[0]
+        self.status = start['status']
+        self.headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in start['headers']}
+        self.body = b''.join(message.get('body', b'') for message in messages[1:])
+
+    def json(self):
+        return json.loads(self.body)
+
+
+async def request(application, method, path, query='', headers=(), body=b''):
+    scope = {
+        'type': 'http', 'method': method, 'path': path,
+        'query_string': query.encode('latin-1'),
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return Response(messages)
+
+
+def post_json(application, path, payload, headers=()):
+    return request(application, 'POST', path, headers=[('Content-Type', 'application/json'), *headers],
+                   body=json.dumps(payload).encode('utf-8'))
+
+
+@pytest.fixture
+def offloader():
+    # 用线程池代替进程池，测试中不启动工作进程
+    offloader = CpuOffloader(workers=1, concurrency=1, max_queue=1, pool='spawn')
+    offloader._executor = ThreadPoolExecutor(1)
+    yield offloader
+    offloader.shutdown()
+
+
+@pytest.fixture
+def fast_path(offloader):
+    """只允许事件循环内返回的 ASGI 应用，转交 Flask 即测试失败"""
+    application = LiurenASGI(app, offloader)
+
+    async def no_wsgi(scope, receive, send):
+        pytest.fail(f'{scope["method"]} {scope["path"]} 被转交给了 Flask')
+
+    application.wsgi = no_wsgi
+    return application
+
+
+@pytest.mark.parametrize('path, query', [
+    ('/theory', ''),
+    ('/api/text-dictionary', ''),
+    ('/api/classics/search', 'keyword=%E5%AD%90&limit=3'),
+    ('/api/classics/search', 'keyword=%E5%AD%90&limit=0'),
+    ('/api/classics/search', 'keyword=%E5%AD%90&limit=x'),
+])
+def test_fast_paths_match_flask(fast_path, path, query):
+    response = asyncio.run(request(fast_path, 'GET', path, query))
+    expected = app.test_client().get(f'{path}?{query}')
+    assert response.status == expected.status_code
+    assert response.json() == expected.get_json()
+
+
+def test_search_rejects_non_positive_limit(fast_path):
+    response = asyncio.run(request(fast_path, 'GET', '/api/classics/search', 'keyword=x&limit=0'))
+    assert response.status == 400
+    assert response.json()['success'] is False
+
+
+def test_static_fast_path_honours_etag(fast_path):
+    first = asyncio.run(request(fast_path, 'GET', '/theory'))
+    again = asyncio.run(request(fast_path, 'GET', '/theory', headers=[('If-None-Match', first.headers['etag'])]))
+    assert again.status == 304
+    assert again.body == b''
+
+
+def test_server_stats_requires_admin_token(fast_path, monkeypatch):
+    monkeypatch.setattr(core.profiling, 'ADMIN_TOKEN', 'secret')
+    for headers in ([], [('X-Admin-Token', 'wrong')]):
+        response = asyncio.run(request(fast_path, 'GET', '/api/server/stats', headers=headers))
+        assert response.status == 403
+        assert 'queued' not in response.json()
+
+    response = asyncio.run(request(fast_path, 'GET', '/api/server/stats', headers=[('X-Admin-Token', 'secret')]))
+    assert response.status == 200
+    assert response.json()['max_queue'] == 1
+
+
+def test_server_stats_disabled_without_configured_token(fast_path, monkeypatch):
+    monkeypatch.setattr(core.profiling, 'ADMIN_TOKEN', '')
+    response = asyncio.run(request(fast_path, 'GET', '/api/server/stats', headers=[('X-Admin-Token', '')]))
+    assert response.status == 403
+
+
+def test_offloaded_calculate_matches_flask(fast_path):
+    response = asyncio.run(post_json(fast_path, '/calculate', CALCULATE_REQUEST))
+    expected = app.test_client().post('/calculate', json=CALCULATE_REQUEST)
+    assert response.status == 200
+    assert response.json() == expected.get_json()
+    assert response.headers['etag'] == expected.headers['ETag']
+
+
+def test_queue_full_returns_503(fast_path, offloader):
+    async def scenario():
+        # 占住唯一的执行名额，第一个请求进入排队，第二个超出 max_queue
+        offloader._semaphore = asyncio.Semaphore(offloader.concurrency)
+        await offloader._semaphore.acquire()
+        queued = asyncio.create_task(post_json(fast_path, '/calculate', CALCULATE_REQUEST))
+        while offloader.queued == 0:
+            await asyncio.sleep(0)
+
+        rejected = await post_json(fast_path, '/calculate', CALCULATE_REQUEST)
+        offloader._semaphore.release()
+        return rejected, await queued
+
+    rejected, queued = asyncio.run(scenario())
+    assert rejected.status == 503
+    assert rejected.headers['retry-after'] == '1'
+    assert rejected.json()['success'] is False
+    assert queued.status == 200
+    assert queued.json()['success'] is True
+    assert offloader.stats()['rejected'] == 1
+    assert offloader.stats()['completed'] == 1
+    assert offloader.stats()['max_queued'] == 1
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""内置历表与 lunar_python 等价：年、月、日干支（交节、正月初一前后逐日）与月将（中气前后逐分钟）"""
+
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import pytest
+
+pytest.importorskip('lunar_python')
+from lunar_python import Lunar, LunarYear, Solar  # noqa: E402
+
+from core.calendar_table import JIE_QI_NAMES, ZHONG_QI_YUE_JIANG, load_calendar_table  # noqa: E402
+
+FIRST_YEAR = 1900
+LAST_YEAR = 2100
+
+# 儒略日与公历日序数（0001-01-01 为 1）之差
+JULIAN_DAY_OFFSET = 1721425
+
+
+@pytest.fixture(scope='module')
+def table():
+    return load_calendar_table()
+
+
+@lru_cache(maxsize=None)
+def solar_terms():
+    """lunar_python 给出的全部节气，[(时刻（精确到秒）, 名称)]，按时间排序"""
+    terms = {}
+    for year in range(FIRST_YEAR - 1, LAST_YEAR + 2):
+        for name, solar in Lunar.fromYmd(year, 1, 1).getJieQiTable().items():
+            if name in JIE_QI_NAMES:
+                moment = datetime(solar.getYear(), solar.getMonth(), solar.getDay(),
+                                  solar.getHour(), solar.getMinute(), solar.getSecond())
+                terms[moment] = name
+    return sorted(terms.items())
+
+
+@lru_cache(maxsize=None)
+def lunar_months():
+    """lunar_python 给出的农历月，[(首日公历日序数, 农历年, 月)]，闰月月份为负数"""
+    months = set()
+    for year in range(FIRST_YEAR - 1, LAST_YEAR + 2):
+        for month in LunarYear.fromYear(year).getMonths():
+            first_ordinal = int(month.getFirstJulianDay() + 0.5) - JULIAN_DAY_OFFSET
+            months.add((first_ordinal, month.getYear(), month.getMonth()))
+    return sorted(months)
+
+
+def lunar_date(ordinal):
+    """公历日序数 -> (农历年, 月, 日)"""
+    months = lunar_months()
+    index = bisect_right(months, (ordinal, float('inf'))) - 1
+    first_ordinal, year, month = months[index]
+    return year, month, ordinal - first_ordinal + 1
+
+
+def in_range(moment):
+    return FIRST_YEAR <= moment.year <= LAST_YEAR
+
+
+def pillar_sample_days():
+    """交节当天与前一天（换月柱）、正月初一与前一天（换年柱），另每隔三个月取一个月中"""
+    days = set()
+    for moment, name in solar_terms():
+        if JIE_QI_NAMES.index(name) % 2 == 0 and in_range(moment):
+            ordinal = moment.toordinal()
+            days.update((ordinal - 1, ordinal))
+    for index, (first_ordinal, _, month) in enumerate(lunar_months()):
+        if month == 1:
+            days.update((first_ordinal - 1, first_ordinal))
+        if index % 3 == 0:
+            days.add(first_ordinal + 14)
+    return sorted(day for day in days if in_range(datetime.fromordinal(day)))
+
+
+def test_pillars_match_lunar_python(table):
+    mismatches = []
+    for ordinal in pillar_sample_days():
+        year, month, day = lunar_date(ordinal)
+        lunar = Lunar.fromYmd(year, month, day)
+        solar = lunar.getSolar()
+        expected = (
+            datetime(solar.getYear(), solar.getMonth(), solar.getDay()).toordinal(),
+            lunar.getYearGan(), lunar.getYearZhi(),
+            lunar.getMonthGan(), lunar.getMonthZhi(),
+            lunar.getDayGan(), lunar.getDayZhi()
+        )
+        actual = table.lunar_day(year, month, day)
+        actual = (actual.solar_ordinal, actual.nian_gan, actual.nian_zhi,
+                  actual.yue_gan, actual.yue_zhi, actual.ri_gan, actual.ri_zhi)
+        if actual != expected:
+            mismatches.append(((year, month, day), actual, expected))
+    assert mismatches == []
+
+
+def test_nonexistent_lunar_dates_are_rejected(table):
+    lunar_year = LunarYear.fromYear(2024)
+    assert lunar_year.getLeapMonth() == 0
+    invalid = [(2024, -3, 1), (2024, 13, 1)]
+    invalid += [(2024, month.getMonth(), 30) for month in lunar_year.getMonths()
+                if month.getYear() == 2024 and month.getDayCount() == 29]
+    for year, month, day in invalid:
+        with pytest.raises(ValueError):
+            table.lunar_day(year, month, day)
+
+
+@lru_cache(maxsize=None)
+def zhong_qi_terms():
+    """[(交中气时刻, ...)], [中气名, ...]"""
+    terms = [(time, name) for time, name in solar_terms() if JIE_QI_NAMES.index(name) % 2 == 1]
+    return [time for time, _ in terms], [name for _, name in terms]
+
+
+def expected_zhong_qi(moment):
+    """moment（整分钟）时已交的最近一个中气"""
+    starts, names = zhong_qi_terms()
+    return names[bisect_right(starts, moment) - 1]
+
+
+def test_expected_zhong_qi_matches_get_prev_qi():
+    # 校验本测试的参照算法本身
+    for start, name in zip(*zhong_qi_terms()):
+        if start.year != 2024:
+            continue
+        minute = start.replace(second=0)
+        for sample in (minute, minute + timedelta(minutes=1)):
+            lunar = Solar.fromYmdHms(sample.year, sample.month, sample.day,
+                                     sample.hour, sample.minute, 0).getLunar()
+            assert expected_zhong_qi(sample) == lunar.getPrevQi().getName()
+
+
+def test_yue_jiang_matches_lunar_python_around_every_zhong_qi(table):
+    offsets = [timedelta(minutes=minutes) for minutes in (-1440, -1, 0, 1, 1440)]
+    mismatches = []
+    for start in zhong_qi_terms()[0]:
+        if not in_range(start):
+            continue
+        minute = start.replace(second=0)
+        for offset in offsets:
+            sample = minute + offset
+            name = expected_zhong_qi(sample)
+            expected = (ZHONG_QI_YUE_JIANG[name], name)
+            actual = table.yue_jiang(sample.toordinal(), sample.hour, sample.minute)
+            if actual != expected:
+                mismatches.append((sample, actual, expected))
+    assert mismatches == []
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""案例语料库：服务进程只打开不构建，构建只在开始服务前进行"""
+
+import os
+
+import pytest
+
+import data.case_corpus as case_corpus
+from data.case_corpus import (CorpusNotBuiltError, CaseCorpus, build_case_corpus, ensure_case_corpora,
+                              load_case_corpus)
+from data.case_database_ultra_massive_fast import UltraMassiveCaseDatabaseFast
+from data.case_store import CASE_SEED
+
+
+def small_database(path):
+    class SmallCaseDatabase(UltraMassiveCaseDatabaseFast):
+        CORPUS_PATH = str(path)
+        CASES_PER_CATEGORY = 50
+    return SmallCaseDatabase
+
+
+def build_small(path, seed=CASE_SEED):
+    base_pan_results, case_templates = UltraMassiveCaseDatabaseFast._get_case_templates()
+    build_case_corpus(str(path), base_pan_results, case_templates, 50, seed=seed, workers=1)
+
+
+def test_missing_corpus_is_not_built_on_load(tmp_path):
+    path = tmp_path / 'missing.cases'
+    with pytest.raises(CorpusNotBuiltError, match='python -m data.case_corpus'):
+        load_case_corpus(str(path))
+    with pytest.raises(CorpusNotBuiltError):
+        small_database(path)()
+    assert os.listdir(tmp_path) == []
+
+
+def test_stale_or_invalid_corpus_is_rejected(tmp_path):
+    path = tmp_path / 'small.cases'
+    build_small(path, seed=CASE_SEED + 1)
+    with pytest.raises(CorpusNotBuiltError, match='种子'):
+        load_case_corpus(str(path))
+
+    path.write_bytes(b'not a corpus')
+    with pytest.raises(CorpusNotBuiltError, match='无效'):
+        load_case_corpus(str(path))
+
+
+def test_ensure_builds_only_missing_or_stale_corpora(tmp_path, monkeypatch):
+    path = tmp_path / 'small.cases'
+    monkeypatch.setattr(case_corpus, '_corpus_databases', lambda: (small_database(path),))
+
+    ensure_case_corpora(workers=1)
+    corpus = load_case_corpus(str(path))
+    assert len(corpus) == 50 * len(corpus.categories)
+    corpus.close()
+
+    mtime = path.stat().st_mtime_ns
+    ensure_case_corpora(workers=1)
+    assert path.stat().st_mtime_ns == mtime
+
+    build_small(path, seed=CASE_SEED + 1)
+    ensure_case_corpora(workers=1)
+    load_case_corpus(str(path)).close()
+
+
+def test_rebuild_replaces_file_atomically(tmp_path):
+    path = tmp_path / 'small.cases'
+    build_small(path)
+    # 已打开的 mmap 仍指向旧文件，替换后新打开的是完整的新文件，不留临时文件
+    opened = CaseCorpus(str(path))
+    first_case = opened.get_case(0)
+    build_small(path)
+    assert opened.get_case(0) == first_case
+    opened.close()
+    assert os.listdir(tmp_path) == ['small.cases']
+    load_case_corpus(str(path)).close()
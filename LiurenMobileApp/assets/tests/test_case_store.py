@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""案例生成：同一种子下串行与进程池并行生成的列数据、语料库文件逐字节相同"""
+
+import concurrent.futures
+
+import pytest
+
+from data.case_corpus import build_case_corpus
+from data.case_database_ultra_massive_fast import UltraMassiveCaseDatabaseFast
+from data.case_store import CASE_SEED, generate_case_columns
+
+CASES_PER_CATEGORY = 300
+
+
+@pytest.fixture(scope='module')
+def templates():
+    return UltraMassiveCaseDatabaseFast._get_case_templates()
+
+
+def column_bytes(columns):
+    return {name: (data.typecode, data.tobytes()) for name, data in columns.items()}
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    """记录 generate_case_columns 创建的进程池，确认并行路径确实经过 ProcessPoolExecutor"""
+    created = []
+
+    class RecordingPool(concurrent.futures.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', RecordingPool)
+    return created
+
+
+def test_parallel_generation_matches_serial(templates, pools):
+    base_pan_results, case_templates = templates
+    # 分块小于每类案例数，同一类别跨多个分块
+    serial = generate_case_columns(base_pan_results, case_templates, CASES_PER_CATEGORY,
+                                   CASE_SEED, workers=1, chunk_size=128)
+    parallel = generate_case_columns(base_pan_results, case_templates, CASES_PER_CATEGORY,
+                                     CASE_SEED, workers=2, chunk_size=128)
+    assert len(pools) == 1
+    assert serial[0] == parallel[0]
+    assert column_bytes(serial[1]) == column_bytes(parallel[1])
+    assert len(serial[1]['category']) == CASES_PER_CATEGORY * len(case_templates)
+
+    other_seed = generate_case_columns(base_pan_results, case_templates, CASES_PER_CATEGORY,
+                                       CASE_SEED + 1, workers=1, chunk_size=128)
+    assert column_bytes(other_seed[1]) != column_bytes(serial[1])
+
+
+def test_parallel_corpus_file_matches_serial(templates, tmp_path, pools):
+    base_pan_results, case_templates = templates
+    paths = []
+    for workers in (1, 2):
+        path = tmp_path / f'workers{workers}.cases'
+        build_case_corpus(str(path), base_pan_results, case_templates, CASES_PER_CATEGORY,
+                          seed=CASE_SEED, workers=workers)
+        paths.append(path)
+    assert len(pools) == 1
+    assert paths[0].read_bytes() == paths[1].read_bytes()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""CBOR 编解码与文本字典"""
+
+import json
+
+import pytest
+
+from core import cbor
+from core.text_dictionary import TextDictionary
+
+
+def normalized(value):
+    """tuple 解码为 list，按 JSON 形式比较"""
+    return json.loads(json.dumps(value, ensure_ascii=False))
+
+
+def test_round_trip_without_dictionary():
+    payload = {
+        'none': None, 'true': True, 'false': False,
+        'ints': [0, 23, 24, 255, 256, 65535, 65536, 2 ** 32, 2 ** 63, -1, -24, -25, -2 ** 40],
+        'floats': [0.5, 1.1, -2.25, 1e300],
+        'text': ['', '六壬', 'a' * 300],
+        'bytes': b'\x00\xff',
+        'nested': {'list': [1, [2, {'x': ()}]]},
+        1: 'int key', -3: 'negative key'
+    }
+    decoded = cbor.loads(cbor.dumps(payload))
+    assert decoded == {**payload, 'nested': {'list': [1, [2, {'x': []}]]}}
+    assert decoded[1] == 'int key' and decoded[-3] == 'negative key'
+
+
+def test_tag_round_trip():
+    assert cbor.loads(cbor.dumps(cbor.Tag(1, 1700000000))) == cbor.Tag(1, 1700000000)
+
+
+def test_known_encodings():
+    # RFC 8949 附录 A 的示例
+    assert cbor.dumps(100) == bytes.fromhex('1864')
+    assert cbor.dumps(-1000) == bytes.fromhex('3903e7')
+    assert cbor.dumps(1.5) == bytes.fromhex('fa3fc00000')
+    assert cbor.dumps('IETF') == bytes.fromhex('6449455446')
+    assert cbor.dumps({'a': 1, 'b': [2, 3]}) == bytes.fromhex('a26161016162820203')
+
+
+@pytest.fixture
+def dictionary():
+    sources = [{'meaning': '贵人相助', 'influence': '旺相时贵人相助'}, ['青龙', '白虎']]
+    records = [{'chang_sheng': ('亥', '子', '丑')} for _ in range(10)]
+    return TextDictionary.build(sources, records)
+
+
+def test_round_trip_with_dictionary(dictionary):
+    payload = {
+        'meaning': '贵人相助',
+        'shen': ['青龙', '白虎', '不在字典中'],
+        'chang_sheng': ('亥', '子', '丑'),
+        'other': {'chang_sheng': ['亥', '子', '寅']},
+        'count': 3
+    }
+    data = dictionary.encode(payload)
+    assert normalized(dictionary.decode(data)) == normalized(payload)
+    # 字典中的文本与整块取值都换成了编号
+    assert '贵人相助'.encode('utf-8') not in data
+    assert len(data) < len(cbor.dumps(payload))
+
+
+def test_int_keys_are_rejected_with_dictionary(dictionary):
+    with pytest.raises(TypeError):
+        dictionary.encode({'meaning': {1: '贵人相助'}})
+    # 不用字典时整数键照常编码
+    assert cbor.loads(cbor.dumps({1: '贵人相助'})) == {1: '贵人相助'}
+
+
+def test_unknown_references_are_rejected(dictionary):
+    bad_key = bytes([0xa1]) + cbor.dumps(len(dictionary.strings)) + cbor.dumps(1)
+    with pytest.raises(ValueError):
+        dictionary.decode(bad_key)
+    bad_tag = cbor.dumps(cbor.Tag(cbor.TEXT_REF_TAG, len(dictionary.strings)))
+    with pytest.raises(ValueError):
+        dictionary.decode(bad_tag)
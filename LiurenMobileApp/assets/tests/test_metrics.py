@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""阶段耗时直方图"""
+
+import threading
+
+from core.metrics import Histogram
+
+
+def test_histogram_counts_across_threads():
+    histogram = Histogram(buckets=(0.001, 0.01))
+    for value in (0.0005, 0.005, 0.05):
+        histogram.observe(value)
+    cumulative, count, total = histogram.snapshot()
+    assert cumulative == [1, 2]
+    assert count == 3
+    assert abs(total - 0.0555) < 1e-12
+
+
+def test_exited_threads_do_not_accumulate_shards():
+    # 与 Werkzeug 开发服务器一样，每个请求一个新线程
+    histogram = Histogram(buckets=(0.001, 0.01))
+    for _ in range(500):
+        thread = threading.Thread(target=histogram.observe, args=(0.005,))
+        thread.start()
+        thread.join()
+
+    histogram.observe(0.0005)
+    assert len(histogram._shards) <= 2
+    cumulative, count, total = histogram.snapshot()
+    assert cumulative == [1, 501]
+    assert count == 501
+    assert abs(total - (500 * 0.005 + 0.0005)) < 1e-9
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""预计算排盘表：抽样与实时计算一致，源码指纹或版本过期时重新构建"""
+
+import random
+
+import pytest
+
+import core.pan_table as pan_table
+from core.frozen import freeze
+from core.liu_ren import LiuRenPan
+from core.pan_table import (PAN_TABLE_VERSION, PanTable, compute_entry, get_pan_table, iter_combinations,
+                            load_pan_table, source_fingerprint)
+
+SAMPLE_SIZE = 1000
+
+
+def sample_combinations():
+    """固定种子抽样，另加 甲子日 的全部 时辰 × 月将"""
+    combinations = list(iter_combinations())
+    sample = set(random.Random(20240101).sample(combinations, SAMPLE_SIZE))
+    sample.update(combinations[:144])
+    return sorted(sample)
+
+
+def test_sample_matches_live_computation():
+    table = get_pan_table()
+    assert len(table) == 60 * 12 * 12
+    assert table.fingerprint == source_fingerprint()
+
+    pans = [LiuRenPan(2000, 1, 1, shi_index * 2, 0) for shi_index in range(12)]
+    mismatches = []
+    for ri_gan, ri_zhi, shi_index, yue_jiang in sample_combinations():
+        expected = freeze(compute_entry(pans[shi_index], ri_gan, ri_zhi, yue_jiang))
+        if table.lookup(ri_gan, ri_zhi, shi_index, yue_jiang) != expected:
+            mismatches.append((ri_gan, ri_zhi, shi_index, yue_jiang))
+    assert mismatches == []
+
+
+@pytest.mark.parametrize('version, fingerprint', [
+    (PAN_TABLE_VERSION, 'stale'),
+    (PAN_TABLE_VERSION - 1, None),
+])
+def test_stale_table_is_rebuilt(tmp_path, version, fingerprint):
+    path = str(tmp_path / 'pan_table.pickle')
+    PanTable({}, version, fingerprint or source_fingerprint()).save(path)
+    with pytest.raises(ValueError):
+        PanTable.load(path)
+
+    table = load_pan_table(path)
+    assert len(table) == 60 * 12 * 12
+    assert table.fingerprint == source_fingerprint()
+    # 重新构建的表已写回文件
+    assert len(PanTable.load(path)) == len(table)
+
+
+def test_source_change_invalidates_table(tmp_path, monkeypatch):
+    path = str(tmp_path / 'pan_table.pickle')
+    PanTable({}, PAN_TABLE_VERSION, source_fingerprint()).save(path)
+    assert len(load_pan_table(path)) == 0
+
+    # liu_ren.py 改动后指纹变化，旧表不再使用
+    monkeypatch.setattr(pan_table, 'source_fingerprint', lambda: 'changed')
+    table = load_pan_table(path)
+    assert table.fingerprint == 'changed'
+    assert len(table) == 60 * 12 * 12
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""相似案例查找（列式存储 + 分桶索引 + NumPy）与逐个案例调用 _calculate_similarity 的原始算法结果一致"""
+
+import pytest
+
+import data.case_store as case_store
+from core.liu_ren import LiuRenPan
+from data.case_corpus import build_case_corpus
+from data.case_database_ultra_massive import UltraMassiveCaseDatabase
+from data.case_database_ultra_massive_fast import UltraMassiveCaseDatabaseFast
+
+CASES_PER_CATEGORY = 300
+
+
+def baseline_find_similar_cases(db, pan_result, category=None, min_similarity=0.3, limit=10, cases=None):
+    """改为列式存储之前的实现：遍历全部案例逐个计算相似度，稳定排序后截取"""
+    similar_cases = []
+    for case_id, case_data in cases or ((case_id, db.cases[case_id]) for case_id in db.cases):
+        if category and case_data['category'] != category:
+            continue
+        similarity = db._calculate_similarity(pan_result, case_data['pan_result'])
+        if similarity >= min_similarity:
+            similar_cases.append({'case_id': case_id, 'similarity': similarity, 'case_data': case_data})
+    similar_cases.sort(key=lambda x: x['similarity'], reverse=True)
+    return similar_cases[:limit]
+
+
+@pytest.fixture(scope='module', params=[UltraMassiveCaseDatabaseFast, UltraMassiveCaseDatabase],
+                ids=['fast', 'full'])
+def db(request, tmp_path_factory):
+    db_class = request.param
+    path = str(tmp_path_factory.mktemp('corpus') / 'small.cases')
+    base_pan_results, case_templates = db_class._get_case_templates()
+    build_case_corpus(path, base_pan_results, case_templates, CASES_PER_CATEGORY, workers=1)
+    db = db_class(corpus_path=path)
+    yield db
+    db.corpus.close()
+
+
+def queries(db):
+    """语料库中的排盘、实时排盘（三传为字典）、部分字段缺失或未知的排盘"""
+    pans = [db.corpus.get_case(row)['pan_result'] for row in (0, 7, 123, len(db.cases) - 1)]
+    pans.append(LiuRenPan(2024, 5, 3, 10, 0).calculate())
+    pans.append({'ri_gan': '甲', 'ri_zhi': '子'})
+    pans.append({'ri_gan': '甲', 'ri_zhi': '未知', 'yue_jiang': '寅', 'san_chuan': {'method': '贼克法'}})
+    pans.append({})
+    return pans
+
+
+@pytest.mark.parametrize('use_numpy', [True, False], ids=['numpy', 'python'])
+def test_find_similar_cases_matches_baseline(db, use_numpy, monkeypatch):
+    if use_numpy and case_store.np is None:
+        pytest.skip('未安装 numpy')
+    if not use_numpy:
+        monkeypatch.setattr(case_store, 'np', None)
+
+    # 全部案例字典只生成一次，各组参数共用
+    cases = [(case_id, db.cases[case_id]) for case_id in db.cases]
+    categories = [None, 'career', 'family', 'unknown']
+    # 四项得分之和再除以 4，相似度最大为 0.25
+    thresholds = [0.0, 0.05, 0.1, 0.125, 0.2, 0.25, 0.3]
+    limits = [1, 10, 250, None]
+    mismatches = []
+    compared = 0
+    for pan_result in queries(db):
+        for category in categories:
+            for min_similarity in thresholds:
+                for limit in limits:
+                    expected = baseline_find_similar_cases(db, pan_result, category, min_similarity, limit,
+                                                           cases)
+                    actual = db.find_similar_cases(pan_result, category, min_similarity, limit)
+                    if actual != expected:
+                        mismatches.append((pan_result.get('ri_gan'), category, min_similarity, limit))
+                    compared += len(expected) > 1
+    assert mismatches == []
+    assert compared > 100
+
+
+def test_baseline_finds_matches(db):
+    # 比对有意义：精确匹配的排盘能找到案例，且相似度取到最大值
+    pan_result = db.corpus.get_case(0)['pan_result']
+    cases = baseline_find_similar_cases(db, pan_result, min_similarity=0.0, limit=None)
+    assert len(cases) == len(db.cases)
+    assert cases[0]['similarity'] == max(case_store.SIMILARITY_BY_MASK)
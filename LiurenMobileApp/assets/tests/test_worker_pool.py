@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""预派生进程池：异常类型、工作进程退出与超时后的重新派生、基于 pidfd 的存活判断"""
+
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from core.worker_pool import (RemoteTraceback, WorkerCrashedError, WorkerPool, WorkerTimeoutError,
+                              _Spawner, _Worker)
+
+pytestmark = pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+                                reason='进程池依赖 fork')
+
+
+class PairError(Exception):
+    """构造参数与 args 不一致，无法原样序列化往返"""
+
+    def __init__(self, left, right):
+        super().__init__(f'{left}-{right}')
+
+
+def square(x):
+    return x * x
+
+
+def raise_value_error(message):
+    raise ValueError(message)
+
+
+def raise_with_unpicklable_attribute():
+    error = LookupError('带锁的异常')
+    error.lock = threading.Lock()
+    raise error
+
+
+def raise_pair_error():
+    raise PairError('a', 'b')
+
+
+def return_unpicklable():
+    return threading.Lock()
+
+
+def crash():
+    os._exit(3)
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+@pytest.fixture
+def pool():
+    pool = WorkerPool(1, health_interval=0.2, task_timeout=1.0, preload_data=False)
+    yield pool
+    pool.shutdown()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_results(pool):
+    assert list(pool.map(square, range(5))) == [0, 1, 4, 9, 16]
+
+
+def test_exception_keeps_its_type(pool):
+    with pytest.raises(ValueError, match='^参数错误$') as info:
+        pool.submit(raise_value_error, '参数错误').result()
+    assert isinstance(info.value.__cause__, RemoteTraceback)
+    assert 'raise_value_error' in str(info.value.__cause__)
+
+    # 异常本身无法序列化时按类型和消息重建
+    with pytest.raises(LookupError, match='带锁的异常'):
+        pool.submit(raise_with_unpicklable_attribute).result()
+
+    # 类型无法用消息重建时退回 RuntimeError
+    with pytest.raises(RuntimeError, match='PairError: a-b'):
+        pool.submit(raise_pair_error).result()
+
+    # 结果无法序列化时不拖垮工作进程
+    with pytest.raises(TypeError):
+        pool.submit(return_unpicklable).result()
+    assert pool.health()[0]['restarts'] == 0
+    assert pool.submit(square, 3).result() == 9
+
+
+def test_crashed_worker_is_replaced(pool):
+    pid = pool.health()[0]['pid']
+    with pytest.raises(WorkerCrashedError):
+        pool.submit(crash).result()
+    assert pool.submit(square, 4).result() == 16
+    status = pool.health()[0]
+    assert status['restarts'] == 1
+    assert status['pid'] != pid
+    assert status['alive']
+
+
+def test_task_timeout_restarts_worker(pool):
+    started = time.monotonic()
+    with pytest.raises(WorkerTimeoutError):
+        pool.submit(sleep, 10).result()
+    assert time.monotonic() - started < 5
+    assert pool.submit(sleep, 0).result() == 0
+    assert pool.health()[0]['restarts'] == 1
+
+
+def test_health_check_replaces_killed_idle_worker(pool):
+    pid = pool.health()[0]['pid']
+    os.kill(pid, signal.SIGKILL)
+    wait_for(lambda: pool.health()[0]['restarts'] == 1 and pool.health()[0]['alive'])
+    assert pool.health()[0]['pid'] != pid
+    assert pool.submit(square, 5).result() == 25
+
+
+def test_worker_liveness_follows_the_process_not_the_pid():
+    spawner = _Spawner(multiprocessing.get_context('fork'))
+    try:
+        worker = _Worker(0, spawner)
+        pid = worker.pid
+        assert worker.is_alive()
+        os.kill(pid, signal.SIGKILL)
+        worker._wait_exit(5.0)
+        assert not worker.is_alive()
+        # 派生进程及时回收，不留僵尸进程
+        wait_for(lambda: not os.path.exists(f'/proc/{pid}'))
+        worker.stop()
+        assert not worker.is_alive()
+    finally:
+        spawner.stop()